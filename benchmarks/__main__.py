@@ -0,0 +1,57 @@
+"""
+Run the roster benchmarks and compare them against the stored baseline.
+
+Typical usage:
+  python -m benchmarks                          # all benchmarks, fail on regression
+  python -m benchmarks fill_roster --registrars 25 --months 3
+  python -m benchmarks --save                   # record a new baseline
+
+Exits with status 1 if any result regressed beyond the tolerances in `harness`.
+"""
+
+import argparse
+import os
+import sys
+
+import django
+
+
+def main(argv=None) -> int:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+    django.setup()
+
+    from benchmarks import harness
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[1])
+    parser.add_argument("names", nargs="*", metavar="NAME", help=f"One of {', '.join(harness.BENCHMARKS)}")
+    parser.add_argument("--registrars", type=int, nargs="+", default=harness.REGISTRARS)
+    parser.add_argument("--months", type=int, nargs="+", default=harness.MONTHS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="Merge the results into the baseline")
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in harness.BENCHMARKS:
+            parser.error(f"unknown benchmark {name!r}")
+
+    def log(key, result):
+        if result["error"]:
+            print(f"{key:<28} ERROR {result['error']}")
+        else:
+            print(f"{key:<28} {result['wall']:>9.4f}s {result['peak_kib']:>10.1f}KiB {result['calls']:>11} calls")
+
+    results = harness.run_benchmarks(args.names, args.registrars, args.months, args.repeat, log=log)
+    baseline = harness.load_baseline()
+
+    if args.save:
+        harness.save_baseline(baseline | results)
+        print(f"Saved {len(results)} results to {harness.BASELINE}")
+        return 0
+
+    regressions = harness.compare(results, baseline)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
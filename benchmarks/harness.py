@@ -0,0 +1,227 @@
+"""
+Benchmarks of the roster generation and validation hot paths.
+
+Each benchmark runs over seeded synthetic data (see `radscheduler.roster.synthetic`)
+for every combination of registrar count and horizon, and records:
+
+- wall: best wall time of REPEAT runs, in seconds
+- peak_kib: peak memory allocated by the run, from tracemalloc
+- calls: total function calls, from cProfile
+
+Call counts are deterministic, so they catch algorithmic regressions on any machine.
+Wall times are only comparable on similar hardware and get a looser tolerance.
+"""
+
+import cProfile
+import json
+import pstats
+import random
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+from radscheduler.roster import AutoAssigner, SingleOnCallRoster
+from radscheduler.roster.generator import generate_shifts
+from radscheduler.roster.synthetic import SyntheticRoster, synthetic_roster
+from radscheduler.roster.validators import StonzMecaValidator, validate_roster
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+REGISTRARS = (10, 25, 50)
+MONTHS = (1, 3, 6, 12)
+START = date(2024, 1, 1)
+SEED = 0
+
+# Allowed growth over the baseline before it is reported as a regression
+CALLS_TOLERANCE = 1.10
+PEAK_TOLERANCE = 1.25
+WALL_TOLERANCE = 1.50
+
+
+@dataclass
+class Result:
+    wall: float
+    peak_kib: float
+    calls: int
+    error: str = ""
+
+
+def horizon(months: int) -> date:
+    return START + timedelta(days=round(months * 365 / 12) - 1)
+
+
+def _filled(data: SyntheticRoster):
+    random.seed(SEED)
+    shifts = generate_shifts(SingleOnCallRoster, data.start, data.end)
+    return AutoAssigner(data.registrars, shifts, leaves=data.leaves, statuses=data.statuses).fill_roster()
+
+
+def bench_generate_shifts(data: SyntheticRoster):
+    return lambda: generate_shifts(SingleOnCallRoster, data.start, data.end)
+
+
+def bench_fill_roster(data: SyntheticRoster):
+    def run():
+        random.seed(SEED)
+        shifts = generate_shifts(SingleOnCallRoster, data.start, data.end)
+        return AutoAssigner(data.registrars, shifts, leaves=data.leaves, statuses=data.statuses).fill_roster()
+
+    return run
+
+
+def bench_is_valid(data: SyntheticRoster):
+    """
+    Validate every registrar against the first 2 weeks of shifts of a filled roster.
+    """
+    filled = _filled(data)
+    candidates = [shift for shift in filled if shift.date < data.start + timedelta(days=14)]
+
+    def run():
+        return [
+            StonzMecaValidator(shift, registrar, filled, leaves=data.leaves, statuses=data.statuses).is_valid()
+            for shift in candidates
+            for registrar in data.registrars
+        ]
+
+    return run
+
+
+def bench_validate_roster(data: SyntheticRoster):
+    filled = _filled(data)
+    return lambda: validate_roster(filled, data.leaves, data.statuses)
+
+
+def bench_mappers(data: SyntheticRoster):
+    """
+    Map ORM instances of a filled roster to the domain models.
+    """
+    from radscheduler.core import domain_mapper
+    from radscheduler.core import models as orm
+    from radscheduler.users.models import User
+
+    registrars = {
+        registrar.id: orm.Registrar(
+            id=registrar.id,
+            user=User(username=registrar.username),
+            senior=registrar.senior,
+            start=registrar.start,
+        )
+        for registrar in data.registrars
+    }
+    shifts = [
+        orm.Shift(
+            id=idx,
+            date=shift.date,
+            type=shift.type,
+            registrar=registrars[shift.registrar.id],
+            stat_day=shift.stat_day,
+        )
+        for idx, shift in enumerate(_filled(data), start=1)
+        if shift.registrar
+    ]
+    leaves = [
+        orm.Leave(date=leave.date, type=leave.type, registrar=registrars[leave.registrar.id]) for leave in data.leaves
+    ]
+    statuses = [
+        orm.Status(
+            start=status.start,
+            end=status.end,
+            type=status.type,
+            registrar=registrars[status.registrar.id],
+            weekdays=list(status.weekdays),
+            shift_types=list(status.shift_types),
+        )
+        for status in data.statuses
+    ]
+
+    def run():
+        return (
+            [domain_mapper.registrar_from_db(registrar) for registrar in registrars.values()],
+            [domain_mapper.shift_from_db(shift) for shift in shifts],
+            [domain_mapper.leave_from_db(leave) for leave in leaves],
+            [domain_mapper.status_from_db(status) for status in statuses],
+        )
+
+    return run
+
+
+BENCHMARKS = {
+    "generate_shifts": bench_generate_shifts,
+    "fill_roster": bench_fill_roster,
+    "is_valid": bench_is_valid,
+    "validate_roster": bench_validate_roster,
+    "mappers": bench_mappers,
+}
+
+
+def measure(run, repeat: int = 3) -> Result:
+    """
+    Time, trace and profile RUN in separate passes, so the tracing overhead does not skew the wall time.
+    """
+    try:
+        wall = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            wall = min(wall, time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        profile = cProfile.Profile()
+        profile.runcall(run)
+        calls = pstats.Stats(profile).total_calls
+    except Exception as e:
+        return Result(wall=0.0, peak_kib=0.0, calls=0, error=f"{type(e).__name__}: {e}")
+
+    return Result(wall=round(wall, 4), peak_kib=round(peak / 1024, 1), calls=calls)
+
+
+def run_benchmarks(names=None, registrars=REGISTRARS, months=MONTHS, repeat: int = 3, log=None) -> dict:
+    """
+    Run the named benchmarks (all by default) and return results keyed by "name/registrars x months".
+    """
+    results = {}
+    for count in registrars:
+        for length in months:
+            data = synthetic_roster(count, START, horizon(length), seed=SEED)
+            for name in names or BENCHMARKS:
+                key = f"{name}/{count}x{length}"
+                results[key] = asdict(measure(BENCHMARKS[name](data), repeat))
+                if log:
+                    log(key, results[key])
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """
+    Describe every result that regressed beyond the tolerances, or newly errors.
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result["error"] and not base["error"]:
+            regressions.append(f"{key}: {result['error']}")
+            continue
+        for field, tolerance in [("calls", CALLS_TOLERANCE), ("peak_kib", PEAK_TOLERANCE), ("wall", WALL_TOLERANCE)]:
+            if base[field] and result[field] > base[field] * tolerance:
+                regressions.append(f"{key}: {field} {result[field]} > {base[field]} x {tolerance}")
+    return regressions
+
+
+def load_baseline(path: Path = BASELINE) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(results: dict, path: Path = BASELINE):
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
@@ -48,6 +48,30 @@ LOCALE_PATHS = [str(BASE_DIR / "locale")]
 # https://docs.djangoproject.com/en/dev/ref/settings/#databases
 DATABASES = {"default": env.db("DATABASE_URL")}
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# A streaming replica of the default database, read by the read-only views (see `radscheduler.core.db_router`)
+if env("DATABASE_REPLICA_URL", default=""):
+    DATABASES["replica"] = env.db("DATABASE_REPLICA_URL")
+# PostgreSQL, timing the wait for a connection (see `radscheduler.core.db_backend`)
+for database in DATABASES.values():
+    database["ENGINE"] = "radscheduler.core.db_backend"
+# Connection pool of each process, when enabled (production)
+# https://docs.djangoproject.com/en/dev/ref/databases/#connection-pool
+# A gunicorn worker holds a connection per thread while it serves a request, and one for the print job
+# thread, so the pool needs threads + 1. All workers of all machines must fit in Postgres max_connections.
+DATABASE_POOL_OPTIONS = {
+    "min_size": env.int("DATABASE_POOL_MIN_SIZE", default=1),
+    "max_size": env.int("DATABASE_POOL_MAX_SIZE", default=4),
+    # Seconds a request waits for a connection before failing, well under the gunicorn timeout
+    "timeout": env.float("DATABASE_POOL_TIMEOUT", default=10),
+    # Seconds before connections above min_size are closed, after the load went down
+    "max_idle": env.float("DATABASE_POOL_MAX_IDLE", default=300),
+}
+# https://docs.djangoproject.com/en/dev/ref/settings/#database-routers
+DATABASE_ROUTERS = ["radscheduler.core.db_router.ReplicaRouter"]
+# Alias of the replica, the read-only views use the default database when it is not configured
+REPLICA_DATABASE = "replica"
+# Seconds the reads of a user stay on the default database after they wrote, until the replica caught up
+READ_YOUR_WRITES_SECONDS = env.int("READ_YOUR_WRITES_SECONDS", default=10)
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -133,6 +157,8 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    # Outermost, so it times the whole request
+    "radscheduler.core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -140,6 +166,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "radscheduler.core.db_router.ReplicaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
@@ -294,6 +321,32 @@ WEBPACK_LOADER = {
     }
 }
 
+# iCal feeds
+# ------------------------------------------------------------------------------
+# Days of past events included in the iCal feeds
+ICAL_HISTORY_DAYS = env.int("ICAL_HISTORY_DAYS", default=30)
+# Maximum days of future events included in the iCal feeds (further clamped by the publish date range)
+ICAL_HORIZON_DAYS = env.int("ICAL_HORIZON_DAYS", default=365)
+
+# Query budgets
+# ------------------------------------------------------------------------------
+# Most queries per request for views that cannot use the @query_budget decorator, by URL name
+# (see `radscheduler.core.metrics`)
+QUERY_BUDGETS = {
+    "admin:core_leave_changelist": 9,  # the print action queues a job for the selected leaves
+    "api-1.0.0:shift_events": 2,
+    "api-1.0.0:leave_events": 2,
+}
+# Raise instead of logging a warning when a view goes over its budget
+QUERY_BUDGET_RAISE = env.bool("QUERY_BUDGET_RAISE", default=False)
+
+# Leave forms
+# ------------------------------------------------------------------------------
+# Processes rendering big print batches (see `radscheduler.paper_forms.render`), 0 renders them in the request
+PAPER_FORMS_WORKERS = env.int("PAPER_FORMS_WORKERS", default=2)
+# Run queued print jobs in a thread of the web process, otherwise in the `print_worker` command
+PRINT_JOBS_IN_PROCESS = env.bool("PRINT_JOBS_IN_PROCESS", default=True)
+
 # django-extensions
 # ------------------------------------------------------------------------------
 # https://django-extensions.readthedocs.io/en/latest/installation_instructions.html#configuration
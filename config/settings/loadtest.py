@@ -0,0 +1,42 @@
+"""
+Production-like settings for the local load-test stack (see `loadtest.yml`).
+
+Runs under gunicorn with DEBUG off, Postgres and Redis, without the TLS and
+asset build requirements of production.
+"""
+
+from .base import *  # noqa
+from .base import env
+
+# GENERAL
+# ------------------------------------------------------------------------------
+SECRET_KEY = env("DJANGO_SECRET_KEY", default="loadtest-not-secret")
+DEBUG = False
+ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["*"])
+
+# DATABASES
+# ------------------------------------------------------------------------------
+if env.bool("DATABASE_POOL", default=True):
+    # Pooled connections are returned to the pool after each request instead of being kept open
+    for database in DATABASES.values():  # noqa: F405
+        database.setdefault("OPTIONS", {})["pool"] = DATABASE_POOL_OPTIONS  # noqa: F405
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)  # noqa: F405
+
+# CACHES
+# ------------------------------------------------------------------------------
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": env("REDIS_URL", default="redis://localhost:6379/0"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "IGNORE_EXCEPTIONS": True,
+        },
+    }
+}
+
+# django-webpack-loader
+# ------------------------------------------------------------------------------
+# Front-end assets are not part of the load test
+WEBPACK_LOADER["DEFAULT"]["LOADER_CLASS"] = "webpack_loader.loaders.FakeWebpackLoader"  # noqa: F405
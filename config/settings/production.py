@@ -17,7 +17,12 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["*.radirect.nz"])
 
 # DATABASES
 # ------------------------------------------------------------------------------
-DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)  # noqa: F405
+if env.bool("DATABASE_POOL", default=True):
+    # Pooled connections are returned to the pool after each request instead of being kept open
+    for database in DATABASES.values():  # noqa: F405
+        database.setdefault("OPTIONS", {})["pool"] = DATABASE_POOL_OPTIONS  # noqa: F405
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)  # noqa: F405
 
 # CACHES
 # ------------------------------------------------------------------------------
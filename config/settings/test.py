@@ -15,6 +15,16 @@ SECRET_KEY = env(
 # https://docs.djangoproject.com/en/dev/ref/settings/#test-runner
 TEST_RUNNER = "django.test.runner.DiscoverRunner"
 
+# DATABASES
+# ------------------------------------------------------------------------------
+# The replica mirrors the test database, and read-only views use it only in the tests that enable it
+DATABASES["replica"] = {  # noqa: F405
+    **DATABASES["default"],  # noqa: F405
+    "ATOMIC_REQUESTS": False,
+    "TEST": {"MIRROR": "default"},
+}
+REPLICA_DATABASE = None
+
 # PASSWORDS
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#password-hashers
@@ -36,5 +46,13 @@ MEDIA_URL = 'http://media.testserver'
 # django-webpack-loader
 # ------------------------------------------------------------------------------
 WEBPACK_LOADER["DEFAULT"]["LOADER_CLASS"] = "webpack_loader.loaders.FakeWebpackLoader"  # noqa: F405
+# QUERY BUDGETS
+# ------------------------------------------------------------------------------
+# Fail tests when a view runs more queries than it declares
+QUERY_BUDGET_RAISE = True
+# LEAVE FORMS
+# ------------------------------------------------------------------------------
+# Render print batches in the test process, tests that need the pool enable it
+PAPER_FORMS_WORKERS = 0
 # Your stuff...
 # ------------------------------------------------------------------------------
@@ -3,7 +3,7 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 from django.views import defaults as default_views
-from django.views.decorators.cache import cache_page
+from django.views.decorators.cache import cache_control
 from django.views.generic import TemplateView
 
 import radscheduler.core.ical as ical
@@ -12,6 +12,7 @@ import radscheduler.core.views.extra_duties as extra_duties_views
 import radscheduler.core.views.leaves as leaves_views
 import radscheduler.core.views.roster as roster_views
 from radscheduler.core.api import api
+from radscheduler.core.db_router import read_only, read_only_urls
 
 admin.site.site_header = "Radscheduler"
 
@@ -40,10 +41,13 @@ editor_view_urls = [
 
 roster_view_urls = [
     path(
-        "", TemplateView.as_view(template_name="roster/calendar.html"), name="calendar"
+        "",
+        read_only(TemplateView.as_view(template_name="roster/calendar.html")),
+        name="calendar",
     ),
     path("editor/", include(editor_view_urls)),
     path("workload/", roster_views.get_workload, name="workload"),
+    path("audit/", roster_views.get_audit, name="audit"),
 ]
 
 extra_duties_urls = [
@@ -56,10 +60,11 @@ extra_duties_urls = [
     ),
     path("editor/", extra_duties_views.edit_page, name="extra_edit_page"),
     path(
-        "editor/random/",
-        extra_duties_views.interested_random_registrar,
-        name="extra_random_registrar",
+        "editor/suggest/",
+        extra_duties_views.suggest_registrar,
+        name="extra_suggest_registrar",
     ),
+    path("editor/allocate/", extra_duties_views.allocate, name="extra_allocate"),
     path(
         "editor/save/<int:shift_id>/",
         extra_duties_views.save_registrar,
@@ -67,16 +72,16 @@ extra_duties_urls = [
     ),
 ]
 
-# Cache iCal feeds for 15 minutes - calendar apps poll periodically
-# and the data doesn't change frequently
-ICAL_CACHE_SECONDS = 60 * 15  # 15 minutes
+# iCal feeds are streamed and cache their own rendered output (see `ical.StreamingICalFeed`),
+# so only the client-side Cache-Control header is set here
+ical_cache_control = cache_control(max_age=ical.ICAL_CACHE_SECONDS)
 
 ical_urls = [
     path(
-        "shifts/", cache_page(ICAL_CACHE_SECONDS)(ical.ShiftFeed()), name="ical_shifts"
+        "shifts/", read_only(ical_cache_control(ical.ShiftFeed())), name="ical_shifts"
     ),
     path(
-        "leaves/", cache_page(ICAL_CACHE_SECONDS)(ical.LeaveFeed()), name="ical_leaves"
+        "leaves/", read_only(ical_cache_control(ical.LeaveFeed())), name="ical_leaves"
     ),
 ]
 
@@ -96,7 +101,11 @@ urlpatterns = [
     path("roster/", include(roster_view_urls)),
     path("extra_duties/", include(extra_duties_urls)),
     path("ical/", include(ical_urls)),
-    path("api/", api.urls, name="api"),
+    path(
+        "api/",
+        read_only_urls(api.urls, "calendar/"),
+        name="api",
+    ),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 
@@ -0,0 +1,192 @@
+"""
+Drive a scenario against a running server and summarise the results per endpoint.
+
+Queries and connection pool wait per request are read from the Server-Timing header added by
+`radscheduler.core.middleware.MetricsMiddleware`.
+"""
+
+import json
+import re
+import statistics
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from random import Random
+
+import requests
+
+from loadtest.scenarios import USER_TYPES, Scenario
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+_QUERIES = re.compile(r'db;desc="(\d+) queries"')
+_POOL_WAIT = re.compile(r"pool;dur=([\d.]+)")
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    started: float
+    latency: float  # seconds
+    status: int
+    queries: int | None
+    pool_wait: float | None = None  # milliseconds
+
+
+class Client:
+    """
+    A requests session that records a sample per request.
+    """
+
+    def __init__(self, base_url: str, samples: list, lock: threading.Lock):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.samples = samples
+        self.lock = lock
+
+    def login(self, session_key: str):
+        self.session.cookies.set("sessionid", session_key)
+
+    def get(self, endpoint: str, path: str, params: dict = None):
+        return self._request(endpoint, "GET", path, params=params)
+
+    def post(self, endpoint: str, path: str, data: dict):
+        # The CSRF cookie is set by the GET of the form page
+        token = self.session.cookies.get("csrftoken", "")
+        data = {**data, "csrfmiddlewaretoken": token}
+        return self._request(endpoint, "POST", path, data=data, headers={"Referer": self.base_url + path})
+
+    def _request(self, endpoint: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=60, allow_redirects=False, **kwargs)
+            # Include the time to read a streamed body
+            response.content
+            status = response.status_code
+            timing = response.headers.get("Server-Timing", "")
+            match = _QUERIES.search(timing)
+            queries = int(match.group(1)) if match else None
+            match = _POOL_WAIT.search(timing)
+            pool_wait = float(match.group(1)) if match else None
+        except requests.RequestException:
+            status, queries, pool_wait = 0, None, None
+        latency = time.perf_counter() - started
+
+        with self.lock:
+            self.samples.append(Sample(endpoint, started, latency, status, queries, pool_wait))
+
+
+def _virtual_user(kind, scenario: Scenario, client: Client, rng: Random, context: dict, deadline: float):
+    user = USER_TYPES[kind](client, rng, context)
+    tasks, weights = zip(*user.tasks())
+    burst_at = time.perf_counter() + scenario.duration * scenario.burst_at
+    burst_done = not hasattr(user, "burst")
+
+    while time.perf_counter() < deadline:
+        if not burst_done and time.perf_counter() >= burst_at:
+            user.burst(scenario.leaves_per_burst)
+            burst_done = True
+        else:
+            rng.choices(tasks, weights)[0]()
+        time.sleep(rng.uniform(*scenario.think_time))
+
+
+def run(scenario: Scenario, base_url: str, context: dict, seed: int = 0) -> list[Sample]:
+    samples, lock = [], threading.Lock()
+    deadline = time.perf_counter() + scenario.duration
+    threads = []
+    for kind, count in scenario.users.items():
+        for idx in range(count):
+            client = Client(base_url, samples, lock)
+            rng = Random(f"{seed}-{kind}-{idx}")
+            threads.append(
+                threading.Thread(
+                    target=_virtual_user, args=(kind, scenario, client, rng, context, deadline), daemon=True
+                )
+            )
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def _percentile(latencies: list[float], pct: int) -> float:
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method="inclusive")[pct - 1]
+
+
+def _summarise(samples: list[Sample], elapsed: float) -> dict:
+    latencies = sorted(sample.latency * 1000 for sample in samples)
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+    pool_waits = sorted(sample.pool_wait for sample in samples if sample.pool_wait is not None)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if not 200 <= sample.status < 400),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "p99_ms": round(_percentile(latencies, 99), 1),
+        "mean_queries": round(statistics.fmean(queries), 1) if queries else None,
+        "max_queries": max(queries) if queries else None,
+        "p95_pool_wait_ms": round(_percentile(pool_waits, 95), 1) if pool_waits else None,
+    }
+
+
+def summarise(scenario: Scenario, samples: list[Sample], base_url: str) -> dict:
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+
+    return {
+        "meta": {
+            "scenario": scenario.name,
+            "users": scenario.users,
+            "duration": scenario.duration,
+            "base_url": base_url,
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "revision": revision,
+        },
+        "endpoints": {
+            endpoint: _summarise(endpoint_samples, scenario.duration)
+            for endpoint, endpoint_samples in sorted(by_endpoint.items())
+        },
+        "total": _summarise(samples, scenario.duration) if samples else {},
+    }
+
+
+def save(results: dict, path: Path = None) -> Path:
+    if path is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"{results['meta']['scenario']}-{stamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + "\n")
+    return path
+
+
+def compare(results: dict, previous: dict) -> list[str]:
+    """
+    Lines describing the change in p95 latency and throughput per endpoint from a previous run.
+    """
+    lines = []
+    for endpoint, result in results["endpoints"].items():
+        before = previous["endpoints"].get(endpoint)
+        if not before:
+            continue
+        lines.append(
+            f"{endpoint:<30} p95 {before['p95_ms']:>8.1f} -> {result['p95_ms']:>8.1f}ms  "
+            f"rps {before['throughput_rps']:>7.2f} -> {result['throughput_rps']:>7.2f}"
+        )
+    return lines
@@ -0,0 +1,167 @@
+"""
+Virtual users and the mixes of them that make up each scenario.
+
+Each virtual user runs in its own thread, picking weighted tasks with a think time
+between them until the scenario ends. Tasks name the endpoint they hit, so results
+are grouped by endpoint rather than by URL.
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from random import Random
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    # Number of each kind of virtual user
+    users: dict[str, int]
+    duration: int = 60  # seconds
+    think_time: tuple[float, float] = (0.5, 2.0)  # seconds between tasks
+    # Leave submitters wait until this fraction of the duration, then submit together
+    burst_at: float = 0.5
+    leaves_per_burst: int = 5
+
+
+def _window(rng: Random, today: date, weeks: int) -> tuple[date, date]:
+    start = today + timedelta(weeks=rng.randint(-8, 4))
+    start -= timedelta(days=start.weekday())
+    return start, start + timedelta(weeks=weeks)
+
+
+class CalendarUser:
+    """
+    A registrar with the roster calendar open, polling the calendar API and calendar subscriptions.
+    """
+
+    def __init__(self, client, rng: Random, context: dict):
+        self.client = client
+        self.rng = rng
+        self.today = date.today()
+
+    def tasks(self):
+        return [(self.shifts, 5), (self.leaves, 3), (self.holidays, 1), (self.ical_shifts, 1), (self.ical_leaves, 1)]
+
+    def shifts(self):
+        start, end = _window(self.rng, self.today, 6)
+        self.client.get("GET /api/calendar/shifts", "/api/calendar/shifts", {"start": start, "end": end})
+
+    def leaves(self):
+        start, end = _window(self.rng, self.today, 6)
+        self.client.get("GET /api/calendar/leaves", "/api/calendar/leaves", {"start": start, "end": end})
+
+    def holidays(self):
+        start, end = _window(self.rng, self.today, 6)
+        self.client.get("GET /api/calendar/holidays", "/api/calendar/holidays", {"start": start, "end": end})
+
+    def ical_shifts(self):
+        self.client.get("GET /ical/shifts/", "/ical/shifts/")
+
+    def ical_leaves(self):
+        self.client.get("GET /ical/leaves/", "/ical/leaves/")
+
+
+class EditorUser:
+    """
+    A roster master working through the editor and extra duties pages.
+    """
+
+    def __init__(self, client, rng: Random, context: dict):
+        self.client = client
+        self.rng = rng
+        self.today = date.today()
+        client.login(context["editor_session"])
+
+    def tasks(self):
+        return [(self.editor, 5), (self.workload, 1), (self.extra_duties, 2), (self.extra_duties_editor, 2)]
+
+    def editor(self):
+        start, _ = _window(self.rng, self.today, 1)
+        self.client.get("GET /roster/editor/<date>/", f"/roster/editor/{start.isoformat()}/")
+
+    def workload(self):
+        start, end = _window(self.rng, self.today, 13)
+        self.client.get("GET /roster/workload/", "/roster/workload/", {"start": start, "end": end})
+
+    def extra_duties(self):
+        self.client.get("GET /extra_duties/", "/extra_duties/")
+
+    def extra_duties_editor(self):
+        self.client.get("GET /extra_duties/editor/", "/extra_duties/editor/")
+
+
+class LeaveUser:
+    """
+    A registrar who checks their leave page, then submits a burst of leave requests when the rota opens.
+    """
+
+    def __init__(self, client, rng: Random, context: dict):
+        self.client = client
+        self.rng = rng
+        self.registrar_id, session = context["registrar_sessions"].pop()
+        client.login(session)
+
+    def tasks(self):
+        return [(self.leave_page, 1)]
+
+    def leave_page(self):
+        self.client.get("GET /leaves/", "/leaves/")
+
+    def burst(self, count: int):
+        self.leave_page()
+        first = date.today() + timedelta(days=self.rng.randint(30, 300))
+        for offset in range(count):
+            day = first + timedelta(days=offset)
+            if day.weekday() > 4:
+                continue
+            self.client.post(
+                "POST /leaves/",
+                "/leaves/",
+                {
+                    "date": day.isoformat(),
+                    "type": "ANNUAL",
+                    "portion": "ALL",
+                    "comment": "",
+                    "registrar": self.registrar_id,
+                },
+            )
+
+
+USER_TYPES = {
+    "calendar": CalendarUser,
+    "editor": EditorUser,
+    "leave": LeaveUser,
+}
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario(
+            name="mixed",
+            description="Many calendar polls, a few editors and a burst of leave submissions",
+            users={"calendar": 40, "editor": 3, "leave": 10},
+        ),
+        Scenario(
+            name="calendar",
+            description="Calendar polls only, for the read path ceiling",
+            users={"calendar": 80},
+            think_time=(0.1, 0.5),
+        ),
+        Scenario(
+            name="leave-burst",
+            description="Everyone submits leave as soon as the rota opens",
+            users={"calendar": 10, "leave": 40},
+            burst_at=0.1,
+            leaves_per_burst=10,
+        ),
+        Scenario(
+            name="smoke",
+            description="One of each user for a few seconds, to check the stack works",
+            users={"calendar": 1, "editor": 1, "leave": 1},
+            duration=5,
+            think_time=(0.0, 0.1),
+            leaves_per_burst=1,
+        ),
+    ]
+}
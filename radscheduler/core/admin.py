@@ -4,17 +4,31 @@ from datetime import date, timedelta
 from enum import IntEnum
 from typing import Any
 
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.db.models import Exists, OuterRef, Q
 from django.db.models import Value as V
 from django.db.models import functions as fn
 from django.db.models.query import QuerySet
-from django.http import FileResponse
+from django.http import FileResponse, Http404
 from django.http.request import HttpRequest
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 from rangefilter.filters import DateRangeFilterBuilder
 
-from radscheduler.core.models import Leave, Registrar, Settings, Shift, ShiftInterest, Status
-from radscheduler.paper_forms.pdf import leaves_to_buffer
+from radscheduler.core.models import (
+    Leave,
+    PrintJob,
+    Registrar,
+    RosterRun,
+    Settings,
+    Shift,
+    ShiftInterest,
+    Status,
+    SwapRequest,
+)
+from radscheduler.paper_forms import jobs
+from radscheduler.paper_forms.render import print_leaves
 from radscheduler.roster.models import ShiftType, Weekday
 
 
@@ -304,8 +318,15 @@ class LeaveAdmin(admin.ModelAdmin):
 
     @admin.action(description="Print the selected leave forms")
     def print_selected(self, request, queryset):
-        buffer = leaves_to_buffer(queryset)
-        return FileResponse(buffer, as_attachment=False, filename="leaves.pdf")
+        ids = list(queryset.values_list("pk", flat=True))
+        if len(ids) <= jobs.INLINE_MAX_LEAVES:
+            buffer = print_leaves(queryset)
+            return FileResponse(buffer, as_attachment=False, filename="leaves.pdf")
+        job = jobs.enqueue(ids, request.user)
+        url = reverse("admin:core_printjob_change", args=[job.pk])
+        messages.info(
+            request, format_html('Printing in the background, download it from <a href="{}">{}</a>.', url, job)
+        )
 
     @admin.action(description="Mark selected leaves as registrar approved")
     def mark_reg_approved(self, request, queryset):
@@ -335,6 +356,61 @@ class StatusAdmin(admin.ModelAdmin):
     list_select_related = ("registrar", "registrar__user")
 
 
+@admin.register(RosterRun)
+class RosterRunAdmin(admin.ModelAdmin):
+    list_display = ("created", "start", "end", "duration", "profile")
+    readonly_fields = ("start", "end", "created", "duration", "timings", "counters", "profile")
+
+    def has_add_permission(self, request):
+        # Runs are recorded by `profile_roster`
+        return False
+
+
+@admin.register(SwapRequest)
+class SwapRequestAdmin(admin.ModelAdmin):
+    list_display = ("created", "shift", "counter_shift", "proposer", "counterpart", "state")
+    list_filter = ("state",)
+    list_select_related = ("shift", "counter_shift", "proposer__user", "counterpart__user")
+    readonly_fields = ("shift", "counter_shift", "proposer", "counterpart", "state", "created", "last_edited")
+
+    def has_add_permission(self, request):
+        # Swaps are proposed and accepted through `swaps`, which checks them against the roster rules
+        return False
+
+
+@admin.register(PrintJob)
+class PrintJobAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "created", "requested_by", "state", "finished", "download")
+    list_filter = ("state",)
+    list_select_related = ("requested_by",)
+    readonly_fields = ("requested_by", "state", "error", "created", "finished", "download")
+    exclude = ("leaves", "file")
+
+    def has_add_permission(self, request):
+        # Jobs are queued from the "Print the selected leave forms" action on leaves
+        return False
+
+    def get_urls(self):
+        download = path(
+            "<int:job_id>/download/",
+            self.admin_site.admin_view(self.download_view),
+            name="core_printjob_download",
+        )
+        return [download] + super().get_urls()
+
+    @admin.display(description="File")
+    def download(self, obj):
+        if obj.state != PrintJob.State.DONE:
+            return ""
+        return format_html('<a href="{}">Download</a>', reverse("admin:core_printjob_download", args=[obj.pk]))
+
+    def download_view(self, request, job_id):
+        job = get_object_or_404(PrintJob, pk=job_id, state=PrintJob.State.DONE)
+        if not self.has_view_permission(request, job) or not job.file:
+            raise Http404
+        return FileResponse(job.file.open("rb"), filename=f"leaves-{job.pk}.pdf")
+
+
 @admin.register(Settings)
 class SettingsAdmin(admin.ModelAdmin):
     list_display = ["publish_start_date", "publish_end_date", "created", "last_edited"]
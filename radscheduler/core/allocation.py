@@ -0,0 +1,159 @@
+"""
+Extra duty allocation.
+
+The registrars interested in an extra duty are ranked by a fairness score: the extra duties they
+were given in the last year, plus their rostered fatigue in the weeks around the shift. Registrars
+the shift would put in breach of the MECA rules are ranked last and never allocated. Open extra
+duties are allocated in date order, each allocation counting towards the next.
+"""
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from django.db.models import Count, Prefetch
+
+from radscheduler.core.models import Shift, ShiftInterest
+from radscheduler.core.service import reassign_shifts
+from radscheduler.core.simulation import roster_snapshot
+from radscheduler.roster import SingleOnCallRoster
+from radscheduler.roster import models as domain
+from radscheduler.roster.validators import StonzMecaValidator
+
+HISTORY = timedelta(weeks=52)  # extra duties counted towards the score
+FATIGUE_WINDOW = timedelta(weeks=2)  # either side of the extra duty
+FATIGUE_PER_EXTRA_DUTY = 5.0  # rostered fatigue that weighs as much as one extra duty
+
+
+@dataclass
+class Candidate:
+    registrar: domain.Registrar
+    extra_duties: int  # in the last year, including the ones allocated before in the batch
+    fatigue: float  # rostered around the shift
+    valid: bool  # under the MECA rules
+    interested: datetime = None  # when the interest was registered, earlier wins a tie
+
+    @property
+    def score(self) -> float:
+        """
+        Lower is fairer.
+        """
+        return self.extra_duties + self.fatigue / FATIGUE_PER_EXTRA_DUTY
+
+
+@dataclass
+class Allocation:
+    shift: Shift
+    candidates: list[Candidate]  # best first
+
+    @property
+    def registrar(self) -> domain.Registrar | None:
+        if self.candidates and self.candidates[0].valid:
+            return self.candidates[0].registrar
+        return None
+
+
+def open_extra_duties(start: date = None):
+    """
+    Unallocated extra duties from START (today by default), with their interests.
+    """
+    return (
+        Shift.objects.filter(extra_duty=True, registrar__isnull=True, date__gte=start or date.today())
+        .order_by("date", "id")
+        .prefetch_related(Prefetch("interests", queryset=ShiftInterest.objects.order_by("created")))
+    )
+
+
+class ExtraDutyAllocator:
+    """
+    Ranks the interested registrars of SHIFTS, extra duties with their `interests` prefetched.
+    """
+
+    def __init__(self, shifts: list[Shift]):
+        self.shifts = list(shifts)
+        first = min((shift.date for shift in self.shifts), default=date.today())
+        last = max((shift.date for shift in self.shifts), default=date.today())
+
+        self.snapshot, _ = roster_snapshot(first - FATIGUE_WINDOW, last + FATIGUE_WINDOW)
+        self.history = Counter(
+            dict(
+                Shift.objects.filter(extra_duty=True, registrar__isnull=False, date__range=[first - HISTORY, last])
+                .values("registrar")
+                .annotate(count=Count("id"))
+                .values_list("registrar", "count")
+            )
+        )
+        self.allocated = defaultdict(list)  # domain shifts by registrar id, allocated in this batch
+
+    def _fatigue(self, registrar: domain.Registrar, day: date) -> float:
+        return sum(
+            SingleOnCallRoster.shift_fatigue(shift)
+            for shift in self.snapshot.calendars[registrar.id].shifts
+            if not shift.extra_duty and abs(shift.date - day) <= FATIGUE_WINDOW
+        )
+
+    def _is_valid(self, shift: domain.Shift, registrar: domain.Registrar) -> bool:
+        calendar = self.snapshot.calendars[registrar.id]
+        shifts = calendar.shifts + self.allocated[registrar.id]
+        return StonzMecaValidator(
+            shift, registrar, shifts, leaves=calendar.leaves, statuses=calendar.statuses
+        ).is_valid()
+
+    def rank(self, shift: Shift) -> list[Candidate]:
+        """
+        The interested registrars of SHIFT, best first. Registrars who have finished are left out.
+        """
+        proposed = _domain_shift(shift)
+        candidates = [
+            Candidate(
+                registrar=registrar,
+                extra_duties=self.history[registrar.id],
+                fatigue=self._fatigue(registrar, shift.date),
+                valid=self._is_valid(proposed, registrar),
+                interested=interest.created,
+            )
+            for interest in shift.interests.all()
+            if (registrar := self.snapshot.registrars.get(interest.registrar_id)) is not None
+        ]
+        return sorted(candidates, key=lambda c: (not c.valid, c.score, c.interested, c.registrar.username))
+
+    def allocate(self) -> list[Allocation]:
+        """
+        Allocate every shift to its best candidate in date order, so that each allocation counts
+        towards the history and MECA checks of the ones after it.
+        """
+        result = []
+        for shift in sorted(self.shifts, key=lambda s: (s.date, s.pk)):
+            allocation = Allocation(shift, self.rank(shift))
+            registrar = allocation.registrar
+            if registrar is not None:
+                self.history[registrar.id] += 1
+                self.allocated[registrar.id].append(_domain_shift(shift, registrar))
+            result.append(allocation)
+        return result
+
+
+def _domain_shift(shift: Shift, registrar: domain.Registrar = None) -> domain.Shift:
+    return domain.Shift(
+        date=shift.date,
+        type=domain.ShiftType(shift.type),
+        registrar=registrar,
+        stat_day=shift.stat_day,
+        extra_duty=True,
+        fatigue_override=shift.fatigue_override,
+        series=shift.series,
+        id=shift.pk,
+    )
+
+
+def allocate_extra_duties(start: date = None) -> list[Allocation]:
+    """
+    Allocate every open extra duty from START (today by default) and save the allocations.
+    """
+    allocations = ExtraDutyAllocator(open_extra_duties(start)).allocate()
+    allocated = [allocation for allocation in allocations if allocation.registrar is not None]
+    reassign_shifts(
+        [_domain_shift(allocation.shift, allocation.registrar) for allocation in allocated],
+        {allocation.shift.pk: None for allocation in allocated},
+    )
+    return allocations
@@ -0,0 +1,187 @@
+"""
+Vectorised workload analytics.
+
+The weekly workload ledger rows of a date range (see `ledger.ledger_weeks`) are loaded
+into typed NumPy columns (week index, registrar id, a count per detailed shift type and
+the roster's shift fatigue), and every statistic is computed over those arrays rather
+than per row. Summaries are cached per range and invalidated when any ledger row in the
+range changes.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max
+from pandas import DataFrame, Index
+
+from radscheduler.core import ledger
+from radscheduler.core.models import Registrar, WorkloadLedger
+from radscheduler.roster.models import DetailedShiftType
+
+ANALYTICS_CACHE_SECONDS = 60 * 15
+ROLLING_WEEKS = (4, 8, 13)
+
+# Column order of the detailed type counts
+DETAILED_TYPES = list(DetailedShiftType)
+COLUMN_NAMES = {
+    DetailedShiftType.LONG: "LONG",
+    DetailedShiftType.WEEKEND: "WEEKEND",
+    DetailedShiftType.NIGHT: "NIGHT",
+    DetailedShiftType.WEEKEND_NIGHT: "WKD NIGHT",
+    DetailedShiftType.RDO: "RDO",
+    DetailedShiftType.SLEEP: "SLEEP",
+}
+
+# Weighting of the FATIGUE column in the workload report
+DEFAULT_WEIGHTS = {
+    DetailedShiftType.LONG: 1,
+    DetailedShiftType.NIGHT: 7,
+    DetailedShiftType.WEEKEND: 4,
+    DetailedShiftType.WEEKEND_NIGHT: 5,
+}
+
+
+@dataclass
+class LedgerColumns:
+    """
+    Ledger rows of a date range as parallel arrays, one entry per registrar and week.
+    """
+
+    start: date
+    end: date
+    week: np.ndarray  # int64 weeks since the Monday on or before the start date
+    registrar: np.ndarray  # int64 registrar ids
+    counts: np.ndarray  # int64 (rows, DETAILED_TYPES) shift counts
+    shift_fatigue: np.ndarray  # float64 `SingleOnCallRoster.shift_fatigue`, summed by the ledger
+    usernames: dict[int, str]
+
+    @classmethod
+    def load(cls, start: date, end: date) -> "LedgerColumns":
+        rows = ledger.ledger_weeks(start, end)
+        first_week = ledger.week_start(start)
+        registrar = np.array([row.registrar_id for row in rows], dtype=np.int64)
+        return cls(
+            start=start,
+            end=end,
+            week=np.array([(row.week - first_week).days // 7 for row in rows], dtype=np.int64),
+            registrar=registrar,
+            counts=np.array(
+                [[getattr(row, ledger.COUNT_FIELDS[shift_type]) for shift_type in DETAILED_TYPES] for row in rows],
+                dtype=np.int64,
+            ).reshape(len(rows), len(DETAILED_TYPES)),
+            shift_fatigue=np.array([row.shift_fatigue for row in rows], dtype=np.float64),
+            usernames=dict(
+                Registrar.objects.filter(id__in=set(registrar.tolist())).values_list("id", "user__username")
+            ),
+        )
+
+
+class WorkloadAnalytics:
+    """
+    Workload statistics per registrar over a date range.
+
+    WEIGHTS maps detailed shift types to the score used by the FATIGUE column.
+    Types without a weight score 0.
+    """
+
+    def __init__(self, columns: LedgerColumns, weights: dict = None):
+        self.columns = columns
+        self.weights = DEFAULT_WEIGHTS if weights is None else weights
+
+        self.registrar_ids, self._registrar_idx = np.unique(columns.registrar, return_inverse=True)
+        self._first_week = ledger.week_start(columns.start)
+        self.n_weeks = (columns.end - self._first_week).days // 7 + 1
+
+    @property
+    def _index(self) -> Index:
+        return Index(self.registrar_ids, name="registrar_id")
+
+    def _per_registrar(self, values: np.ndarray) -> np.ndarray:
+        return np.bincount(self._registrar_idx, weights=values, minlength=len(self.registrar_ids))
+
+    def counts(self) -> DataFrame:
+        """
+        Number of shifts of each detailed type per registrar, with a column for every type.
+        """
+        matrix = np.zeros((len(self.registrar_ids), len(DETAILED_TYPES)), dtype=np.int64)
+        np.add.at(matrix, self._registrar_idx, self.columns.counts)
+        return DataFrame(matrix, index=self._index, columns=[COLUMN_NAMES[t] for t in DETAILED_TYPES])
+
+    def fatigue(self) -> DataFrame:
+        """
+        Weighted FATIGUE score and the roster's own fatigue per registrar.
+        """
+        weights = np.array([self.weights.get(shift_type, 0) for shift_type in DETAILED_TYPES], dtype=np.float64)
+        return DataFrame(
+            {
+                "FATIGUE": self._per_registrar(self.columns.counts @ weights),
+                "ROSTER FATIGUE": self._per_registrar(self.columns.shift_fatigue),
+            },
+            index=self._index,
+        )
+
+    def weekly_fatigue(self) -> np.ndarray:
+        """
+        Roster fatigue as a (registrar, week) matrix. Weeks start on the Monday on or before the start date.
+        """
+        matrix = np.zeros((len(self.registrar_ids), self.n_weeks))
+        np.add.at(matrix, (self._registrar_idx, self.columns.week), self.columns.shift_fatigue)
+        return matrix
+
+    def rolling_fatigue(self, weeks: int) -> DataFrame:
+        """
+        Roster fatigue summed over a trailing window of WEEKS weeks, for every week in the range.
+        """
+        cumulative = np.cumsum(self.weekly_fatigue(), axis=1)
+        rolling = cumulative.copy()
+        rolling[:, weeks:] -= cumulative[:, :-weeks]
+        return DataFrame(
+            rolling.T,
+            index=Index([self._first_week + timedelta(weeks=n) for n in range(self.n_weeks)], name="week"),
+            columns=self._index,
+        )
+
+    def summary(self, rolling_weeks=ROLLING_WEEKS) -> DataFrame:
+        """
+        One row per registrar: counts, fatigue, the latest rolling windows and rankings.
+
+        Rank 1 is the most fatigued registrar.
+        """
+        result = self.counts().join(self.fatigue())
+        for weeks in rolling_weeks:
+            rolling = self.rolling_fatigue(weeks)
+            result[f"{weeks}W"] = rolling.iloc[-1] if len(rolling) else 0.0
+        for column in ["FATIGUE", "ROSTER FATIGUE", *(f"{weeks}W" for weeks in rolling_weeks)]:
+            result[f"{column} RANK"] = result[column].rank(method="min", ascending=False).astype(int)
+
+        result.insert(0, "username", [self.columns.usernames[registrar_id] for registrar_id in self.registrar_ids])
+        return result.sort_values("FATIGUE", ascending=False, kind="stable")
+
+
+def _cache_key(start: date, end: date, weights: dict) -> str:
+    """
+    Cache key that changes whenever a ledger row of the range is created, edited or deleted, that is
+    whenever a shift or leave in the range changes.
+    """
+    stamp = WorkloadLedger.objects.filter(week__range=[ledger.week_start(start), end]).aggregate(
+        count=Count("id"), last=Max("last_edited")
+    )
+    weights = sorted((str(shift_type), value) for shift_type, value in weights.items())
+    digest = hashlib.md5(repr((weights, stamp["count"], stamp["last"])).encode()).hexdigest()
+    return f"analytics:workload:{start}:{end}:{digest}"
+
+
+def workload_summary(start: date, end: date, weights: dict = None) -> DataFrame:
+    """
+    Cached `WorkloadAnalytics.summary` over START to END.
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    key = _cache_key(start, end, weights)
+    summary = cache.get(key)
+    if summary is None:
+        summary = WorkloadAnalytics(LedgerColumns.load(start, end), weights).summary()
+        cache.set(key, summary, ANALYTICS_CACHE_SECONDS)
+    return summary
@@ -1,6 +1,10 @@
 from ninja import NinjaAPI
 
 from .roster_calendar import router as calendar_router
+from .simulation import router as simulation_router
+from .swaps import router as swaps_router
 
 api = NinjaAPI()
 api.add_router("calendar/", calendar_router)
+api.add_router("simulation/", simulation_router)
+api.add_router("swaps/", swaps_router)
@@ -77,8 +77,8 @@ def leave_events(request, start: date, end: date):
         start = max(start, settings.publish_start_date)
         end = min(end, settings.publish_end_date)
     leaves = (
-        orm.Leave.objects.filter(date__gte=start, date__lte=end)
-        .exclude(Q(reg_approved=False) | Q(dot_approved=False) | Q(cancelled=True))
+        orm.Leave.objects.filter(date__gte=start, date__lte=end, cancelled=False)
+        .exclude(Q(reg_approved=False) | Q(dot_approved=False))
         .select_related("registrar", "registrar__user")
     )
     return list(leaves)
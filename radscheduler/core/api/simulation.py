@@ -0,0 +1,131 @@
+from datetime import date
+from typing import List, Optional
+
+from ninja import Router, Schema
+from ninja.errors import HttpError
+from ninja.security import django_auth
+
+import radscheduler.core.models as orm
+import radscheduler.roster as domain
+from radscheduler.core.simulation import SimulationResult, simulate
+
+router = Router(auth=django_auth)
+
+
+class LeaveRequestSchema(Schema):
+    registrar_id: Optional[int] = None  # defaults to the user's own
+    dates: List[date]
+    type: domain.LeaveType = domain.LeaveType.ANNUAL
+    no_abutting_weekend: bool = True
+
+
+class StatusRequestSchema(Schema):
+    registrar_id: Optional[int] = None  # defaults to the user's own
+    start: date
+    end: date
+    type: domain.StatusType
+    weekdays: List[domain.Weekday] = []
+    shift_types: List[domain.ShiftType] = []
+
+
+class SimulatedShiftSchema(Schema):
+    date: date
+    type: domain.ShiftType
+    registrar: Optional[str] = None
+
+    @staticmethod
+    def resolve_registrar(shift):
+        return shift.registrar.username if shift.registrar else None
+
+
+class ViolationSchema(Schema):
+    clause: str
+    description: str
+    registrar: str
+    dates: List[date]
+
+    @staticmethod
+    def resolve_description(violation):
+        return violation.clause.label
+
+
+class FatigueChangeSchema(Schema):
+    registrar: str
+    before: float
+    after: float
+
+
+class SimulationSchema(Schema):
+    start: date
+    end: date
+    fillable: bool
+    unfilled: List[SimulatedShiftSchema]
+    conflicts: List[SimulatedShiftSchema]
+    violations: List[ViolationSchema]
+    fatigue: List[FatigueChangeSchema]
+    changed: int
+    elapsed_ms: float
+
+    @staticmethod
+    def resolve_fatigue(result: SimulationResult):
+        return [
+            {"registrar": username, "before": round(before, 2), "after": round(after, 2)}
+            for username, (before, after) in result.fatigue.items()
+        ]
+
+    @staticmethod
+    def resolve_elapsed_ms(result: SimulationResult):
+        return round(result.elapsed * 1000, 1)
+
+
+def _registrar_id(request, registrar_id: Optional[int]) -> int:
+    """
+    Registrars can only simulate their own requests, editors anyone's.
+    """
+    own = getattr(request.user, "registrar", None)
+    if registrar_id is None:
+        if own is None:
+            raise HttpError(400, "registrar_id is required")
+        return own.pk
+    if not request.user.is_staff and (own is None or own.pk != registrar_id):
+        raise HttpError(403, "Only editors can simulate requests for other registrars")
+    return registrar_id
+
+
+def _simulate(registrar_id: int, **requests) -> SimulationResult:
+    try:
+        return simulate(registrar_id, **requests)
+    except orm.Registrar.DoesNotExist as e:
+        raise HttpError(404, str(e))
+
+
+@router.post("/leave", response=SimulationSchema)
+def simulate_leave(request, payload: LeaveRequestSchema):
+    """
+    Would the roster stay fillable if this leave was approved?
+    """
+    if not payload.dates:
+        raise HttpError(400, "At least one date is required")
+    leaves = [
+        domain.Leave(date=day, type=payload.type, registrar=None, no_abutting_weekend=payload.no_abutting_weekend)
+        for day in payload.dates
+    ]
+    return _simulate(_registrar_id(request, payload.registrar_id), leaves=leaves)
+
+
+@router.post("/status", response=SimulationSchema)
+def simulate_status(request, payload: StatusRequestSchema):
+    """
+    Would the roster stay fillable with this status?
+    """
+    if payload.start > payload.end:
+        raise HttpError(400, "start must be on or before end")
+    status = domain.Status(
+        start=payload.start,
+        end=payload.end,
+        type=payload.type,
+        registrar=None,
+        weekdays=payload.weekdays,
+        shift_types=payload.shift_types,
+    )
+    return _simulate(_registrar_id(request, payload.registrar_id), statuses=[status])
@@ -0,0 +1,149 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from ninja import Router, Schema
+from ninja.errors import HttpError
+from ninja.security import django_auth
+
+import radscheduler.core.models as orm
+import radscheduler.roster as domain
+from radscheduler.core.swaps import SwapError, accept_swap, propose_swap, swap_offers
+
+router = Router(auth=django_auth)
+
+
+class SwapShiftSchema(Schema):
+    id: int
+    date: date
+    type: domain.ShiftType
+    registrar: Optional[str] = None
+
+    @staticmethod
+    def resolve_registrar(shift):
+        return shift.registrar.username if shift.registrar else None
+
+
+class SwapOfferSchema(Schema):
+    shift: SwapShiftSchema
+    registrar: str
+    given: List[SwapShiftSchema]
+    taken: List[SwapShiftSchema]
+    impact: float
+
+    @staticmethod
+    def resolve_registrar(offer):
+        return offer.registrar.username
+
+    @staticmethod
+    def resolve_impact(offer):
+        return round(offer.impact, 2)
+
+
+class SwapProposalSchema(Schema):
+    shift_id: int
+    counter_shift_id: int
+    comment: str = ""
+
+
+class SwapRequestSchema(Schema):
+    id: int
+    shift_id: int
+    counter_shift_id: int
+    proposer: str
+    counterpart: str
+    state: orm.SwapRequest.State
+    comment: str
+    created: datetime
+
+    @staticmethod
+    def resolve_proposer(swap):
+        return swap.proposer.user.username
+
+    @staticmethod
+    def resolve_counterpart(swap):
+        return swap.counterpart.user.username
+
+
+def _own_registrar_id(request) -> Optional[int]:
+    registrar = getattr(request.user, "registrar", None)
+    return registrar.pk if registrar else None
+
+
+def _check_holder(request, shift_id: int):
+    """
+    Registrars can only swap their own shifts, editors anyone's.
+    """
+    shift = get_object_or_404(orm.Shift, pk=shift_id)
+    if not request.user.is_staff and shift.registrar_id != _own_registrar_id(request):
+        raise HttpError(403, "Only editors can swap shifts of other registrars")
+
+
+def _swap_request(request, swap_id: int, *parties: str) -> orm.SwapRequest:
+    swap = get_object_or_404(orm.SwapRequest.objects.select_related("proposer__user", "counterpart__user"), pk=swap_id)
+    registrar_id = _own_registrar_id(request)
+    if not request.user.is_staff and all(getattr(swap, f"{party}_id") != registrar_id for party in parties):
+        raise HttpError(403, f"Only the {' or '.join(parties)} can do this")
+    if swap.state != orm.SwapRequest.State.PENDING:
+        raise HttpError(409, f"The swap is {swap.get_state_display().lower()}")
+    return swap
+
+
+@router.get("/offers", response=List[SwapOfferSchema])
+def offers(request, shift_id: int, limit: int = 20):
+    """
+    Shifts of other registrars this shift can be swapped for, least change in fatigue first.
+    """
+    _check_holder(request, shift_id)
+    try:
+        return swap_offers(shift_id, limit=limit)
+    except SwapError as e:
+        raise HttpError(400, str(e))
+
+
+@router.get("/", response=List[SwapRequestSchema])
+def swap_requests(request):
+    """
+    Swaps proposed by or to the user.
+    """
+    registrar_id = _own_registrar_id(request)
+    return orm.SwapRequest.objects.filter(Q(proposer_id=registrar_id) | Q(counterpart_id=registrar_id)).select_related(
+        "proposer__user", "counterpart__user"
+    )
+
+
+@router.post("/", response={201: SwapRequestSchema})
+def propose(request, payload: SwapProposalSchema):
+    _check_holder(request, payload.shift_id)
+    try:
+        swap = propose_swap(payload.shift_id, payload.counter_shift_id, payload.comment)
+    except SwapError as e:
+        raise HttpError(400, str(e))
+    return 201, swap
+
+
+@router.post("/{swap_id}/accept", response=SwapRequestSchema)
+def accept(request, swap_id: int):
+    swap = _swap_request(request, swap_id, "counterpart")
+    try:
+        accept_swap(swap)
+    except SwapError as e:
+        raise HttpError(409, str(e))
+    return swap
+
+
+@router.post("/{swap_id}/decline", response=SwapRequestSchema)
+def decline(request, swap_id: int):
+    swap = _swap_request(request, swap_id, "counterpart")
+    swap.state = orm.SwapRequest.State.DECLINED
+    swap.save()
+    return swap
+
+
+@router.post("/{swap_id}/cancel", response=SwapRequestSchema)
+def cancel(request, swap_id: int):
+    swap = _swap_request(request, swap_id, "proposer")
+    swap.state = orm.SwapRequest.State.CANCELLED
+    swap.save()
+    return swap
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "radscheduler.core"
+
+    def ready(self):
+        import radscheduler.core.signals  # noqa: F401
@@ -0,0 +1,339 @@
+"""
+Compliance audit of historical rosters.
+
+Shifts, leaves and statuses of a period are loaded in one query each, and every rule of
+`roster.validators.validate_roster` is evaluated for all registrars at once over pandas
+columns. The result is the same as `validate_roster` on the same data, but years of history
+take seconds. Reports are cached per period and invalidated when any row in it changes.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max
+from pandas import DataFrame, concat
+
+from radscheduler.core.models import Leave, Shift, Status
+from radscheduler.roster import ShiftType, StatusType, Weekday
+from radscheduler.roster.validators import OFF_DUTY, Clause, Violation
+
+AUDIT_CACHE_SECONDS = 60 * 60
+
+# Rules look up to a week either side of a shift, so rows this close to the period are loaded too
+MARGIN = timedelta(days=7)
+
+_COLUMNS = ["clause", "registrar", "dates"]
+_SHIFT_TYPE_BIT = {shift_type: 1 << bit for bit, shift_type in enumerate(ShiftType)}
+_ALL_WEEKDAYS = (1 << 7) - 1
+_ALL_SHIFT_TYPES = (1 << len(ShiftType)) - 1
+
+
+def _ordinals(dates) -> np.ndarray:
+    return np.fromiter((day.toordinal() for day in dates), dtype=np.int64, count=len(dates))
+
+
+def _weekday(ordinals) -> np.ndarray:
+    # date(1, 1, 1) has ordinal 1 and is a Monday
+    return (ordinals - 1) % 7
+
+
+def _violations(clause: Clause, registrars, *date_columns) -> DataFrame:
+    dates = [tuple(date.fromordinal(int(day)) for day in days) for days in zip(*date_columns)]
+    return DataFrame({"clause": clause, "registrar": list(registrars), "dates": dates}, columns=_COLUMNS)
+
+
+@dataclass
+class AuditData:
+    shifts: DataFrame  # registrar, day, type; sorted by registrar and date
+    leaves: DataFrame  # registrar, day, no_abutting_weekend
+    statuses: DataFrame  # registrar, start, end, weekdays, shift_types (bit masks)
+
+    @classmethod
+    def load(cls, start: date, end: date) -> "AuditData":
+        shifts = DataFrame.from_records(
+            Shift.objects.filter(date__range=[start - MARGIN, end + MARGIN], registrar__isnull=False)
+            .order_by("registrar__user__username", "date", "id")
+            .values_list("registrar__user__username", "date", "type"),
+            columns=["registrar", "day", "type"],
+        )
+        leaves = DataFrame.from_records(
+            Leave.objects.filter(date__range=[start - MARGIN, end + MARGIN], cancelled=False).values_list(
+                "registrar__user__username", "date", "no_abutting_weekend"
+            ),
+            columns=["registrar", "day", "no_abutting_weekend"],
+        )
+        statuses = DataFrame.from_records(
+            Status.objects.overlapping(start - MARGIN, end + MARGIN)
+            .exclude(type=StatusType.BUDDY)
+            .values_list("registrar__user__username", "start", "end", "weekdays", "shift_types"),
+            columns=["registrar", "start", "end", "weekdays", "shift_types"],
+        )
+        return cls.from_frames(shifts, leaves, statuses)
+
+    @classmethod
+    def from_roster(cls, shifts: list, leaves: list, statuses: list) -> "AuditData":
+        """
+        Build from domain shifts, leaves and statuses, as passed to `validate_roster`.
+        """
+        return cls.from_frames(
+            DataFrame(
+                [(s.registrar.username, s.date, s.type) for s in shifts if s.registrar is not None],
+                columns=["registrar", "day", "type"],
+            ),
+            DataFrame(
+                [(leave.registrar.username, leave.date, leave.no_abutting_weekend) for leave in leaves],
+                columns=["registrar", "day", "no_abutting_weekend"],
+            ),
+            DataFrame(
+                [
+                    (s.registrar.username, s.start, s.end, s.weekdays, s.shift_types)
+                    for s in statuses
+                    if s.type != StatusType.BUDDY
+                ],
+                columns=["registrar", "start", "end", "weekdays", "shift_types"],
+            ),
+        )
+
+    @classmethod
+    def from_frames(cls, shifts: DataFrame, leaves: DataFrame, statuses: DataFrame) -> "AuditData":
+        """
+        Convert dates to ordinals and status weekdays and shift types to bit masks.
+        """
+        shifts = shifts.assign(day=_ordinals(shifts["day"])).sort_values(["registrar", "day"], kind="stable")
+        leaves = leaves.assign(day=_ordinals(leaves["day"])).drop_duplicates(["registrar", "day"])
+        statuses = statuses.assign(
+            start=_ordinals(statuses["start"]),
+            end=_ordinals(statuses["end"]),
+            weekdays=[sum(1 << day for day in days) or _ALL_WEEKDAYS for days in statuses["weekdays"]],
+            shift_types=[
+                sum(_SHIFT_TYPE_BIT[ShiftType(t)] for t in types) or _ALL_SHIFT_TYPES
+                for types in statuses["shift_types"]
+            ],
+        )
+        return cls(shifts.reset_index(drop=True), leaves.reset_index(drop=True), statuses.reset_index(drop=True))
+
+    @property
+    def duties(self) -> DataFrame:
+        return self.shifts[~self.shifts["type"].isin(OFF_DUTY)]
+
+    def weekends(self) -> DataFrame:
+        """
+        Distinct weekends worked per registrar, keyed by their Saturday. A Friday night is part of the weekend.
+        """
+        duties = self.duties
+        weekday = _weekday(duties["day"].to_numpy())
+        saturday = np.select(
+            [
+                weekday == Weekday.SAT,
+                weekday == Weekday.SUN,
+                (weekday == Weekday.FRI) & (duties["type"] == ShiftType.NIGHT).to_numpy(),
+            ],
+            [duties["day"], duties["day"] - 1, duties["day"] + 1],
+            default=0,
+        )
+        weekends = DataFrame({"registrar": duties["registrar"].to_numpy(), "saturday": saturday})
+        return weekends[weekends["saturday"] > 0].drop_duplicates().sort_values(["registrar", "saturday"])
+
+
+def one_shift_per_day(data: AuditData) -> DataFrame:
+    extra = data.shifts[data.shifts.duplicated(["registrar", "day"])]
+    return _violations(Clause.ONE_SHIFT_PER_DAY, extra["registrar"], extra["day"])
+
+
+def long_days(data: AuditData) -> DataFrame:
+    """
+    17.2.2 More than 2 long days in any 7 days, nights excluded as in `validate_roster`. Overlapping
+    windows are reported once.
+    """
+    longs = data.shifts[data.shifts["type"] == ShiftType.LONG]
+    registrar = longs["registrar"].to_numpy()
+    days = longs["day"].to_numpy()
+    # Offset each registrar's days so that windows never span two registrars
+    codes = np.unique(registrar, return_inverse=True)[1].astype(np.int64)
+    key = codes * 10_000_000 + days
+    window_start = np.searchsorted(key, key - 6, side="left")
+    ends = np.flatnonzero(np.arange(len(key)) - window_start + 1 > 2)
+    if not len(ends):
+        return DataFrame(columns=_COLUMNS)
+
+    starts = window_start[ends]
+    # A window starts a new violation unless it overlaps the previous one
+    new = np.ones(len(ends), dtype=bool)
+    new[1:] = starts[1:] > ends[:-1]
+    first = starts[new]
+    last = np.maximum.reduceat(ends, np.flatnonzero(new))
+    return DataFrame(
+        {
+            "clause": Clause.LONG_DAYS,
+            "registrar": registrar[first],
+            "dates": [tuple(date.fromordinal(int(day)) for day in days[i : j + 1]) for i, j in zip(first, last)],
+        },
+        columns=_COLUMNS,
+    )
+
+
+def weekend_free(data: AuditData, weekends: DataFrame) -> DataFrame:
+    """
+    17.3.5 Every second weekend completely free from duty.
+    """
+    previous = weekends.shift()
+    consecutive = (weekends["registrar"] == previous["registrar"]) & (weekends["saturday"] - previous["saturday"] == 7)
+    rows = weekends[consecutive]
+    return _violations(Clause.WEEKEND_FREE, rows["registrar"], rows["saturday"] - 7, rows["saturday"])
+
+
+def on_leave(data: AuditData) -> DataFrame:
+    rows = data.duties.merge(data.leaves[["registrar", "day"]], on=["registrar", "day"])
+    return _violations(Clause.ON_LEAVE, rows["registrar"], rows["day"])
+
+
+def abutting_leave(data: AuditData, weekends: DataFrame) -> DataFrame:
+    """
+    21.4.1 No weekend worked next to a Friday or Monday leave.
+    """
+    leaves = data.leaves[data.leaves["no_abutting_weekend"].astype(bool)]
+    weekday = _weekday(leaves["day"].to_numpy())
+    friday = leaves[weekday == Weekday.FRI].assign(saturday=lambda df: df["day"] + 1)
+    friday = friday.assign(first=friday["day"], last=friday["saturday"])
+    monday = leaves[weekday == Weekday.MON].assign(saturday=lambda df: df["day"] - 2)
+    monday = monday.assign(first=monday["saturday"], last=monday["day"])
+    rows = concat([friday, monday]).merge(weekends, on=["registrar", "saturday"])
+    return _violations(Clause.ABUTTING_LEAVE, rows["registrar"], rows["first"], rows["last"])
+
+
+def non_rostered_status(data: AuditData) -> DataFrame:
+    if data.statuses.empty:
+        return DataFrame(columns=_COLUMNS)
+    duties = data.duties.reset_index(drop=True).reset_index(names="shift")
+    rows = duties.merge(data.statuses, on="registrar")
+    weekday_bit = 1 << _weekday(rows["day"].to_numpy())
+    type_bit = rows["type"].map(_SHIFT_TYPE_BIT).to_numpy()
+    rows = rows[
+        (rows["start"] <= rows["day"])
+        & (rows["day"] <= rows["end"])
+        & (rows["weekdays"].to_numpy() & weekday_bit > 0)
+        & (rows["shift_types"].to_numpy() & type_bit > 0)
+    ].drop_duplicates("shift")
+    return _violations(Clause.STATUS, rows["registrar"], rows["day"])
+
+
+def audit_violations(data: AuditData) -> DataFrame:
+    """
+    Every violation in DATA as a frame of clause, registrar and dates, in `validate_roster` order.
+    """
+    weekends = data.weekends()
+    violations = concat(
+        [
+            frame
+            for frame in (
+                one_shift_per_day(data),
+                long_days(data),
+                weekend_free(data, weekends),
+                on_leave(data),
+                abutting_leave(data, weekends),
+                non_rostered_status(data),
+            )
+            if len(frame)
+        ]
+        or [DataFrame(columns=_COLUMNS)],
+        ignore_index=True,
+    )
+    violations["first"] = [dates[0] for dates in violations["dates"]]
+    violations["last"] = [dates[-1] for dates in violations["dates"]]
+    violations["clause"] = [str(Clause(clause).value) for clause in violations["clause"]]
+    return violations.sort_values(["first", "registrar", "clause"], kind="stable").reset_index(drop=True)
+
+
+@dataclass
+class AuditReport:
+    start: date
+    end: date
+    violations: DataFrame  # clause, registrar, dates, first, last
+
+    @classmethod
+    def build(cls, start: date, end: date) -> "AuditReport":
+        violations = audit_violations(AuditData.load(start, end))
+        # Keep violations with at least one date in the period
+        in_period = (violations["last"] >= start) & (violations["first"] <= end)
+        return cls(start, end, violations[in_period].reset_index(drop=True))
+
+    def to_violations(self) -> list[Violation]:
+        return [
+            Violation(Clause(row.clause), row.registrar, row.dates) for row in self.violations.itertuples(index=False)
+        ]
+
+    def summary(self) -> DataFrame:
+        """
+        Number of violations and registrars involved per clause, including clauses without any.
+        """
+        grouped = self.violations.groupby("clause")["registrar"]
+        summary = DataFrame({"violations": grouped.size(), "registrars": grouped.nunique()})
+        summary = summary.reindex([clause.value for clause in Clause], fill_value=0)
+        summary.insert(0, "description", [clause.label for clause in Clause])
+        summary.index.name = "clause"
+        return summary
+
+    def rows(self) -> list[dict]:
+        return [
+            {
+                "clause": row.clause,
+                "description": Clause(row.clause).label,
+                "registrar": row.registrar,
+                "start": row.first.isoformat(),
+                "end": row.last.isoformat(),
+                "dates": [day.isoformat() for day in row.dates],
+            }
+            for row in self.violations.itertuples(index=False)
+        ]
+
+    def to_csv(self) -> str:
+        rows = DataFrame(self.rows(), columns=["clause", "description", "registrar", "start", "end", "dates"])
+        rows["dates"] = [" ".join(dates) for dates in rows["dates"]]
+        return rows.to_csv(index=False)
+
+    def to_json(self) -> str:
+        summary = self.summary()
+        return json.dumps(
+            {
+                "start": self.start.isoformat(),
+                "end": self.end.isoformat(),
+                "summary": {
+                    clause: {key: value.item() if hasattr(value, "item") else value for key, value in row.items()}
+                    for clause, row in summary.to_dict(orient="index").items()
+                },
+                "violations": self.rows(),
+            }
+        )
+
+
+def _cache_key(start: date, end: date) -> str:
+    """
+    Cache key that changes whenever a shift, leave or status near the period is created, edited or deleted.
+    """
+    first, last = start - MARGIN, end + MARGIN
+    stamps = [
+        queryset.aggregate(count=Count("id"), last=Max("last_edited"))
+        for queryset in (
+            Shift.objects.filter(date__range=[first, last]),
+            Leave.objects.filter(date__range=[first, last]),
+            Status.objects.overlapping(first, last),
+        )
+    ]
+    digest = hashlib.md5(repr(stamps).encode()).hexdigest()
+    return f"audit:{start}:{end}:{digest}"
+
+
+def audit_report(start: date, end: date) -> AuditReport:
+    """
+    Cached `AuditReport` of START to END.
+    """
+    key = _cache_key(start, end)
+    report = cache.get(key)
+    if report is None:
+        report = AuditReport.build(start, end)
+        cache.set(key, report, AUDIT_CACHE_SECONDS)
+    return report
@@ -0,0 +1,3 @@
+"""
+The PostgreSQL backend, timing how long requests wait for a connection (see `base.DatabaseWrapper`).
+"""
@@ -0,0 +1,21 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from radscheduler.core.metrics import current_metrics
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Records the time taken to get a connection in the request metrics: the wait for a free connection
+    of the pool when pooling is on (including opening one when the pool grows), otherwise the time to
+    connect.
+    """
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        finally:
+            if (metrics := current_metrics.get()) is not None:
+                metrics.pool_wait += time.perf_counter() - started
@@ -0,0 +1,128 @@
+"""
+Read replica routing.
+
+Views marked `@read_only` (the calendar API, the iCal feeds, the public calendar page and the leave
+list) are not wrapped in a transaction by `ATOMIC_REQUESTS`, and read from the `REPLICA_DATABASE` alias
+when one is configured. Everything else, and every write, goes to the default database.
+
+A user who has just written (any unsafe request) has their reads kept on the default database for
+`READ_YOUR_WRITES_SECONDS`, so they see their own changes before the replica catches up. The
+deadline is kept in a cookie rather than the session, which would cost a query to save and another to
+load on every read. Anonymous clients (feeds, the public calendar) never write, and are never held back.
+"""
+
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+_read_database = ContextVar("read_database", default=None)
+
+STICKY_COOKIE = "read_your_writes_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def read_only(view):
+    """
+    Mark VIEW as read-only: it runs outside a transaction and may read from the replica.
+    """
+    view = transaction.non_atomic_requests(view)
+    view.read_only = True
+    return view
+
+
+def read_only_urls(urls, prefix: str):
+    """
+    Mark the views of the URL patterns of URLS, an `include()` tuple, under PREFIX as `read_only`.
+    For views built by a framework (the API), which cannot be decorated.
+    """
+    patterns, *_ = urls
+    for pattern in patterns:
+        if str(pattern.pattern).startswith(prefix):
+            read_only(pattern.callback)
+    return urls
+
+
+def replica_database() -> str | None:
+    return settings.REPLICA_DATABASE if settings.REPLICA_DATABASE in settings.DATABASES else None
+
+
+class ReplicaRouter:
+    """
+    Reads of a read-only view go to the replica, everything else to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # the replica holds the same data
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS  # the replica follows the default database
+
+
+class ReplicaMiddleware:
+    """
+    Route the reads of read-only views to the replica, and keep them on the default database for a
+    while after the user wrote. Must come after the authentication middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.read_database = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request.read_database is not None:
+                _read_database.reset(request._read_database_token)
+
+        user = getattr(request, "user", None)
+        if request.method not in SAFE_METHODS and user is not None and user.is_authenticated:
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(time.time() + settings.READ_YOUR_WRITES_SECONDS),
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        if request.read_database is not None and response.streaming:
+            # Feeds run their queries while the response is streamed, after the view returned
+            response.streaming_content = _reading_from(request.read_database, response.streaming_content)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        alias = replica_database()
+        if alias is None or request.method not in SAFE_METHODS or not getattr(view_func, "read_only", False):
+            return None
+        if self.sticky(request):
+            return None
+        request.read_database = alias
+        request._read_database_token = _read_database.set(alias)
+        return None
+
+    @staticmethod
+    def sticky(request) -> bool:
+        try:
+            return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+def _reading_from(alias, chunks):
+    chunks = iter(chunks)
+    while True:
+        token = _read_database.set(alias)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            _read_database.reset(token)
+        yield chunk
@@ -1,21 +1,133 @@
+import io
 from datetime import date, timedelta
 
+from django.conf import settings
+from django.contrib.sites.shortcuts import get_current_site
+from django.contrib.syndication.views import add_domain
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django_ical.feedgenerator import ICal20Feed
 from django_ical.views import ICalFeed
+from icalendar import Calendar
 
-from radscheduler.core.models import Leave, Shift
+from radscheduler.core.models import Leave, Settings, Shift
 from radscheduler.roster.models import LeaveType, ShiftType
 
+# Cache iCal feeds for 15 minutes - calendar apps poll periodically
+# and the data doesn't change frequently
+ICAL_CACHE_SECONDS = 60 * 15  # 15 minutes
 
-class ShiftFeed(ICalFeed):
+
+class StreamingICal20Feed(ICal20Feed):
+    """
+    An ICal20Feed that yields the calendar one VEVENT at a time,
+    instead of building the whole calendar in memory before writing it.
+    """
+
+    def stream(self, items):
+        # Write an empty calendar to get the VCALENDAR header and footer
+        buffer = io.BytesIO()
+        self.write(buffer, "utf-8")
+        header, footer = buffer.getvalue().rsplit(b"END:VCALENDAR", 1)
+        yield header
+
+        for kwargs in items:
+            self.items = []
+            self.add_item(**kwargs)
+            calendar = Calendar()
+            self.write_items(calendar)
+            for event in calendar.subcomponents:
+                yield event.to_ical()
+
+        yield b"END:VCALENDAR" + footer
+
+
+class StreamingICalFeed(ICalFeed):
+    """
+    Base feed for the roster calendars.
+
+    The feed covers a bounded window, from `ICAL_HISTORY_DAYS` ago to `ICAL_HORIZON_DAYS` ahead,
+    clamped to the publish date range. Subscribers may ask for a shorter horizon with `?horizon=<days>`.
+
+    Events are read with `.iterator()` and streamed to the client, and the rendered calendar
+    is cached per window so that polling calendar apps don't hit the database.
+    """
+
+    feed_type = StreamingICal20Feed
     product_id = "-//radscheduler//radscheduler//EN"
     timezone = "Pacific/Auckland"
+    chunk_size = 500
+
+    def __call__(self, request, *args, **kwargs):
+        window = self.get_object(request, *args, **kwargs)
+        cache_key = f"ical:{self.__class__.__name__}:{window[0]}:{window[1]}"
+
+        content = cache.get(cache_key)
+        if content is not None:
+            return HttpResponse(content, content_type=self.feed_type.mime_type)
+
+        return StreamingHttpResponse(
+            self._stream_and_cache(request, window, cache_key),
+            content_type=self.feed_type.mime_type,
+        )
+
+    def get_object(self, request, *args, **kwargs):
+        """
+        Return the (start, end) date window covered by the feed.
+        """
+        today = date.today()
+        horizon = settings.ICAL_HORIZON_DAYS
+        try:
+            horizon = max(0, min(int(request.GET["horizon"]), horizon))
+        except (KeyError, ValueError):
+            pass
+
+        start = today - timedelta(days=settings.ICAL_HISTORY_DAYS)
+        end = today + timedelta(days=horizon)
+
+        publish_settings = Settings.objects.first()
+        if publish_settings:
+            # Clamp the date range to the publish date range
+            start = max(start, publish_settings.publish_start_date)
+            end = min(end, publish_settings.publish_end_date)
+        return start, end
+
+    def _stream_and_cache(self, request, window, cache_key):
+        chunks = []
+        for chunk in self._stream(request, window):
+            chunks.append(chunk)
+            yield chunk
+        cache.set(cache_key, b"".join(chunks), ICAL_CACHE_SECONDS)
+
+    def _stream(self, request, window):
+        current_site = get_current_site(request)
+        feed = self.feed_type(
+            title=self._get_dynamic_attr("title", window),
+            link=add_domain(current_site.domain, self.link, request.is_secure()),
+            description=self._get_dynamic_attr("description", window),
+            **self.feed_extra_kwargs(window),
+        )
+        items = self.items(window).iterator(chunk_size=self.chunk_size)
+        return feed.stream(self._item_kwargs(item, current_site, request) for item in items)
+
+    def _item_kwargs(self, item, current_site, request):
+        return {
+            "title": self.item_title(item),
+            "link": add_domain(current_site.domain, self.item_link(item), request.is_secure()),
+            "description": self.item_description(item),
+            "unique_id": self.item_guid(item),
+            **self.item_extra_kwargs(item),
+        }
 
-    def items(self):
-        # Only fetch recent past (30 days) and future shifts to reduce query size
+    def item_link(self, _):
+        return "/"
+
+
+class ShiftFeed(StreamingICalFeed):
+    def items(self, window):
+        start, end = window
         return (
-            Shift.objects.filter(
-                date__gte=date.today() - timedelta(days=30), registrar__isnull=False
-            )
+            Shift.objects.filter(date__range=[start, end], registrar__isnull=False)
             .select_related("registrar", "registrar__user")
             .only(
                 "id",
@@ -46,20 +158,12 @@ class ShiftFeed(ICalFeed):
     def item_guid(self, shift):
         return f"shift_{shift.id}"
 
-    def item_link(self, _):
-        return "/"
-
 
-class LeaveFeed(ICalFeed):
-    product_id = "-//radscheduler//radscheduler//EN"
-    timezone = "Pacific/Auckland"
-
-    def items(self):
-        # Only fetch recent past (30 days) and future leaves to reduce query size
+class LeaveFeed(StreamingICalFeed):
+    def items(self, window):
+        start, end = window
         return (
-            Leave.objects.filter(
-                date__gte=date.today() - timedelta(days=30), cancelled=False
-            )
+            Leave.objects.filter(date__range=[start, end], cancelled=False)
             .select_related("registrar", "registrar__user")
             .only(
                 "id",
@@ -84,6 +188,3 @@ class LeaveFeed(ICalFeed):
 
     def item_guid(self, leave):
         return f"leave_{leave.id}"
-
-    def item_link(self, _):
-        return "/"
@@ -4,9 +4,14 @@ Imports the history of shifts and leaves from a CSV file.
 The file was exported from Google Sheets designed by the previous roster master (Dr. Ed Ganly).
 """
 import csv
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import date, datetime
+from itertools import islice, repeat
 
 import yaml
+from django.contrib.auth.hashers import make_password
+from django.db import DatabaseError, transaction
 
 from radscheduler.core.models import Leave, Registrar, Shift, Status
 from radscheduler.roster import LeaveType, ShiftType, StatusType, Weekday, canterbury_holidays
@@ -35,6 +40,8 @@ leave_types = {
     "Parental leave": LeaveType.PARENTAL,
 }
 
+DEFAULT_PASSWORD = "cdhbxray1"
+
 status_types = {
     "reliever": StatusType.RELIEVER,
     "buddy": StatusType.BUDDY,
@@ -44,52 +51,230 @@ status_types = {
 }
 
 
-def import_history(filename: str, users: list[Registrar], start: date, end: date):
-    """Imports the history of shifts and leaves from a CSV file.
-    Specify a range to import from START to END.
+IMPORT_CHUNK = 1000  # rows parsed and inserted at a time
+EXTRA_DUTY_SERIES = 2  # extra duties have their own slot next to the rostered shift
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    shifts: int = 0
+    leaves: int = 0
+    skipped: int = 0  # out of the date range, or neither a shift nor a leave
+    updated: int = 0  # shifts and leaves changed in the file, when upserting
+    deleted: int = 0  # shifts and leaves removed from the file, when upserting
+    errors: list[tuple[int, list[str], str]] = field(default_factory=list)  # line, row and why it was rejected
+    first: date = None  # of the imported shifts and leaves
+    last: date = None
+
+    def add_dates(self, dates):
+        if dates:
+            self.first = min(self.first or date.max, *dates)
+            self.last = max(self.last or date.min, *dates)
+
+
+def registrar_ids() -> dict[str, int]:
+    """
+    Registrar ids by username, to resolve the usernames of a whole import with one query.
+    """
+    return dict(Registrar.objects.values_list("user__username", "id"))
+
+
+def read_rows(filename: str):
+    """
+    The line number and cells of each row of the CSV file, read as they are needed.
+    """
+    with open(filename, newline="") as f:
+        yield from enumerate(csv.reader(f), start=1)
+
+
+class Upsert:
+    """
+    Synchronises the rows of MODEL with a file, matched on UNIQUE_FIELDS, a unique constraint.
+
+    Each chunk is compared with the rows of its dates, and only the new and changed rows are written,
+    in one `bulk_create(update_conflicts=True)`. The rows of the date range missing from the file are
+    then deleted by `sweep`.
+    """
+
+    def __init__(self, model, unique_fields: list[str], update_fields: list[str]):
+        self.model = model
+        self.unique_fields = unique_fields
+        self.update_fields = update_fields
+        self.lines = {}  # line of each key in the file
+
+    def _values(self, fields):
+        return [self.model._meta.get_field(name).attname for name in fields]
+
+    def key(self, obj) -> tuple:
+        return tuple(getattr(obj, name) for name in self._values(self.unique_fields))
+
+    def values(self, obj) -> tuple:
+        return tuple(getattr(obj, name) for name in self._values(self.update_fields))
+
+    def existing(self, dates) -> dict[tuple, tuple]:
+        keys, values = self._values(self.unique_fields), self._values(self.update_fields)
+        rows = self.model.objects.filter(date__in=dates).values_list(*keys, *values)
+        return {row[: len(keys)]: row[len(keys) :] for row in rows}
+
+    def apply(self, rows, report) -> int:
+        """
+        Write the rows that differ from the database, and return how many rows were accepted.
+        """
+        accepted = []
+        for line, row, obj in rows:
+            key = self.key(obj)
+            if key in self.lines:
+                report.errors.append((line, row, f"Same {self.model._meta.verbose_name} as line {self.lines[key]}"))
+            else:
+                self.lines[key] = line
+                accepted.append((line, row, obj))
+
+        existing = self.existing({obj.date for _, _, obj in accepted})
+        changed = [(line, row, obj) for line, row, obj in accepted if existing.get(self.key(obj)) != self.values(obj)]
+        written = _insert(
+            self.model,
+            changed,
+            report,
+            update_conflicts=True,
+            unique_fields=self.unique_fields,
+            update_fields=[*self.update_fields, "last_edited"],
+        )
+        report.updated += sum(self.key(obj) in existing for _, _, obj in written)
+        report.add_dates([obj.date for _, _, obj in accepted])
+        # The rows the database rejected are reported, and keep their current values
+        return len(accepted) - (len(changed) - len(written))
+
+    def sweep(self, start: date, end: date, report, batch_size=IMPORT_CHUNK):
+        """
+        Delete the rows from START to END that were not in the file.
+        """
+        keys = self._values(self.unique_fields)
+        rows = self.model.objects.filter(date__range=[start, end])
+        if self.model is Shift:
+            rows = rows.filter(registrar__isnull=False)  # open shifts are never in the file
+        rows = rows.values_list("pk", "date", *keys)
+        removed = [(pk, day) for pk, day, *key in rows if tuple(key) not in self.lines]
+        for i in range(0, len(removed), batch_size):
+            batch = removed[i : i + batch_size]
+            self.model.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+        report.deleted += len(removed)
+        report.add_dates([day for _, day in removed])
+
+
+def import_history(
+    filename: str, start: date = None, end: date = None, chunk_size=IMPORT_CHUNK, progress=None, upsert=False
+):
+    """
+    Imports the history of shifts and leaves from a CSV file, from START to END if given.
+
+    The file is streamed and inserted CHUNK_SIZE rows at a time. Rows that cannot be imported are
+    reported instead of aborting the import. PROGRESS, if given, is called with the report after
+    each chunk. Returns the `ImportReport`.
+
+    Rows already in the database are left as they are, unless UPSERT is set: the shifts and leaves
+    from START to END (the first to the last date of the file by default) are then updated to match
+    the file, and the ones not in it deleted.
+    """
+    report = ImportReport()
+    registrars = registrar_ids()
+    upserts = None
+    if upsert:
+        upserts = (
+            Upsert(Shift, ["date", "type", "series"], ["registrar", "extra_duty", "stat_day"]),
+            Upsert(Leave, ["date", "registrar"], ["type", "portion"]),
+        )
+    rows = read_rows(filename)
+    while chunk := list(islice(rows, chunk_size)):
+        import_chunk(chunk, registrars, start, end, report, upserts)
+        if progress:
+            progress(report)
+    if upserts and (start or report.first) and (end or report.last):
+        for sync in upserts:
+            sync.sweep(start or report.first, end or report.last, report)
+    return report
+
+
+def import_chunk(chunk, registrars, start, end, report, upserts=None):
+    shifts, leaves = [], []
+    for line, row in chunk:
+        report.rows += 1
+        if not any(row):
+            report.skipped += 1
+            continue
+        if len(row) < 3:
+            report.errors.append((line, row, "Expected a date, a username and a shift or leave type"))
+            continue
+        try:
+            shift_or_leave = parse_row(*row[:3], start, end, registrars)
+        except ValueError as e:
+            report.errors.append((line, row, str(e)))
+            continue
+        if isinstance(shift_or_leave, Shift):
+            shifts.append((line, row, shift_or_leave))
+        elif isinstance(shift_or_leave, Leave):
+            leaves.append((line, row, shift_or_leave))
+        else:
+            report.skipped += 1
+    if upserts:
+        shift_upsert, leave_upsert = upserts
+        report.shifts += shift_upsert.apply(shifts, report)
+        report.leaves += leave_upsert.apply(leaves, report)
+    else:
+        report.shifts += len(_insert(Shift, shifts, report))
+        report.leaves += len(_insert(Leave, leaves, report))
+
+
+def _insert(model, rows, report, **options) -> list:
+    """
+    Bulk insert the objects of ROWS, falling back to one at a time to find the rows the database rejects.
+
+    OPTIONS are passed to `bulk_create`, conflicts are ignored by default. Returns the rows inserted.
+    """
+    options = options or {"ignore_conflicts": True}
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create([obj for _, _, obj in rows], **options)
+        inserted = rows
+    except DatabaseError:
+        inserted = []
+        for line, row, obj in rows:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([obj], **options)
+                inserted.append((line, row, obj))
+            except DatabaseError as e:
+                report.errors.append((line, row, str(e).strip()))
+    report.add_dates([obj.date for _, _, obj in inserted])
+    return inserted
+
+
+def parse_row(date, username, shift_type_str, start, end, registrars):
+    """
+    The unsaved shift or leave of a row, or None if it is out of range or neither.
+
+    Raises `ValueError` for a malformed date or an unknown username.
     """
-    rows = []
-    with open(filename) as f:
-        reader = csv.reader(f)
-        for row in reader:
-            rows.append(row)
-    results = parse(rows, users, start, end)
-    return results
-
-
-def parse(rows, users, start, end):
-    shifts = []
-    leaves = []
-    for row in rows:
-        shift_or_leave = parse_row(row[0], row[1], row[2], start, end, users)
-        if shift_or_leave:
-            if isinstance(shift_or_leave, Shift):
-                shifts.append(shift_or_leave)
-            elif isinstance(shift_or_leave, Leave):
-                leaves.append(shift_or_leave)
-    return (shifts, leaves)
-
-
-def parse_row(date, username, shift_type_str, start, end, users):
     date = datetime.strptime(date, "%d/%m/%Y").date()
-    if start or end:
-        keep = True
-        if not start:
-            keep = date <= end
-        if not end:
-            keep = date >= start
-        if not (start <= date <= end) or not keep:
-            return None
+    if (start and date < start) or (end and date > end):
+        return None
+    if shift_type_str not in shift_types and shift_type_str not in leave_types:
+        return None
 
-    user = User.objects.get(username=username)
+    registrar_id = registrars.get(username)
+    if registrar_id is None:
+        raise ValueError(f"Unknown registrar {username!r}")
 
     if shift_type_str in shift_types:
         shift_type = shift_types[shift_type_str]
         extra = "Extra duty" in shift_type_str
         stat = date in canterbury_holidays
-        return Shift(date=date, type=shift_type, registrar=user.registrar, extra_duty=extra, stat_day=stat)
+        series = EXTRA_DUTY_SERIES if extra else 1
+        return Shift(
+            date=date, type=shift_type, registrar_id=registrar_id, extra_duty=extra, stat_day=stat, series=series
+        )
 
-    elif shift_type_str in leave_types:
+    else:
         leave_type = leave_types[shift_type_str]
         if "a.m." in shift_type_str:
             portion = "AM"
@@ -100,7 +285,7 @@ def parse_row(date, username, shift_type_str, start, end, users):
         return Leave(
             date=date,
             type=leave_type,
-            registrar=user.registrar,
+            registrar_id=registrar_id,
             portion=portion,
             reg_approved=True,
             dot_approved=True,
@@ -110,13 +295,26 @@ def parse_row(date, username, shift_type_str, start, end, users):
 
 
 def import_users(fname):
+    """
+    Create the users in the profiles file, and their unsaved registrars.
+
+    Every user gets the default password, hashed in parallel as Argon2 is slow by design.
+    """
     with open(fname) as f:
         data = yaml.safe_load(f)
+    existing = User.objects.in_bulk(list(data), field_name="username")
+    User.objects.bulk_create([User(username=username) for username in data if username not in existing])
+    users = User.objects.in_bulk(list(data), field_name="username")
+
+    with ThreadPoolExecutor() as pool:
+        passwords = pool.map(make_password, repeat(DEFAULT_PASSWORD, len(data)))
+    for user, password in zip(users.values(), passwords):
+        user.password = password
+    User.objects.bulk_update(users.values(), ["password"])
+
     result = {"users": [], "registrars": []}
     for username, profile in data.items():
-        user, _ = User.objects.get_or_create(username=username)
-        user.set_password("cdhbxray1")
-        user.save()
+        user = users[username]
         senior = profile["senior"]
         start = datetime.strptime(profile["start"], "%d/%m/%Y").date()
         finish = datetime.strptime(profile["finish"], "%d/%m/%Y").date()
@@ -129,12 +327,13 @@ def import_users(fname):
 def import_status(fname):
     with open(fname) as f:
         data = yaml.safe_load(f)
+    registrars = registrar_ids()
     result = []
     for username, profile in data.items():
         type = status_types[profile["type"]]
         start = datetime.strptime(profile["start"], "%d/%m/%Y").date()
         end = datetime.strptime(profile["finish"], "%d/%m/%Y").date()
-        registrar = User.objects.get(username=username).registrar
+        registrar_id = registrars[username]
 
         if profile.get("weekdays"):
             weekdays = [Weekday(x) for x in profile["weekdays"]]
@@ -148,7 +347,7 @@ def import_status(fname):
 
         result.append(
             Status(
-                registrar=registrar,
+                registrar_id=registrar_id,
                 type=type,
                 start=start,
                 end=end,
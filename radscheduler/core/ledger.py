@@ -0,0 +1,165 @@
+"""
+Weekly workload ledger.
+
+Keeps one `WorkloadLedger` row per registrar per week, so that workload reports and
+the generation baseline read a handful of pre-aggregated rows instead of rescanning
+every shift and leave in the period.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+import radscheduler.roster.models as domain
+from radscheduler.core.models import Leave, Shift, WorkloadLedger
+from radscheduler.roster import LeaveType, ShiftType, SingleOnCallRoster
+from radscheduler.roster.models import DetailedShiftType
+
+COUNT_FIELDS = {
+    DetailedShiftType.LONG: "long",
+    DetailedShiftType.WEEKEND: "weekend",
+    DetailedShiftType.NIGHT: "night",
+    DetailedShiftType.WEEKEND_NIGHT: "weekend_night",
+    DetailedShiftType.RDO: "rdo",
+    DetailedShiftType.SLEEP: "sleep",
+}
+LEDGER_FIELDS = [*COUNT_FIELDS.values(), "extra_duty", "shift_fatigue", "leave_fatigue"]
+
+
+def week_start(day: date) -> date:
+    """
+    Return the Monday of the week containing DAY.
+    """
+    return day - timedelta(days=day.weekday())
+
+
+def _aggregate(shifts, leaves) -> dict[tuple[int, date], WorkloadLedger]:
+    """
+    Aggregate shift and leave rows (as dicts from `.values()`) into ledger rows keyed by (registrar id, week).
+    """
+    rows = defaultdict(dict)
+
+    for shift in shifts:
+        row = rows[(shift["registrar_id"], week_start(shift["date"]))]
+        if shift["extra_duty"]:
+            row["extra_duty"] = row.get("extra_duty", 0) + 1
+            continue
+
+        domain_shift = domain.Shift(
+            date=shift["date"],
+            type=ShiftType(shift["type"]),
+            stat_day=shift["stat_day"],
+            fatigue_override=shift["fatigue_override"],
+        )
+        detailed_type = DetailedShiftType.from_shift(domain_shift)
+        # Swing and help shifts have no count column, but an override or stat day still weighs on them
+        if detailed_type is not None:
+            field = COUNT_FIELDS[detailed_type]
+            row[field] = row.get(field, 0) + 1
+        fatigue = SingleOnCallRoster.shift_fatigue(domain_shift) or 0.0
+        row["shift_fatigue"] = row.get("shift_fatigue", 0.0) + fatigue
+
+    for leave in leaves:
+        row = rows[(leave["registrar_id"], week_start(leave["date"]))]
+        domain_leave = domain.Leave(date=leave["date"], type=LeaveType(leave["type"]), registrar=None)
+        row["leave_fatigue"] = row.get("leave_fatigue", 0.0) + SingleOnCallRoster.leave_fatigue(domain_leave)
+
+    return {
+        (registrar_id, week): WorkloadLedger(registrar_id=registrar_id, week=week, **fields)
+        for (registrar_id, week), fields in rows.items()
+        if fields
+    }
+
+
+def _load(start: date, end: date, **filters):
+    shifts = Shift.objects.filter(date__range=[start, end], registrar__isnull=False, **filters).values(
+        "registrar_id", "date", "type", "stat_day", "extra_duty", "fatigue_override"
+    )
+    leaves = Leave.objects.filter(date__range=[start, end], cancelled=False, **filters).values(
+        "registrar_id", "date", "type"
+    )
+    return shifts, leaves
+
+
+def _save(rows):
+    WorkloadLedger.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["registrar", "week"],
+        update_fields=[*LEDGER_FIELDS, "last_edited"],
+    )
+
+
+def refresh_ledger(keys):
+    """
+    Recompute the ledger rows for the given (registrar id, date) pairs.
+
+    The dates may be any day of the week. Used by the signals, so it only touches the weeks that changed.
+    """
+    keys = {(registrar_id, week_start(day)) for registrar_id, day in keys if registrar_id is not None}
+    if not keys:
+        return
+
+    registrar_ids = {registrar_id for registrar_id, _ in keys}
+    weeks = {week for _, week in keys}
+    shifts, leaves = _load(min(weeks), max(weeks) + timedelta(days=6), registrar_id__in=registrar_ids)
+    rows = {key: row for key, row in _aggregate(shifts, leaves).items() if key in keys}
+
+    for registrar_id, week in keys - rows.keys():
+        WorkloadLedger.objects.filter(registrar_id=registrar_id, week=week).delete()
+    _save(list(rows.values()))
+
+
+def rebuild_ledger(start: date, end: date) -> int:
+    """
+    Rebuild every ledger row for the weeks between START and END from scratch.
+
+    Use after bulk writes (`bulk_create`, `QuerySet.update`) which bypass the signals.
+    Returns the number of rows written.
+    """
+    start, end = week_start(start), week_start(end) + timedelta(days=6)
+    shifts, leaves = _load(start, end)
+    rows = list(_aggregate(shifts, leaves).values())
+
+    WorkloadLedger.objects.filter(week__range=[start, end]).delete()
+    _save(rows)
+    return len(rows)
+
+
+def ledger_weeks(start: date, end: date) -> list[WorkloadLedger]:
+    """
+    Ledger rows of the weeks overlapping START to END, counting only the days from START to END.
+
+    Weeks wholly inside the range are read from the ledger. The days of a partial week at either edge
+    are aggregated from their shifts and leaves, at most six days each.
+    """
+    first = week_start(start + timedelta(days=6))  # first Monday on or after START
+    last = week_start(end + timedelta(days=1))  # Monday after the last whole week
+    if first >= last:
+        return list(_aggregate(*_load(start, end)).values())
+
+    rows = list(WorkloadLedger.objects.filter(week__gte=first, week__lt=last))
+    for edge_start, edge_end in [(start, first - timedelta(days=1)), (last, end)]:
+        if edge_start <= edge_end:
+            rows += _aggregate(*_load(edge_start, edge_end)).values()
+    return rows
+
+
+def ledger_totals(start: date, end: date) -> dict[int, dict[str, float]]:
+    """
+    Ledger fields summed per registrar id over START to END.
+    """
+    totals = defaultdict(lambda: dict.fromkeys(LEDGER_FIELDS, 0))
+    for row in ledger_weeks(start, end):
+        for field in LEDGER_FIELDS:
+            totals[row.registrar_id][field] += getattr(row, field)
+    return dict(totals)
+
+
+def ledger_fatigue(start: date, end: date) -> dict[int, float]:
+    """
+    Baseline shift and leave fatigue per registrar id from START to END, as used by the AutoAssigner.
+    """
+    return {
+        registrar_id: totals["shift_fatigue"] + totals["leave_fatigue"]
+        for registrar_id, totals in ledger_totals(start, end).items()
+    }
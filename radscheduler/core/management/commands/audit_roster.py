@@ -0,0 +1,43 @@
+import argparse
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from radscheduler.core.audit import audit_report
+
+
+def valid_date(s):
+    try:
+        return datetime.strptime(s, "%d/%m/%Y").date()
+    except ValueError:
+        msg = "Not a valid date: '{0}'.".format(s)
+        raise argparse.ArgumentTypeError(msg)
+
+
+class Command(BaseCommand):
+    help = "Audit the roster between two dates for MECA compliance"
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", type=valid_date, help="Start date")
+        parser.add_argument("end", type=valid_date, help="End date")
+        parser.add_argument("--format", choices=["summary", "csv", "json"], default="summary")
+        parser.add_argument("--output", help="Write the report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        report = audit_report(options["start"], options["end"])
+
+        if options["format"] == "summary":
+            content = report.summary().to_string()
+        elif options["format"] == "csv":
+            content = report.to_csv()
+        else:
+            content = report.to_json()
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(content)
+            self.stdout.write(
+                self.style.SUCCESS(f"{len(report.violations)} violations written to {options['output']}")
+            )
+        else:
+            self.stdout.write(content)
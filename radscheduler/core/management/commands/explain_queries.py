@@ -0,0 +1,28 @@
+import argparse
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from radscheduler.core.query_plans import HOT_QUERIES
+
+
+def valid_date(s):
+    try:
+        return datetime.strptime(s, "%d/%m/%Y").date()
+    except ValueError:
+        msg = "Not a valid date: '{0}'.".format(s)
+        raise argparse.ArgumentTypeError(msg)
+
+
+class Command(BaseCommand):
+    help = "Print the query plans of the hot queries, to check which indexes they use"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=valid_date, help="Date the queries are run as of, defaults to today")
+        parser.add_argument("--analyze", action="store_true", help="Run the queries and report actual timings")
+
+    def handle(self, *args, **options):
+        for query in HOT_QUERIES:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{query.name} (expects {query.index})"))
+            self.stdout.write(query.explain(options["date"], analyze=options["analyze"]))
+            self.stdout.write("")
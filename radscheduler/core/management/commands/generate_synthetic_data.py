@@ -0,0 +1,196 @@
+import argparse
+from datetime import date, datetime, timedelta
+from random import Random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from radscheduler.core.ledger import refresh_ledger
+from radscheduler.core.models import Leave, Registrar, Shift, ShiftInterest, Status
+from radscheduler.core.service import save_roster
+from radscheduler.roster import AutoAssigner, ShiftType, SingleOnCallRoster
+from radscheduler.roster import models as domain
+from radscheduler.roster.generator import generate_shifts
+from radscheduler.roster.synthetic import (
+    synthetic_intake,
+    synthetic_leaves,
+    synthetic_registrars,
+    synthetic_statuses,
+)
+from radscheduler.users.models import User
+
+# Shifts are filled a quarter at a time, carrying the last weeks over so blocks continue across windows
+FILL_WINDOW_DAYS = 91
+CARRY_OVER_DAYS = 28
+
+
+def valid_date(s):
+    try:
+        return datetime.strptime(s, "%d/%m/%Y").date()
+    except ValueError:
+        msg = "Not a valid date: '{0}'.".format(s)
+        raise argparse.ArgumentTypeError(msg)
+
+
+class Command(BaseCommand):
+    help = "Generate a large synthetic roster for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--registrars", type=int, default=50, help="Number of active registrars")
+        parser.add_argument("--years", type=int, default=5, help="Years of history to generate")
+        parser.add_argument("--start", type=valid_date, help="Start date, defaults to YEARS before today")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, the same seed gives the same data")
+        parser.add_argument("--prefix", type=str, default="synth-", help="Prefix of the generated usernames")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per bulk insert")
+
+    def handle(self, *args, **options):
+        start = options["start"] or date.today() - timedelta(days=365 * options["years"])
+        end = start + timedelta(days=365 * options["years"] - 1)
+        prefix = options["prefix"]
+        batch_size = options["batch_size"]
+        rng = Random(options["seed"])
+
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users prefixed '{prefix}' already exist, choose another --prefix")
+        if Shift.objects.filter(date__range=[start, end]).exists():
+            raise CommandError(f"The roster already has shifts from {start} to {end}, choose another --start")
+
+        registrars, leaves, statuses = self.people(options["registrars"], start, end, rng)
+        shifts = self.fill_shifts(registrars, leaves, statuses, start, end, rng)
+        extra_duties = self.extra_duties(start, end, rng)
+
+        with transaction.atomic():
+            # Random ids of the domain registrars are replaced by database ids once they are saved
+            password = make_password(None)
+            users = User.objects.bulk_create(
+                [User(username=f"{prefix}{r.username}", name=r.username, password=password) for r in registrars],
+                batch_size=batch_size,
+            )
+            saved = Registrar.objects.bulk_create(
+                [
+                    Registrar(user=user, senior=r.senior, start=r.start, finish=r.finish)
+                    for user, r in zip(users, registrars)
+                ],
+                batch_size=batch_size,
+            )
+            # bulk_create bypasses Registrar.save(), so compute the training years here
+            Registrar.objects.filter(pk__in=[r.pk for r in saved]).refresh_training_years()
+            for registrar, db in zip(registrars, saved):
+                registrar.id = db.pk
+
+            saved_leaves = Leave.objects.bulk_create(
+                [self.leave(leave, leave.registrar.id, rng) for leave in leaves],
+                batch_size=batch_size,
+            )
+            # bulk_create bypasses the ledger signals
+            refresh_ledger({(leave.registrar_id, leave.date) for leave in saved_leaves})
+            Status.objects.bulk_create(
+                [
+                    Status(
+                        start=s.start,
+                        end=s.end,
+                        type=s.type,
+                        registrar_id=s.registrar.id,
+                        weekdays=list(s.weekdays),
+                        shift_types=list(s.shift_types),
+                    )
+                    for s in statuses
+                ],
+                batch_size=batch_size,
+            )
+
+            save_roster(shifts + extra_duties, batch_size=batch_size)
+            interests = []
+            for shift in extra_duties:
+                active = [r.id for r in registrars if r.start <= shift.date <= r.finish]
+                interests.extend(
+                    ShiftInterest(shift_id=shift.id, registrar_id=registrar_id)
+                    for registrar_id in rng.sample(active, min(len(active), rng.randint(0, 4)))
+                )
+            ShiftInterest.objects.bulk_create(interests, batch_size=batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(registrars)} registrars, {len(shifts) + len(extra_duties)} shifts, "
+                f"{len(leaves)} leaves, {len(statuses)} statuses and {len(interests)} interests "
+                f"from {start} to {end}"
+            )
+        )
+
+    def people(self, count, start, end, rng):
+        """
+        Registrars active at START, plus a yearly intake replacing those who finish.
+
+        Leaves and statuses are generated a year at a time for the registrars active that year.
+        """
+        registrars = synthetic_registrars(count, start, rng)
+        for registrar in registrars:
+            registrar.finish = registrar.start + timedelta(days=365 * 5)
+
+        leaves, statuses = [], []
+        year_start = start
+        while year_start <= end:
+            year_end = min(year_start + timedelta(days=364), end)
+            if year_start > start:
+                registrars += synthetic_intake(count // 5, year_start, len(registrars) + 1, rng)
+
+            active = [r for r in registrars if r.start <= year_end and r.finish >= year_start]
+            leaves += [
+                leave
+                for leave in synthetic_leaves(active, year_start, year_end, rng)
+                if leave.registrar.start <= leave.date <= leave.registrar.finish
+            ]
+            statuses += synthetic_statuses(active, year_start, year_end, rng)
+            year_start = year_end + timedelta(days=1)
+        return registrars, leaves, statuses
+
+    def fill_shifts(self, registrars, leaves, statuses, start, end, rng):
+        """
+        Generate and auto-assign the oncall roster a window at a time.
+        """
+        results = []
+        window_start = start
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=FILL_WINDOW_DAYS - 1), end)
+            active = [r for r in registrars if r.start <= window_start and r.finish >= window_end]
+            carried = [s for s in results if s.date >= window_start - timedelta(days=CARRY_OVER_DAYS)]
+            assigner = AutoAssigner(
+                registrars=active,
+                unfilled=generate_shifts(SingleOnCallRoster, window_start, window_end),
+                filled=carried,
+                leaves=[leave for leave in leaves if window_start <= leave.date <= window_end],
+                statuses=[s for s in statuses if s.start <= window_end and s.end >= window_start],
+            )
+            results += [s for s in assigner.fill_roster() if s.date >= window_start]
+            window_start = window_end + timedelta(days=1)
+        return results
+
+    def extra_duties(self, start, end, rng):
+        """
+        Unassigned extra duty long days on about a third of weekends.
+        """
+        shifts = []
+        saturday = start + timedelta(days=(5 - start.weekday()) % 7)
+        while saturday <= end:
+            if rng.random() < 0.3:
+                for day in [saturday, saturday + timedelta(days=1)]:
+                    shifts.append(domain.Shift(date=day, type=ShiftType.LONG, extra_duty=True, series=2))
+            saturday += timedelta(days=7)
+        return [shift for shift in shifts if shift.date <= end]
+
+    def leave(self, leave, registrar_id, rng):
+        """
+        Past leaves are mostly approved and printed, future ones are a mix of approved and pending.
+        """
+        past = leave.date < date.today()
+        approved = rng.random() < (0.95 if past else 0.6)
+        return Leave(
+            date=leave.date,
+            type=leave.type,
+            registrar_id=registrar_id,
+            reg_approved=True if approved else None,
+            dot_approved=True if approved else None,
+            printed=past and approved,
+            cancelled=rng.random() < 0.02,
+        )
@@ -2,11 +2,10 @@ import argparse
 from datetime import datetime
 
 from django.core.management.base import BaseCommand
-from django.db.utils import IntegrityError
 
 from radscheduler.core.io import import_history, import_status, import_users
-from radscheduler.core.models import Leave, Registrar, Shift, Status
-from radscheduler.users.models import User
+from radscheduler.core.ledger import rebuild_ledger
+from radscheduler.core.models import Registrar, Status
 
 
 def valid_date(s):
@@ -26,6 +25,12 @@ class Command(BaseCommand):
         parser.add_argument("--statuses", type=str, help="Path to status file")
         parser.add_argument("--start", type=valid_date, help="Start date")
         parser.add_argument("--end", type=valid_date, help="End date")
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update the shifts, leaves and statuses changed in the files, and delete the shifts and leaves "
+            "removed from the history between the start and end dates",
+        )
 
     def handle(self, *args, **options):
         fname = options["history"]
@@ -39,13 +44,36 @@ class Command(BaseCommand):
         if not statuses:
             statuses = "resources/statuses.yaml"
         profiles = import_users(profile_path)
-        users = profiles["users"]
         registrars = profiles["registrars"]
         Registrar.objects.bulk_create(registrars, ignore_conflicts=True)
+        # bulk_create bypasses Registrar.save(), so compute the training years here
+        Registrar.objects.refresh_training_years()
 
-        shifts, leaves = import_history(fname, users, start, end)
+        upsert = options["upsert"]
+        report = import_history(fname, start, end, progress=self.progress, upsert=upsert)
         statuses = import_status(statuses)
-        Shift.objects.bulk_create(shifts, ignore_conflicts=True)
-        Leave.objects.bulk_create(leaves, ignore_conflicts=True)
-        Status.objects.bulk_create(statuses, ignore_conflicts=True)
-        self.stdout.write(self.style.SUCCESS("Successfully imported roster"))
+        if upsert:
+            Status.objects.bulk_create(
+                statuses,
+                update_conflicts=True,
+                unique_fields=["registrar", "type", "start"],
+                update_fields=["end", "weekdays", "shift_types", "last_edited"],
+            )
+        else:
+            Status.objects.bulk_create(statuses, ignore_conflicts=True)
+        if report.first:
+            # bulk_create bypasses the ledger signals
+            rebuild_ledger(report.first, report.last)
+
+        for line, row, error in report.errors:
+            self.stderr.write(f"Line {line}: {error} ({','.join(row)})")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully imported roster: {report.shifts} shifts and {report.leaves} leaves "
+                f"from {report.rows} rows, {report.skipped} skipped and {len(report.errors)} rejected, "
+                f"{report.updated} updated and {report.deleted} deleted"
+            )
+        )
+
+    def progress(self, report):
+        self.stdout.write(f"{report.rows} rows read, {report.shifts} shifts and {report.leaves} leaves imported")
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from radscheduler.paper_forms.jobs import run_queued
+
+
+class Command(BaseCommand):
+    help = "Run queued leave form print jobs, when they are not run by the web process"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run the queued jobs and exit")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between polls of the queue")
+
+    def handle(self, *args, **options):
+        while True:
+            count = run_queued()
+            if count:
+                self.stdout.write(self.style.SUCCESS(f"Ran {count} print jobs"))
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
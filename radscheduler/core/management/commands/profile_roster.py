@@ -0,0 +1,42 @@
+import argparse
+import pstats
+from datetime import datetime
+from io import StringIO
+
+from django.core.management.base import BaseCommand
+
+from radscheduler.core.profiling import record_fill_shifts
+
+
+def valid_date(s):
+    try:
+        return datetime.strptime(s, "%d/%m/%Y").date()
+    except ValueError:
+        msg = "Not a valid date: '{0}'.".format(s)
+        raise argparse.ArgumentTypeError(msg)
+
+
+class Command(BaseCommand):
+    help = "Fill the roster between two dates without saving it, and report where the time went"
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", type=valid_date, help="Start date")
+        parser.add_argument("end", type=valid_date, help="End date")
+        parser.add_argument("--profile", action="store_true", help="Capture a cProfile dump of the run")
+        parser.add_argument("--top", type=int, default=20, help="Functions to list from the profile")
+
+    def handle(self, *args, **options):
+        run, _ = record_fill_shifts(options["start"], options["end"], profile=options["profile"])
+
+        for stage, seconds in run.timings.items():
+            self.stdout.write(f"{stage:<10} {seconds * 1000:>10.1f}ms")
+        for name, value in run.counters.items():
+            self.stdout.write(f"{name:<20} {value:>10}")
+
+        if run.profile:
+            buffer = StringIO()
+            stats = pstats.Stats(run.profile.path, stream=buffer)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(options["top"])
+            self.stdout.write(buffer.getvalue())
+            self.stdout.write(f"Profile saved to {run.profile.path}")
+        self.stdout.write(self.style.SUCCESS(f"Run {run.pk} took {run.duration:.2f}s"))
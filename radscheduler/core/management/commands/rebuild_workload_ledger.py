@@ -0,0 +1,35 @@
+import argparse
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from radscheduler.core.ledger import rebuild_ledger
+from radscheduler.core.models import Leave, Shift
+
+
+def valid_date(s):
+    try:
+        return datetime.strptime(s, "%d/%m/%Y").date()
+    except ValueError:
+        msg = "Not a valid date: '{0}'.".format(s)
+        raise argparse.ArgumentTypeError(msg)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the weekly workload ledger from shifts and leaves"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=valid_date, help="Start date, defaults to the earliest shift or leave")
+        parser.add_argument("--end", type=valid_date, help="End date, defaults to the latest shift or leave")
+
+    def handle(self, *args, **options):
+        shifts = Shift.objects.aggregate(first=Min("date"), last=Max("date"))
+        leaves = Leave.objects.aggregate(first=Min("date"), last=Max("date"))
+        firsts = [d for d in (shifts["first"], leaves["first"]) if d]
+        lasts = [d for d in (shifts["last"], leaves["last"]) if d]
+
+        start = options["start"] or (min(firsts) if firsts else date.today())
+        end = options["end"] or (max(lasts) if lasts else date.today())
+        rows = rebuild_ledger(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} ledger rows from {start} to {end}"))
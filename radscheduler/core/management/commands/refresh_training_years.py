@@ -0,0 +1,13 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from radscheduler.core.models import Registrar
+
+
+class Command(BaseCommand):
+    help = "Refresh the stored training year of every registrar. Run once a day."
+
+    def handle(self, *args, **options):
+        updated = Registrar.objects.refresh_training_years(date.today())
+        self.stdout.write(self.style.SUCCESS(f"Updated training year of {updated} registrars"))
@@ -0,0 +1,156 @@
+"""
+Per-view request metrics and query budgets.
+
+`MetricsMiddleware` records the query count, database time, connection wait, template
+render time and total latency of every request. They are sent back as a Server-Timing header and kept
+in a rolling in-process histogram per view (see `view_metrics.snapshot()`).
+
+Views declare the most queries they may run with `@query_budget(n)`, or through the
+`QUERY_BUDGETS` setting for views we do not own (admin, API). Over budget is logged,
+and raises when `QUERY_BUDGET_RAISE` is set, as it is in the test settings.
+"""
+
+import statistics
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.template.base import Template
+
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+WINDOW = 500  # requests kept per view
+
+# Transaction bookkeeping from ATOMIC_REQUESTS, not counted towards the budget
+_SAVEPOINT_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(queries: int):
+    """
+    Declare the most database queries a view may run per request.
+    """
+
+    def decorator(view):
+        view.query_budget = queries
+        return view
+
+    return decorator
+
+
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    db: float = 0.0  # seconds
+    pool_wait: float = 0.0  # seconds getting a connection, see `db_backend.base.DatabaseWrapper`
+    template: float = 0.0  # seconds
+    total: float = 0.0  # seconds
+    _template_depth: int = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            if not sql.lstrip().upper().startswith(_SAVEPOINT_PREFIXES):
+                self.queries += 1
+
+    def server_timing(self) -> str:
+        return (
+            f'db;desc="{self.queries} queries";dur={self.db * 1000:.1f}, pool;dur={self.pool_wait * 1000:.1f}, '
+            f"tpl;dur={self.template * 1000:.1f}, app;dur={self.total * 1000:.1f}"
+        )
+
+
+current_metrics: ContextVar[RequestMetrics | None] = ContextVar("current_metrics", default=None)
+
+
+def instrument_templates():
+    """
+    Time template rendering. Only the outermost render is timed, so includes are not counted twice.
+    """
+    original = Template.render
+    if getattr(original, "instrumented", False):
+        return
+
+    def render(self, context):
+        metrics = current_metrics.get()
+        if metrics is None or metrics._template_depth:
+            return original(self, context)
+
+        metrics._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics.template += time.perf_counter() - started
+            metrics._template_depth -= 1
+
+    render.instrumented = True
+    Template.render = render
+
+
+class ViewMetrics:
+    """
+    Rolling window of the latest requests to each view.
+    """
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, view: str, metrics: RequestMetrics):
+        with self._lock:
+            samples = self._samples.setdefault(view, deque(maxlen=self.window))
+            samples.append(
+                (
+                    metrics.total * 1000,
+                    metrics.db * 1000,
+                    metrics.pool_wait * 1000,
+                    metrics.template * 1000,
+                    metrics.queries,
+                )
+            )
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = {view: list(view_samples) for view, view_samples in self._samples.items()}
+
+        result = {}
+        for view, view_samples in sorted(samples.items()):
+            total, db, pool_wait, template, queries = zip(*view_samples)
+            latencies = sorted(total)
+            histogram = {f"le_{bucket}": sum(1 for t in latencies if t <= bucket) for bucket in LATENCY_BUCKETS_MS}
+            histogram["le_inf"] = len(latencies)
+            result[view] = {
+                "requests": len(latencies),
+                "p50_ms": round(_percentile(latencies, 50), 1),
+                "p95_ms": round(_percentile(latencies, 95), 1),
+                "mean_db_ms": round(statistics.fmean(db), 1),
+                "mean_pool_wait_ms": round(statistics.fmean(pool_wait), 1),
+                "max_pool_wait_ms": round(max(pool_wait), 1),
+                "mean_template_ms": round(statistics.fmean(template), 1),
+                "mean_queries": round(statistics.fmean(queries), 1),
+                "max_queries": max(queries),
+                "histogram": histogram,
+            }
+        return result
+
+
+def _percentile(latencies: list[float], pct: int) -> float:
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method="inclusive")[pct - 1]
+
+
+view_metrics = ViewMetrics()
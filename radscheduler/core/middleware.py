@@ -0,0 +1,67 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from radscheduler.core.metrics import (
+    QueryBudgetExceeded,
+    RequestMetrics,
+    current_metrics,
+    instrument_templates,
+    view_metrics,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Record query count, database time, connection wait, template time and total latency of each
+    request.
+
+    They are returned as a Server-Timing header, `pool` being the wait for a database connection:
+
+        Server-Timing: db;desc="7 queries";dur=4.2, pool;dur=0.3, tpl;dur=12.0, app;dur=35.1
+
+    and recorded per view in `metrics.view_metrics`. Queries run while a streaming
+    response is consumed, after the view returns, are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Every database, read-only views may query the replica
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        metrics.total = time.perf_counter() - started
+
+        response["Server-Timing"] = metrics.server_timing()
+        match = request.resolver_match
+        if match is not None:
+            view_metrics.record(match.view_name or match.route, metrics)
+            self.check_budget(match, metrics)
+        return response
+
+    def check_budget(self, match, metrics: RequestMetrics):
+        budget = getattr(match.func, "query_budget", None)
+        if budget is None:
+            budget = settings.QUERY_BUDGETS.get(match.view_name)
+        if budget is None or metrics.queries <= budget:
+            return
+
+        message = f"{match.view_name or match.route} ran {metrics.queries} queries, over its budget of {budget}"
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
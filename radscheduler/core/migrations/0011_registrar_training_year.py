@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:53
+
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_training_year(apps, schema_editor):
+    Registrar = apps.get_model("core", "Registrar")
+    registrars = list(Registrar.objects.exclude(start=None))
+    for registrar in registrars:
+        registrar.training_year = ((date.today() - registrar.start).days // 365) + 1
+    Registrar.objects.bulk_update(registrars, ["training_year"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_leave_core_leave_registr_440c22_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrar',
+            name='training_year',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, help_text='Year of training, refreshed daily', verbose_name='training year'),
+        ),
+        migrations.RunPython(populate_training_year, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='registrar',
+            index=models.Index(fields=['-training_year', 'id'], name='core_regist_trainin_6e3ce1_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_registrar_training_year'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkloadLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField(verbose_name='week starting')),
+                ('long', models.PositiveSmallIntegerField(default=0)),
+                ('weekend', models.PositiveSmallIntegerField(default=0)),
+                ('night', models.PositiveSmallIntegerField(default=0)),
+                ('weekend_night', models.PositiveSmallIntegerField(default=0)),
+                ('rdo', models.PositiveSmallIntegerField(default=0)),
+                ('sleep', models.PositiveSmallIntegerField(default=0)),
+                ('extra_duty', models.PositiveSmallIntegerField(default=0)),
+                ('shift_fatigue', models.FloatField(default=0.0)),
+                ('leave_fatigue', models.FloatField(default=0.0)),
+                ('last_edited', models.DateTimeField(auto_now=True)),
+                ('registrar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workload', to='core.registrar')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['week'], name='core_worklo_week_ff5731_idx')],
+                'unique_together': {('registrar', 'week')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_workloadledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RosterRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateField()),
+                ('end', models.DateField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('duration', models.FloatField(default=0.0, verbose_name='duration (s)')),
+                ('timings', models.JSONField(default=dict)),
+                ('counters', models.JSONField(default=dict)),
+                ('profile', models.FileField(blank=True, upload_to='roster_profiles/')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_rosterrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SwapRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('PENDING', 'Pending'), ('ACCEPTED', 'Accepted'), ('DECLINED', 'Declined'), ('CANCELLED', 'Cancelled')], default='PENDING', max_length=10)),
+                ('comment', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_edited', models.DateTimeField(auto_now=True)),
+                ('counter_shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swaps_requested', to='core.shift')),
+                ('counterpart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swaps_received', to='core.registrar')),
+                ('proposer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swaps_proposed', to='core.registrar')),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swaps_offered', to='core.shift')),
+            ],
+            options={
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['counterpart', 'state'], name='core_swapre_counter_aab566_idx'), models.Index(fields=['proposer', 'state'], name='core_swapre_propose_f83158_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:16
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_shifts(apps, schema_editor):
+    """
+    Merge the shifts of a slot that have the same registrar, moving their interests and swaps to the
+    one kept. Shifts of a slot with different registrars are distinct, and moved to new series.
+    """
+    Shift = apps.get_model("core", "Shift")
+    ShiftInterest = apps.get_model("core", "ShiftInterest")
+    SwapRequest = apps.get_model("core", "SwapRequest")
+
+    slots = Shift.objects.values("date", "type", "series").annotate(count=Count("id")).filter(count__gt=1)
+    for slot in slots:
+        same_type = Shift.objects.filter(date=slot["date"], type=slot["type"])
+        shifts = same_type.filter(series=slot["series"]).order_by("-last_edited", "id")
+        taken = set(same_type.values_list("series", flat=True))
+        kept = {}
+        for shift in shifts:
+            key = (shift.registrar_id, shift.extra_duty)
+            if key in kept:
+                keep = kept[key]
+                interested = keep.interests.values_list("registrar_id", flat=True)
+                ShiftInterest.objects.filter(shift=shift).exclude(registrar_id__in=interested).update(shift=keep)
+                SwapRequest.objects.filter(shift=shift).update(shift=keep)
+                SwapRequest.objects.filter(counter_shift=shift).update(counter_shift=keep)
+                shift.delete()
+                continue
+            if kept:
+                shift.series = max(taken) + 1
+                taken.add(shift.series)
+                shift.save(update_fields=["series"])
+            kept[key] = shift
+
+
+def merge_duplicate_statuses(apps, schema_editor):
+    """
+    Keep the longest of the statuses of a registrar with the same type and start.
+    """
+    Status = apps.get_model("core", "Status")
+
+    duplicates = Status.objects.values("registrar", "type", "start").annotate(count=Count("id")).filter(count__gt=1)
+    for duplicate in duplicates:
+        statuses = Status.objects.filter(
+            registrar_id=duplicate["registrar"], type=duplicate["type"], start=duplicate["start"]
+        ).order_by("-end", "-last_edited", "id")
+        Status.objects.filter(pk__in=[status.pk for status in statuses[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_printjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_shifts, migrations.RunPython.noop),
+        migrations.RunPython(merge_duplicate_statuses, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='shift',
+            constraint=models.UniqueConstraint(fields=('date', 'type', 'series'), name='unique_shift_slot'),
+        ),
+        migrations.AddConstraint(
+            model_name='status',
+            constraint=models.UniqueConstraint(fields=('registrar', 'type', 'start'), name='unique_status_start'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:21
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_unique_slots'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='status',
+            name='core_status_registr_c6cd49_idx',
+        ),
+        migrations.AddField(
+            model_name='status',
+            name='period',
+            field=models.GeneratedField(db_persist=True, expression=models.Func('start', 'end', models.Value('[]'), function='daterange'), output_field=django.contrib.postgres.fields.ranges.DateRangeField()),
+        ),
+        migrations.AddIndex(
+            model_name='status',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['period'], name='core_status_period_e61766_gist'),
+        ),
+    ]
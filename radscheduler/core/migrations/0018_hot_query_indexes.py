@@ -0,0 +1,83 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_status_period'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='leave',
+            name='core_leave_registr_440c22_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='leave',
+            name='core_leave_cancell_943dfb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='leave',
+            name='core_leave_cancell_a9e654_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shift',
+            name='core_shift_registr_1f9c84_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shift',
+            name='core_shift_type_fa042c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shift',
+            name='core_shift_extra_d_02a0a1_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shift',
+            name='core_shift_date_890e90_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shiftinterest',
+            name='core_shifti_shift_i_3c6658_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shiftinterest',
+            name='core_shifti_registr_1eb2f8_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shiftinterest',
+            name='core_shifti_shift_i_b36418_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='status',
+            name='core_status_registr_c333a0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='status',
+            name='core_status_type_629bb7_idx',
+        ),
+        migrations.AlterField(
+            model_name='leave',
+            name='date',
+            field=models.DateField(verbose_name='date of leave'),
+        ),
+        migrations.AlterField(
+            model_name='shift',
+            name='date',
+            field=models.DateField(verbose_name='shift date'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(condition=models.Q(('cancelled', False)), fields=['date'], include=('id', 'registrar', 'type', 'portion'), name='core_leave_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(condition=models.Q(('registrar__isnull', False)), fields=['date'], include=('id', 'registrar', 'type', 'extra_duty'), name='core_shift_rostered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(condition=models.Q(('extra_duty', True)), fields=['date'], name='core_shift_extra_duty_idx'),
+        ),
+    ]
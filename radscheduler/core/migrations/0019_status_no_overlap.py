@@ -0,0 +1,50 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:20
+
+from itertools import groupby
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+def check_overlapping_statuses(apps, schema_editor):
+    """
+    Fail, listing them, if a registrar has overlapping statuses of the same type, weekdays and shift
+    types, which the constraint excludes. They are left for an admin to resolve.
+    """
+    Status = apps.get_model("core", "Status")
+
+    def conflict(status):
+        return status.registrar_id, status.type, status.weekdays, status.shift_types
+
+    conflicts = []
+    statuses = Status.objects.order_by("registrar", "type", "weekdays", "shift_types", "start", "id")
+    for _, group in groupby(statuses, key=conflict):
+        latest = None
+        for status in group:
+            if latest is not None and status.start <= latest.end:
+                conflicts.append(
+                    f"status {status.pk} ({status.start} to {status.end}) overlaps status {latest.pk} "
+                    f"({latest.start} to {latest.end}) of registrar {status.registrar_id}, type {status.type}"
+                )
+            if latest is None or status.end > latest.end:
+                latest = status
+    if conflicts:
+        raise RuntimeError("Resolve the overlapping statuses before migrating:\n" + "\n".join(conflicts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_overlapping_statuses, migrations.RunPython.noop),
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name='status',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('registrar', '='), ('type', '='), (models.Func('weekdays', function='hash_array', output_field=models.IntegerField()), '='), (models.Func('shift_types', function='hash_array', output_field=models.IntegerField()), '='), (models.Func('start', 'end', models.Value('[]'), function='daterange', output_field=django.contrib.postgres.fields.ranges.DateRangeField()), '&&')], name='core_status_no_overlap', violation_error_message='The registrar already has a status of this type for these days and dates.'),
+        ),
+    ]
@@ -1,27 +1,38 @@
 from datetime import date
 
-from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import ArrayField, DateRangeField, RangeOperators
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
-from django.db.models import ExpressionWrapper, F, IntegerField, Value
-from django.db.models.functions import ExtractYear, Now
+from django.db.backends.postgresql.psycopg_any import DateRange
 
 from radscheduler import roster
 from radscheduler.users.models import User
 
 
-class RegistrarQuerySet(models.QuerySet):
-    def annotate_year(self):
-        # year = ExtractYear(now) - ExtractYear(start) + 1
-        expr = ExpressionWrapper(
-            ExtractYear(Now()) - ExtractYear(F("start")) + Value(1),
-            output_field=IntegerField(),
-        )
-        return self.annotate(year=expr)
+def training_year(start: date, today: date = None) -> int:
+    """
+    Year of training a registrar is in, counting from 1 on their start date.
+    """
+    today = today or date.today()
+    return ((today - start).days // 365) + 1
 
 
-class RegistrarManager(models.Manager):
-    def get_queryset(self):
-        return RegistrarQuerySet(self.model, using=self._db).annotate_year()
+class RegistrarQuerySet(models.QuerySet):
+    def refresh_training_years(self, today: date = None) -> int:
+        """
+        Recompute the stored `training_year` as of TODAY.
+
+        The training year only changes once a day, so this is run by the daily
+        `refresh_training_years` job. Returns the number of registrars updated.
+        """
+        changed = []
+        for registrar in self.exclude(start=None).only("id", "start", "training_year"):
+            year = training_year(registrar.start, today)
+            if registrar.training_year != year:
+                registrar.training_year = year
+                changed.append(registrar)
+        return self.model.objects.bulk_update(changed, ["training_year"])
 
 
 class Registrar(models.Model):
@@ -31,11 +42,16 @@ class Registrar(models.Model):
     finish = models.DateField(
         "finish date", null=True, blank=True, help_text="Date finished training"
     )
+    training_year = models.PositiveSmallIntegerField(
+        "training year",
+        default=1,
+        editable=False,
+        help_text="Year of training, refreshed daily",
+    )
     created = models.DateTimeField(auto_now_add=True)
     last_edited = models.DateTimeField(auto_now=True)
 
-    # Use a manager that annotates `year` by default on querysets
-    objects = RegistrarManager()
+    objects = RegistrarQuerySet.as_manager()
 
     def __repr__(self) -> str:
         return f"<Registrar: {self.user.username}>"
@@ -43,18 +59,33 @@ class Registrar(models.Model):
     def __str__(self) -> str:
         return self.user.username
 
-    # `year` is provided via a default queryset annotation.
-    # If you need the exact value for a single instance outside a queryset,
-    # call `Registrar.compute_year()`.
+    def save(self, *args, **kwargs):
+        if self.start is not None:
+            self.training_year = training_year(self.start)
+        super().save(*args, **kwargs)
+
+    # `year` reads the stored `training_year`, which is kept up to date on save and by the daily job.
+    # Unsaved instances compute it on the fly. Without a start date the year is unknown (None).
+    @property
+    def year(self):
+        if self.pk is None or self.start is None:
+            return self.compute_year()
+        return self.training_year
+
     def compute_year(self):
         if self.start is None:
             return None
 
-        return ((date.today() - self.start).days // 365) + 1
+        return training_year(self.start)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-training_year", "id"]),
+        ]
 
 
 class Shift(models.Model):
-    date = models.DateField("shift date", db_index=True)
+    date = models.DateField("shift date")
     type = models.CharField(
         "shift type", max_length=10, choices=roster.ShiftType.choices
     )
@@ -77,15 +108,38 @@ class Shift(models.Model):
         return f"<{roster.ShiftType(self.type).name} Shift {self.date} ({roster.Weekday(self.date.weekday()).name}): {registrar}>"
 
     class Meta:
+        constraints = [
+            # One shift per slot, extra duties are in their own series
+            models.UniqueConstraint(
+                fields=["date", "type", "series"], name="unique_shift_slot"
+            ),
+        ]
+        # Date range scans use the slot index, and the partial indexes of the hot queries
+        # (see `query_plans`)
         indexes = [
-            models.Index(fields=["registrar"]),
-            models.Index(fields=["type"]),
-            models.Index(fields=["extra_duty"]),
-            models.Index(fields=["date", "type"]),
             models.Index(fields=["registrar", "date"]),
+            models.Index(
+                fields=["date"],
+                include=["id", "registrar", "type", "extra_duty"],
+                condition=models.Q(registrar__isnull=False),
+                name="core_shift_rostered_idx",
+            ),
+            models.Index(
+                fields=["date"],
+                condition=models.Q(extra_duty=True),
+                name="core_shift_extra_duty_idx",
+            ),
         ]
 
 
+class StatusQuerySet(models.QuerySet):
+    def overlapping(self, start: date, end: date):
+        """
+        Statuses overlapping START to END, both included, found with the GiST index on `period`.
+        """
+        return self.filter(period__overlap=DateRange(start, end, "[]"))
+
+
 class Status(models.Model):
     """
     Given a date range, a registrar can be assigned a status.
@@ -99,6 +153,14 @@ class Status(models.Model):
 
     start = models.DateField("start date")
     end = models.DateField("end date")
+    # START to END as a range, for the overlap (&&) lookups of `StatusQuerySet.overlapping`
+    period = models.GeneratedField(
+        expression=models.Func(
+            "start", "end", models.Value("[]"), function="daterange"
+        ),
+        output_field=DateRangeField(),
+        db_persist=True,
+    )
     type = models.CharField(choices=roster.StatusType.choices, max_length=10)
     registrar = models.ForeignKey(
         Registrar, blank=False, null=False, on_delete=models.CASCADE
@@ -119,15 +181,59 @@ class Status(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     last_edited = models.DateTimeField(auto_now=True)
 
+    objects = StatusQuerySet.as_manager()
+
     def __repr__(self) -> str:
         return f"<Status: {self.registrar} {self.start}--{self.end} ({roster.StatusType(self.type).label})>"
 
     class Meta:
         verbose_name_plural = "statuses"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["registrar", "type", "start"], name="unique_status_start"
+            ),
+            # Statuses of a type only conflict when they restrict the same days and shifts: a part time
+            # "no nights" for a year may overlap a part time "Fridays" for a term. GiST has no array
+            # equality, so the arrays compare by `hash_array`. The equality operators on the other
+            # columns need the btree_gist extension. The range is built from start and end, not `period`,
+            # so that forms editing them validate the constraint.
+            ExclusionConstraint(
+                name="core_status_no_overlap",
+                expressions=[
+                    ("registrar", RangeOperators.EQUAL),
+                    ("type", RangeOperators.EQUAL),
+                    (
+                        models.Func(
+                            "weekdays",
+                            function="hash_array",
+                            output_field=models.IntegerField(),
+                        ),
+                        RangeOperators.EQUAL,
+                    ),
+                    (
+                        models.Func(
+                            "shift_types",
+                            function="hash_array",
+                            output_field=models.IntegerField(),
+                        ),
+                        RangeOperators.EQUAL,
+                    ),
+                    (
+                        models.Func(
+                            "start",
+                            "end",
+                            models.Value("[]"),
+                            function="daterange",
+                            output_field=DateRangeField(),
+                        ),
+                        RangeOperators.OVERLAPS,
+                    ),
+                ],
+                violation_error_message="The registrar already has a status of this type for these days and dates.",
+            ),
+        ]
         indexes = [
-            models.Index(fields=["registrar"]),
-            models.Index(fields=["registrar", "start", "end"]),
-            models.Index(fields=["type"]),
+            GistIndex(fields=["period"]),
         ]
 
 
@@ -135,7 +241,7 @@ class Leave(models.Model):
     registrar = models.ForeignKey(
         Registrar, blank=False, null=False, on_delete=models.CASCADE
     )
-    date = models.DateField("date of leave", db_index=True)
+    date = models.DateField("date of leave")
     type = models.CharField(choices=roster.LeaveType.choices, max_length=10)
     portion = models.CharField(
         "portion of day",
@@ -183,10 +289,13 @@ class Leave(models.Model):
     class Meta:
         unique_together = ["date", "registrar"]
         indexes = [
-            models.Index(fields=["registrar"]),
-            models.Index(fields=["cancelled"]),
             models.Index(fields=["registrar", "date"]),
-            models.Index(fields=["cancelled", "reg_approved", "dot_approved"]),
+            models.Index(
+                fields=["date"],
+                include=["id", "registrar", "type", "portion"],
+                condition=models.Q(cancelled=False),
+                name="core_leave_active_idx",
+            ),
         ]
 
 
@@ -215,13 +324,147 @@ class ShiftInterest(models.Model):
     class Meta:
         unique_together = ["shift", "registrar"]
         verbose_name_plural = "shift interests"
+
+
+class SwapRequest(models.Model):
+    """
+    A registrar's proposal to exchange one of their shifts for a shift of another registrar.
+
+    Each side is the first shift of a block (see `AutoAssigner.coupled_shifts`), the rest
+    of its block is swapped along with it. See `swaps` for the checks and how it is applied.
+    """
+
+    class State(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        ACCEPTED = "ACCEPTED", "Accepted"
+        DECLINED = "DECLINED", "Declined"
+        CANCELLED = "CANCELLED", "Cancelled"
+
+    shift = models.ForeignKey(
+        Shift, on_delete=models.CASCADE, related_name="swaps_offered"
+    )
+    counter_shift = models.ForeignKey(
+        Shift, on_delete=models.CASCADE, related_name="swaps_requested"
+    )
+    proposer = models.ForeignKey(
+        Registrar, on_delete=models.CASCADE, related_name="swaps_proposed"
+    )
+    counterpart = models.ForeignKey(
+        Registrar, on_delete=models.CASCADE, related_name="swaps_received"
+    )
+    state = models.CharField(
+        max_length=10, choices=State.choices, default=State.PENDING
+    )
+    comment = models.TextField(blank=True)
+
+    created = models.DateTimeField(auto_now_add=True)
+    last_edited = models.DateTimeField(auto_now=True)
+
+    def __repr__(self) -> str:
+        return f"<SwapRequest: {self.shift_id} <-> {self.counter_shift_id} ({self.state})>"
+
+    class Meta:
+        ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["counterpart", "state"]),
+            models.Index(fields=["proposer", "state"]),
+        ]
+
+
+class PrintJob(models.Model):
+    """
+    A batch of leave forms printed in the background, see `paper_forms.jobs`.
+    """
+
+    class State(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    leaves = models.ManyToManyField(Leave, related_name="print_jobs")
+    requested_by = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, related_name="print_jobs"
+    )
+    state = models.CharField(
+        max_length=10, choices=State.choices, default=State.QUEUED
+    )
+    file = models.FileField(upload_to="print_jobs/", blank=True)
+    error = models.TextField(blank=True)
+
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    last_edited = models.DateTimeField(auto_now=True)
+
+    def __repr__(self) -> str:
+        return f"<PrintJob: {self.pk} ({self.state})>"
+
+    def __str__(self):
+        return f"Print job {self.pk}"
+
+    class Meta:
+        ordering = ["-created"]
+        indexes = [models.Index(fields=["state", "created"])]
+
+
+class WorkloadLedger(models.Model):
+    """
+    Pre-aggregated workload of a registrar for one week (starting on Monday).
+
+    Rows are kept up to date by the Shift and Leave signals in `core.signals`.
+    Bulk paths that bypass signals should call `ledger.rebuild_ledger()`.
+    Extra duty shifts are counted separately and do not add to the fatigue.
+    """
+
+    registrar = models.ForeignKey(
+        Registrar, on_delete=models.CASCADE, related_name="workload"
+    )
+    week = models.DateField("week starting")
+
+    long = models.PositiveSmallIntegerField(default=0)
+    weekend = models.PositiveSmallIntegerField(default=0)
+    night = models.PositiveSmallIntegerField(default=0)
+    weekend_night = models.PositiveSmallIntegerField(default=0)
+    rdo = models.PositiveSmallIntegerField(default=0)
+    sleep = models.PositiveSmallIntegerField(default=0)
+    extra_duty = models.PositiveSmallIntegerField(default=0)
+    shift_fatigue = models.FloatField(default=0.0)
+    leave_fatigue = models.FloatField(default=0.0)
+
+    last_edited = models.DateTimeField(auto_now=True)
+
+    def __repr__(self) -> str:
+        return f"<WorkloadLedger: {self.registrar_id} {self.week}>"
+
+    class Meta:
+        unique_together = ["registrar", "week"]
         indexes = [
-            models.Index(fields=["shift"]),
-            models.Index(fields=["registrar"]),
-            models.Index(fields=["shift", "registrar"]),
+            models.Index(fields=["week"]),
         ]
 
 
+class RosterRun(models.Model):
+    """
+    Stage timings and counters of one `fill_shifts` run, recorded by `profiling.record_fill_shifts`.
+
+    `profile` holds a cProfile dump when the run was profiled, readable with `pstats` or snakeviz.
+    """
+
+    start = models.DateField()
+    end = models.DateField()
+    created = models.DateTimeField(auto_now_add=True)
+    duration = models.FloatField("duration (s)", default=0.0)
+    timings = models.JSONField(default=dict)
+    counters = models.JSONField(default=dict)
+    profile = models.FileField(upload_to="roster_profiles/", blank=True)
+
+    def __repr__(self) -> str:
+        return f"<RosterRun: {self.start} - {self.end} ({self.duration:.2f}s)>"
+
+    class Meta:
+        ordering = ["-created"]
+
+
 class Settings(models.Model):
     """
     Global settings for the application.
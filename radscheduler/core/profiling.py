@@ -0,0 +1,46 @@
+"""
+Recorded and optionally profiled roster generation runs.
+"""
+
+import cProfile
+import marshal
+import time
+from datetime import date
+
+from django.core.files.base import ContentFile
+
+from radscheduler.core import service
+from radscheduler.core.models import RosterRun
+from radscheduler.roster import RunStats
+
+
+def record_fill_shifts(start: date, end: date, profile: bool = False) -> tuple[RosterRun, list]:
+    """
+    Run `service.fill_shifts` and record its stage timings and counters as a `RosterRun`.
+
+    With `profile`, the run is captured with cProfile and the dump is attached to the record.
+    Returns the record and the filled shifts.
+    """
+    stats = RunStats()
+    profiler = cProfile.Profile() if profile else None
+
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        shifts = service.fill_shifts(start, end, stats=stats)
+    finally:
+        if profiler:
+            profiler.disable()
+    duration = time.perf_counter() - started
+
+    summary = stats.summary()
+    run = RosterRun(start=start, end=end, duration=duration, timings=summary["timings"], counters=summary["counters"])
+    if profiler:
+        profiler.create_stats()
+        # Same format as `Profile.dump_stats`
+        run.profile.save(
+            f"fill_shifts-{start:%Y%m%d}-{end:%Y%m%d}.prof", ContentFile(marshal.dumps(profiler.stats)), save=False
+        )
+    run.save()
+    return run, shifts
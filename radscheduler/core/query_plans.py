@@ -0,0 +1,97 @@
+"""
+The hot queries of the roster and their plans.
+
+Each query is the shape of the busiest reads (the calendar API, the iCal feeds, the extra duty pages and
+the leave printing filter) over the window they typically ask for, with the partial index meant to
+serve it. `explain_queries` prints their plans on a real database, and the tests check the planner can
+still use the indexes.
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+
+from radscheduler.core.models import Leave, Shift
+
+CALENDAR_WINDOW = timedelta(weeks=6)  # a month view with the days around it
+
+
+def feed_window(today: date) -> list[date]:
+    """
+    The window of the iCal feeds, see `ical.StreamingICalFeed.window`.
+    """
+    return [today - timedelta(days=settings.ICAL_HISTORY_DAYS), today + timedelta(days=settings.ICAL_HORIZON_DAYS)]
+
+
+@dataclass
+class HotQuery:
+    name: str
+    queryset: Callable[[date], QuerySet]  # of today
+    index: str  # expected in the plan
+
+    def explain(self, today: date = None, analyze=False) -> str:
+        return self.queryset(today or date.today()).explain(analyze=analyze)
+
+
+HOT_QUERIES = [
+    HotQuery(
+        "calendar shifts",
+        lambda today: Shift.objects.filter(
+            date__gte=today, date__lte=today + CALENDAR_WINDOW, registrar__isnull=False
+        ).select_related("registrar", "registrar__user"),
+        "core_shift_rostered_idx",
+    ),
+    HotQuery(
+        "shift feed",
+        lambda today: Shift.objects.filter(date__range=feed_window(today), registrar__isnull=False).only(
+            "id", "date", "type", "extra_duty", "registrar_id"
+        ),
+        "core_shift_rostered_idx",
+    ),
+    HotQuery(
+        "extra duties",
+        lambda today: Shift.objects.filter(extra_duty=True, date__gte=today - timedelta(days=30)).order_by("-date"),
+        "core_shift_extra_duty_idx",
+    ),
+    HotQuery(
+        "calendar leaves",
+        lambda today: Leave.objects.filter(date__gte=today, date__lte=today + CALENDAR_WINDOW, cancelled=False)
+        .exclude(Q(reg_approved=False) | Q(dot_approved=False))
+        .select_related("registrar", "registrar__user"),
+        "core_leave_active_idx",
+    ),
+    HotQuery(
+        "leave feed",
+        lambda today: Leave.objects.filter(date__range=feed_window(today), cancelled=False).only(
+            "id", "date", "type", "portion", "registrar_id"
+        ),
+        "core_leave_active_idx",
+    ),
+    HotQuery(
+        "leaves to print",
+        lambda today: Leave.objects.filter(
+            date__gte=today,
+            date__lte=today + timedelta(weeks=6),
+            dot_approved=True,
+            reg_approved=True,
+            cancelled=False,
+            printed=False,
+        ),
+        "core_leave_active_idx",
+    ),
+]
+
+
+def forced_plans(today: date = None) -> dict[str, str]:
+    """
+    The plan of each hot query with sequential scans disabled, as on a database too small for the
+    planner to prefer an index. The plans show whether the indexes match the queries at all.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return {query.name: query.explain(today) for query in HOT_QUERIES}
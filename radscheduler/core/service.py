@@ -1,27 +1,35 @@
+import dataclasses
+import logging
 from collections import defaultdict
 from datetime import date, timedelta
 
-from django.db import IntegrityError
-from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
-from django.db.models.functions import Now
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
 from pandas import DataFrame, concat
 
-from radscheduler.core import domain_mapper
+from radscheduler.core import analytics, domain_mapper, ledger
 from radscheduler.core.models import Leave, Registrar, Shift, Status
+from radscheduler.core.simulation import RosterSnapshot
 from radscheduler.roster import (
     LeaveType,
+    RunStats,
     ShiftType,
     SingleOnCallRoster,
     StatusType,
-    Weekday,
     canterbury_holidays,
 )
+from radscheduler.roster import models as domain
 from radscheduler.roster.assigner import AutoAssigner
 from radscheduler.roster.generator import generate_shifts, merge_shifts
 from radscheduler.roster.models import DetailedShiftType
 from radscheduler.roster.utils import daterange, filter_shifts_by_date_range
 from radscheduler.roster.validators import validate_roster
 
+logger = logging.getLogger(__name__)
+
+REROSTER_MARGIN = timedelta(weeks=3)  # of the roster around the refilled shifts, for the validator and fatigue
+
 
 def calculate_3_week_range(someday: date):
     """
@@ -44,7 +52,7 @@ def _merge_shifts_and_leaves(shifts, leaves, active_registrars):
     regs_qs = (
         Registrar.objects.filter(id__in=needed_registrars_ids)
         .select_related("user")
-        .order_by("-year", "user__username")
+        .order_by("-training_year", "user__username")
     )
     registrars = {reg.id: reg for reg in regs_qs}
 
@@ -97,9 +105,7 @@ def get_active_registrars(start: date = None, end: date = None):
     """
     if not (start and end):
         start, end = default_start_and_end(start, end)
-    registrars = Registrar.objects.exclude(start=None).annotate(
-        days=(Now() - F("start"))
-    )
+    registrars = Registrar.objects.exclude(start=None)
     registrars = registrars.exclude(Q(finish__lt=start) | Q(start__gt=end))
     registrars = registrars.order_by("user__username")
     registrars = registrars.select_related("user")
@@ -129,9 +135,7 @@ def active_and_available_registrars(day):
 
 def build_registrar_table(registrars):
     df_registrars = DataFrame(registrars)
-    df_registrars["year"] = df_registrars.days.dt.days // 365 + 1
-    df_registrars.drop(["days"], axis=1, inplace=True)
-    df_registrars.rename(columns={"user__username": "username"}, inplace=True)
+    df_registrars.rename(columns={"user__username": "username", "training_year": "year"}, inplace=True)
     return df_registrars
 
 
@@ -170,12 +174,12 @@ def retrieve_roster(start: date = None, end: date = None):
     leaves = Leave.objects.filter(date__range=[start, end])
     leave_dict = {leave.id: domain_mapper.leave_to_dict(leave) for leave in leaves}
 
-    statuses = Status.objects.exclude(Q(end__lt=start) | Q(start__gt=end))
+    statuses = Status.objects.overlapping(start, end)
     status_dict = [domain_mapper.status_to_dict(status) for status in statuses]
 
     registrars = get_active_registrars(start, end)
     df_registrars = build_registrar_table(
-        registrars.values("id", "user__username", "days")
+        registrars.values("id", "user__username", "training_year")
     )
 
     pivot = build_pivot_table(
@@ -196,42 +200,195 @@ def retrieve_roster(start: date = None, end: date = None):
     return result
 
 
-def fill_shifts(start: date, end: date):
-    registrars = Registrar.objects.exclude(finish__lte=start).select_related("user")
-    registrars = list(map(domain_mapper.registrar_from_db, registrars))
+def fill_shifts(start: date, end: date, stats: RunStats = None):
+    """
+    Fill the unassigned shifts between `start` and `end`.
 
-    leaves = Leave.objects.filter(date__range=[start, end]).select_related(
-        "registrar", "registrar__user"
-    )
-    leaves = list(map(domain_mapper.leave_from_db, leaves))
+    Each stage is timed into `stats` when given, along with the assigner counters (see `roster.stats`).
+    Compliance violations of the filled roster are logged and kept in `stats.violations`.
+    """
+    stats = stats or RunStats()
+
+    with stats.stage("load"):
+        registrars = list(Registrar.objects.exclude(finish__lte=start).select_related("user"))
+        # Cancelled leaves are left out, as by the audit and the simulation snapshot
+        leaves = list(
+            Leave.objects.filter(date__range=[start, end], cancelled=False).select_related(
+                "registrar", "registrar__user"
+            )
+        )
+        statuses = list(
+            Status.objects.overlapping(start, end)
+            .annotate(username=F("registrar__user__username"))
+            .select_related("registrar", "registrar__user")
+        )
+        shifts_in_db = list(
+            Shift.objects.filter(date__range=[start, end]).select_related("registrar", "registrar__user")
+        )
+        ledger_fatigue = ledger.ledger_fatigue(start, end)
+
+    with stats.stage("map"):
+        registrars = list(map(domain_mapper.registrar_from_db, registrars))
+        leaves = list(map(domain_mapper.leave_from_db, leaves))
+        statuses = list(map(domain_mapper.status_from_db, statuses))
+        filled = list(map(domain_mapper.shift_from_db, shifts_in_db))
+
+    with stats.stage("generate"):
+        unfilled = generate_shifts(SingleOnCallRoster, start, end, filled)
+
+    with stats.stage("assign"):
+        assigner = AutoAssigner(
+            registrars=registrars,
+            unfilled=unfilled,
+            filled=filled,
+            leaves=leaves,
+            statuses=statuses,
+            ledger_fatigue=ledger_fatigue,
+            stats=stats,
+        )
+        result = assigner.fill_roster()
 
-    statuses = (
-        Status.objects.filter(Q(end__gte=start) | Q(start__lte=end))
-        .annotate(username=F("registrar__user__username"))
-        .select_related("registrar", "registrar__user")
-    )
-    statuses = list(map(domain_mapper.status_from_db, statuses))
+    with stats.stage("validate"):
+        stats.violations = validate_roster(result, leaves, statuses)
+    for violation in stats.violations:
+        logger.warning("Roster violation: %s", violation)
 
-    shifts_in_db = Shift.objects.filter(date__range=[start, end]).select_related(
-        "registrar", "registrar__user"
-    )
-    filled = list(map(domain_mapper.shift_from_db, shifts_in_db))
-    unfilled = generate_shifts(SingleOnCallRoster, start, end, filled)
-
-    assigner = AutoAssigner(
-        registrars=registrars,
-        unfilled=unfilled,
-        filled=filled,
-        leaves=leaves,
-        statuses=statuses,
-    )
-    result = assigner.fill_roster()
-    assert validate_roster(result, leaves, statuses)
-
-    result = filter_shifts_by_date_range(result, start, end)
+    with stats.stage("filter"):
+        result = filter_shifts_by_date_range(result, start, end)
     return result
 
 
+def reroster(registrar_id: int, start: date, end: date, stats: RunStats = None) -> list[domain.Shift]:
+    """
+    Refill the shifts of one registrar between `start` and `end`, e.g. after their sick leave was entered,
+    without regenerating the rest of the roster.
+
+    Only their shifts and the weekend/RDO and night/sleep blocks coupled to them are refilled
+    (see `AutoAssigner.coupled_shifts`), against the roster around them. The refilled shifts are saved
+    and returned, with `registrar` set to None where no one could be found.
+    """
+    stats = stats or RunStats()
+
+    with stats.stage("load"):
+        snapshot = RosterSnapshot.load(start - REROSTER_MARGIN, end + REROSTER_MARGIN)
+        ledger_fatigue = ledger.ledger_fatigue(snapshot.start, snapshot.end)
+
+    with stats.stage("generate"):
+        seeds = [s for s in snapshot.shifts if s.registrar.id == registrar_id and start <= s.date <= end]
+        affected = AutoAssigner.coupled_shifts(seeds, snapshot.shifts)
+        previous = {shift.id: shift.registrar.id for shift in affected}
+        # The baseline must not count the shifts being refilled against their current registrar
+        for shift in affected:
+            fatigue = SingleOnCallRoster.shift_fatigue(shift)
+            ledger_fatigue[shift.registrar.id] = ledger_fatigue.get(shift.registrar.id, 0.0) - fatigue
+        unfilled = [dataclasses.replace(shift, registrar=None) for shift in affected]
+        filled = [shift for shift in snapshot.shifts if shift.id not in previous]
+
+    if not affected:
+        return []
+
+    with stats.stage("assign"):
+        assigner = AutoAssigner(
+            registrars=list(snapshot.registrars.values()),
+            unfilled=unfilled,
+            filled=filled,
+            leaves=snapshot.leaves,
+            statuses=snapshot.statuses,
+            ledger_fatigue=ledger_fatigue,
+            stats=stats,
+        )
+        result = assigner.fill_roster()
+        refilled = [shift for shift in result if shift.id in previous]
+
+    with stats.stage("validate"):
+        first, last = refilled[0].date, refilled[-1].date
+        stats.violations = [
+            violation
+            for violation in validate_roster(result, snapshot.leaves, snapshot.statuses)
+            if any(first <= day <= last for day in violation.dates)
+        ]
+    for violation in stats.violations:
+        logger.warning("Roster violation: %s", violation)
+
+    with stats.stage("save"):
+        reassign_shifts(refilled, previous)
+    return refilled
+
+
+def reassign_shifts(shifts: list[domain.Shift], previous: dict[int, int]) -> int:
+    """
+    Save the registrars of SHIFTS, domain shifts from the database, where they differ from PREVIOUS
+    (registrar id by shift id), in one query. Returns the number of shifts changed.
+    """
+    now = timezone.now()
+    changed = [
+        Shift(pk=shift.id, registrar_id=shift.registrar.id if shift.registrar else None, last_edited=now)
+        for shift in shifts
+        if (shift.registrar.id if shift.registrar else None) != previous[shift.id]
+    ]
+    # bulk_update bypasses the signals, so the ledger is refreshed here
+    with transaction.atomic():
+        Shift.objects.bulk_update(changed, ["registrar", "last_edited"])
+        ledger.refresh_ledger(
+            {(previous[shift.id], shift.date) for shift in shifts}
+            | {(shift.registrar.id, shift.date) for shift in shifts if shift.registrar}
+        )
+    return len(changed)
+
+
+def save_roster(shifts: list[domain.Shift], batch_size: int = None) -> int:
+    """
+    Save SHIFTS into their slots (date, type and series) in one upsert on the unique slot index:
+    the shifts of empty slots are inserted, and taken slots get the registrar of their shift.
+    BATCH_SIZE splits the upsert for large rosters. The ids of SHIFTS are set and the ledger of
+    their weeks is refreshed. Returns the number of shifts saved.
+    """
+    if not shifts:
+        return 0
+    first = min(shift.date for shift in shifts)
+    last = max(shift.date for shift in shifts)
+    previous = {
+        (day, shift_type, series): registrar_id
+        for day, shift_type, series, registrar_id in Shift.objects.filter(
+            date__range=[first, last]
+        ).values_list("date", "type", "series", "registrar_id")
+    }
+    rows = [
+        Shift(
+            date=shift.date,
+            type=shift.type,
+            registrar_id=shift.registrar.id if shift.registrar else None,
+            stat_day=shift.stat_day,
+            extra_duty=shift.extra_duty,
+            fatigue_override=shift.fatigue_override,
+            series=shift.series,
+        )
+        for shift in shifts
+    ]
+    # bulk_create bypasses the signals, so the ledger is refreshed here
+    with transaction.atomic():
+        Shift.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["date", "type", "series"],
+            update_fields=[
+                "registrar",
+                "stat_day",
+                "extra_duty",
+                "fatigue_override",
+                "last_edited",
+            ],
+        )
+        ledger.refresh_ledger(
+            {(previous.get(shift.slot), shift.date) for shift in shifts}
+            | {(row.registrar_id, row.date) for row in rows}
+        )
+    for shift, row in zip(shifts, rows):
+        shift.id = row.pk
+    return len(rows)
+
+
 def group_shifts_by_date_and_type(start: date, end: date, shifts):
     """
     Group shifts by date and type. If the shift is outside the date range, it is ignored.
@@ -280,44 +437,15 @@ def shifts_breakdown(shifts):
     return result
 
 
-def retrieve_workload_breakdown(start: date = None, end: date = None):
-    start, end = default_start_and_end(start, end)
-
-    registrars = Registrar.objects.exclude(start=None)
-    shifts = Shift.objects.filter(
-        date__range=[start, end],
-        type__in=[ShiftType.LONG, ShiftType.NIGHT],
-        extra_duty=False,
-    ).annotate(
-        type_=Case(
-            When(
-                Q(type=ShiftType.LONG) & Q(date__iso_week_day__in=[Weekday.SAT, Weekday.SUN]),
-                then=Value("WEEKEND"),
-            ),
-            When(
-                Q(type=ShiftType.NIGHT)
-                & Q(
-                    date__iso_week_day__in=[
-                        Weekday.FRI,
-                        Weekday.SAT,
-                        Weekday.SUN,
-                    ]
-                ),
-                then=Value("WKD NIGHT"),
-            ),
-            default=F("type"),
-        )
-    )
+def retrieve_workload_breakdown(start: date = None, end: date = None, weights: dict = None):
+    """
+    Shift counts, fatigue scores, rolling windows and rankings per registrar, read from the weekly
+    workload ledger.
 
-    df_registrars = DataFrame(registrars.values("id", "username"))
-    df_shifts = DataFrame(shifts.values("registrar", "type_"))
-    workload = df_shifts.groupby(["registrar", "type_"]).size().unstack().fillna(0)
-    workload["FATIGUE"] = (
-        workload["LONG"] * 1 + workload["NIGHT"] * 7 + workload["WEEKEND"] * 4 + workload["WKD NIGHT"] * 5
-    )
-    workload = workload.merge(df_registrars, left_index=True, right_on="id", how="left")
-    workload.drop(["id"], axis=1, inplace=True)
-    return workload
+    See `analytics.WorkloadAnalytics.summary` for the columns.
+    """
+    start, end = default_start_and_end(start, end)
+    return analytics.workload_summary(start, end, weights).reset_index(drop=True)
 
 
 def generate_buddy_shifts(start, end):
@@ -330,11 +458,3 @@ def save_assignments(assignments):
 
 def assign_reg_to_shift(shift, registrar):
     pass
-
-
-def swap_shifts(shift, registrar):
-    try:
-        shift.registrar = registrar
-        shift.save()
-    except IntegrityError:
-        conflict_shift = Shift.objects.get(date=shift.date, type=shift.type, registrar=registrar)
@@ -0,0 +1,38 @@
+"""
+Keep the weekly workload ledger in sync with shifts and leaves.
+"""
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from radscheduler.core import ledger
+from radscheduler.core.models import Leave, Shift
+
+
+@receiver(pre_save, sender=Shift)
+@receiver(pre_save, sender=Leave)
+def remember_ledger_key(sender, instance, **kwargs):
+    # A shift may move to another registrar or week, in which case the old week needs refreshing too
+    instance._ledger_key = None
+    if instance.pk:
+        instance._ledger_key = sender.objects.filter(pk=instance.pk).values_list("registrar_id", "date").first()
+
+
+@receiver(post_save, sender=Shift)
+@receiver(post_save, sender=Leave)
+def update_ledger_on_save(sender, instance, **kwargs):
+    keys = {(instance.registrar_id, instance.date)}
+    if getattr(instance, "_ledger_key", None):
+        keys.add(instance._ledger_key)
+    ledger.refresh_ledger(keys)
+
+
+@receiver(post_delete, sender=Shift)
+@receiver(post_delete, sender=Leave)
+def update_ledger_on_delete(sender, instance, origin=None, **kwargs):
+    # When a registrar is deleted, their ledger rows are cascaded as well
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is not None and origin_model is not sender:
+        return
+    ledger.refresh_ledger({(instance.registrar_id, instance.date)})
@@ -0,0 +1,273 @@
+"""
+What-if simulation of leave and status requests against the current roster.
+
+The roster around a request is loaded once into an in-memory `RosterSnapshot` of domain
+objects, cached per 13 week block and invalidated when any row in it changes. A simulation
+re-runs `AutoAssigner` only over the weeks affected by the hypothetical leave or status,
+with the rest of the snapshot frozen, and compares it with the same re-run without it.
+"""
+
+import hashlib
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from radscheduler.core.models import Leave, Registrar, Shift, Status
+from radscheduler.roster import AutoAssigner, SingleOnCallRoster
+from radscheduler.roster import models as domain
+from radscheduler.roster.generator import generate_shifts
+from radscheduler.roster.validators import OFF_DUTY, Violation, validate_roster
+
+SNAPSHOT_CACHE_SECONDS = 60 * 15
+SNAPSHOT_WEEKS = 13
+_EPOCH = date(2000, 1, 3)  # a Monday, snapshots are aligned to blocks of SNAPSHOT_WEEKS from here
+
+
+def _monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def snapshot_period(start: date, end: date) -> tuple[date, date]:
+    """
+    The aligned blocks of SNAPSHOT_WEEKS weeks covering START to END.
+    """
+    block = timedelta(weeks=SNAPSHOT_WEEKS)
+    first = _EPOCH + block * ((start - _EPOCH) // block)
+    last = _EPOCH + block * ((end - _EPOCH) // block + 1) - timedelta(days=1)
+    return first, last
+
+
+def affected_window(start: date, end: date) -> tuple[date, date]:
+    """
+    Whole weeks around START to END, from the Monday of the week before to the Sunday of the week after,
+    so that the weekend and night blocks touching the request are refilled with it.
+    """
+    return _monday(start) - timedelta(weeks=1), _monday(end) + timedelta(weeks=1, days=6)
+
+
+@dataclass
+class Calendar:
+    shifts: list[domain.Shift] = field(default_factory=list)
+    leaves: list[domain.Leave] = field(default_factory=list)
+    statuses: list[domain.Status] = field(default_factory=list)
+
+
+@dataclass
+class RosterSnapshot:
+    start: date
+    end: date
+    registrars: dict[int, domain.Registrar]
+    shifts: list[domain.Shift]  # assigned shifts only
+    leaves: list[domain.Leave]
+    statuses: list[domain.Status]
+    calendars: dict[int, Calendar] = field(default_factory=dict, repr=False)  # by registrar id
+
+    def __post_init__(self):
+        # Built once and cached with the snapshot, so checks for one registrar only scan their own
+        for registrar_id in self.registrars:
+            self.calendars.setdefault(registrar_id, Calendar())
+        for shift in self.shifts:
+            self.calendars[shift.registrar.id].shifts.append(shift)
+        for leave in self.leaves:
+            self.calendars[leave.registrar.id].leaves.append(leave)
+        for status in self.statuses:
+            self.calendars[status.registrar.id].statuses.append(status)
+
+    @classmethod
+    def load(cls, start: date, end: date) -> "RosterSnapshot":
+        """
+        Load straight into domain objects, one query per model.
+        """
+        registrars = {
+            pk: domain.Registrar(username=username, senior=senior, start=first, finish=finish, id=pk)
+            for pk, username, senior, first, finish in Registrar.objects.exclude(finish__lt=start).values_list(
+                "pk", "user__username", "senior", "start", "finish"
+            )
+        }
+        shift_rows = (
+            Shift.objects.filter(date__range=[start, end], registrar__in=registrars)
+            .order_by("date", "id")
+            .values_list("pk", "date", "type", "registrar_id", "stat_day", "extra_duty", "fatigue_override", "series")
+        )
+        shifts = [
+            domain.Shift(
+                date=day,
+                type=domain.ShiftType(shift_type),
+                registrar=registrars[registrar_id],
+                stat_day=stat_day,
+                extra_duty=extra_duty,
+                fatigue_override=fatigue_override,
+                series=series,
+                id=pk,
+            )
+            for pk, day, shift_type, registrar_id, stat_day, extra_duty, fatigue_override, series in shift_rows
+        ]
+        leaves = [
+            domain.Leave(
+                date=day,
+                type=domain.LeaveType(leave_type),
+                registrar=registrars[registrar_id],
+                no_abutting_weekend=no_abutting_weekend,
+            )
+            for day, leave_type, registrar_id, no_abutting_weekend in Leave.objects.filter(
+                date__range=[start, end], registrar__in=registrars, cancelled=False
+            ).values_list("date", "type", "registrar_id", "no_abutting_weekend")
+        ]
+        statuses = [
+            domain.Status(
+                start=first,
+                end=last,
+                type=domain.StatusType(status_type),
+                registrar=registrars[registrar_id],
+                weekdays=[domain.Weekday(day) for day in weekdays],
+                shift_types=[domain.ShiftType(shift_type) for shift_type in shift_types],
+            )
+            for first, last, status_type, registrar_id, weekdays, shift_types in Status.objects.overlapping(start, end)
+            .filter(registrar__in=registrars)
+            .values_list("start", "end", "type", "registrar_id", "weekdays", "shift_types")
+        ]
+        return cls(start, end, registrars, shifts, leaves, statuses)
+
+    def refill(self, start: date, end: date, leaves=(), statuses=()) -> list[domain.Shift]:
+        """
+        Refill the rostered shifts from START to END, with LEAVES and STATUSES added to the snapshot's own.
+        Shifts outside the window and extra duties are kept as they are.
+        """
+        frozen = [shift for shift in self.shifts if shift.extra_duty or not start <= shift.date <= end]
+        assigner = AutoAssigner(
+            registrars=[r for r in self.registrars.values() if r.finish is None or r.finish >= start],
+            unfilled=generate_shifts(SingleOnCallRoster, start, end),
+            filled=frozen,
+            leaves=self.leaves + list(leaves),
+            statuses=self.statuses + list(statuses),
+        )
+        return assigner.fill_roster()
+
+
+def _cache_key(start: date, end: date) -> str:
+    """
+    Cache key that changes whenever a registrar, or a shift, leave or status in the period changes.
+    """
+    stamps = [
+        queryset.aggregate(count=Count("id"), last=Max("last_edited"))
+        for queryset in (
+            Registrar.objects.all(),
+            Shift.objects.filter(date__range=[start, end]),
+            Leave.objects.filter(date__range=[start, end]),
+            Status.objects.overlapping(start, end),
+        )
+    ]
+    digest = hashlib.md5(repr(stamps).encode()).hexdigest()
+    return f"simulation:{start}:{end}:{digest}"
+
+
+def roster_snapshot(start: date, end: date) -> tuple[RosterSnapshot, str]:
+    """
+    Cached snapshot of the blocks covering START to END, and its cache key.
+    """
+    first, last = snapshot_period(start, end)
+    key = _cache_key(first, last)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = RosterSnapshot.load(first, last)
+        cache.set(key, snapshot, SNAPSHOT_CACHE_SECONDS)
+    return snapshot, key
+
+
+def _fatigue(shifts: list[domain.Shift]) -> dict[str, float]:
+    result = defaultdict(float)
+    for shift in shifts:
+        if shift.registrar is not None and not shift.extra_duty:
+            result[shift.registrar.username] += SingleOnCallRoster.shift_fatigue(shift)
+    return result
+
+
+@dataclass
+class SimulationResult:
+    start: date  # of the refilled window
+    end: date
+    fillable: bool
+    unfilled: list[domain.Shift] = field(default_factory=list)  # shifts left unfilled by the request
+    conflicts: list[domain.Shift] = field(default_factory=list)  # current shifts the request clashes with
+    violations: list[Violation] = field(default_factory=list)  # new violations caused by the request
+    fatigue: dict[str, tuple[float, float]] = field(default_factory=dict)  # username: (before, after), if changed
+    changed: int = 0  # shifts assigned to a different registrar
+    elapsed: float = 0.0  # seconds
+
+
+def simulate(registrar_id: int, leaves: list[domain.Leave] = (), statuses: list[domain.Status] = ()):
+    """
+    Simulate adding LEAVES and STATUSES of one registrar to the roster.
+
+    Their `registrar` is replaced by the snapshot's registrar REGISTRAR_ID. Raises `Registrar.DoesNotExist`
+    if the registrar is not active in the affected window.
+    """
+    started = time.perf_counter()
+    dates = [leave.date for leave in leaves] + [d for status in statuses for d in (status.start, status.end)]
+    start, end = affected_window(min(dates), max(dates))
+    snapshot, key = roster_snapshot(start, end)
+
+    registrar = snapshot.registrars.get(registrar_id)
+    if registrar is None:
+        raise Registrar.DoesNotExist(f"Registrar {registrar_id} is not active from {start} to {end}")
+    leaves = [domain.Leave(leave.date, leave.type, registrar, leave.no_abutting_weekend) for leave in leaves]
+    statuses = [
+        domain.Status(status.start, status.end, status.type, registrar, status.weekdays, status.shift_types)
+        for status in statuses
+    ]
+
+    # The refill without the request is the same for every request in the window, so it is cached too
+    control_key = f"{key}:control:{start}:{end}"
+    control = cache.get(control_key)
+    if control is None:
+        control = snapshot.refill(start, end)
+        cache.set(control_key, control, SNAPSHOT_CACHE_SECONDS)
+    simulated = snapshot.refill(start, end, leaves, statuses)
+
+    def in_window(shifts):
+        return [shift for shift in shifts if start <= shift.date <= end and not shift.extra_duty]
+
+    def window_violations(shifts, extra_leaves=[], extra_statuses=[]):
+        violations = validate_roster(shifts, snapshot.leaves + extra_leaves, snapshot.statuses + extra_statuses)
+        return {v for v in violations if any(start <= day <= end for day in v.dates)}
+
+    violations = window_violations(simulated, leaves, statuses) - window_violations(control)
+    before, after = _fatigue(in_window(control)), _fatigue(in_window(simulated))
+    fatigue = {
+        username: (before.get(username, 0.0), after.get(username, 0.0))
+        for username in sorted(before.keys() | after.keys())
+        if before.get(username, 0.0) != after.get(username, 0.0)
+    }
+    assigned = {(s.date, s.type, s.series): s.registrar for s in in_window(control)}
+    changed = sum(1 for s in in_window(simulated) if assigned.get((s.date, s.type, s.series)) != s.registrar)
+    unfilled = [
+        s for s in in_window(simulated) if s.registrar is None and assigned.get((s.date, s.type, s.series)) is not None
+    ]
+
+    leave_dates = {leave.date for leave in leaves}
+    conflicts = [
+        shift
+        for shift in snapshot.shifts
+        if shift.registrar is registrar
+        and shift.type not in OFF_DUTY
+        and (
+            shift.date in leave_dates
+            or any(status.start <= shift.date <= status.end and status.not_oncall(shift) for status in statuses)
+        )
+    ]
+
+    return SimulationResult(
+        start=start,
+        end=end,
+        fillable=not unfilled and not violations,
+        unfilled=unfilled,
+        conflicts=conflicts,
+        violations=sorted(violations, key=lambda v: (v.dates[0], v.registrar, v.clause)),
+        fatigue=fatigue,
+        changed=changed,
+        elapsed=time.perf_counter() - started,
+    )
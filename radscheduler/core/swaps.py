@@ -0,0 +1,181 @@
+"""
+Shift swaps between registrars.
+
+A registrar offers one of their shifts and asks for a shift of another registrar in return. Each side
+is swapped with its whole block (a weekend with its RDOs, a set of nights with its sleeps, see
+`AutoAssigner.coupled_shifts`), and both registrars must still pass every `StonzMecaValidator` rule
+afterwards. Offers are searched on the cached `RosterSnapshot`, checking each candidate against the two
+registrars' own calendars only; accepting a swap re-checks it on fresh rows before saving it.
+"""
+
+import dataclasses
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from radscheduler.core.models import Shift, SwapRequest
+from radscheduler.core.service import reassign_shifts
+from radscheduler.core.simulation import RosterSnapshot, roster_snapshot
+from radscheduler.roster import SingleOnCallRoster
+from radscheduler.roster import models as domain
+from radscheduler.roster.assigner import AutoAssigner
+from radscheduler.roster.validators import leads_block, validate_swap
+
+SWAP_HORIZON = timedelta(weeks=6)  # counter shifts are searched this far either side of the offered shift
+_MARGIN = timedelta(weeks=2)  # of the roster around both blocks, for the validator
+
+
+class SwapError(Exception):
+    pass
+
+
+@dataclass
+class SwapOffer:
+    offered: domain.Shift  # first shift of the proposer's block
+    shift: domain.Shift  # first shift of the counterpart's block
+    proposer: domain.Registrar
+    registrar: domain.Registrar  # the counterpart
+    given: list[domain.Shift]  # block going from the proposer to the counterpart
+    taken: list[domain.Shift]  # block going from the counterpart to the proposer
+    impact: float  # change in the proposer's fatigue, the counterpart's changes by the opposite
+
+
+def _period(*days: date) -> tuple[date, date]:
+    return min(days) - _MARGIN, max(days) + _MARGIN
+
+
+def _fatigue(shifts: list[domain.Shift]) -> float:
+    return sum(SingleOnCallRoster.shift_fatigue(shift) for shift in shifts if not shift.extra_duty)
+
+
+def _block(snapshot: RosterSnapshot, shift: domain.Shift) -> tuple[domain.Shift, list[domain.Shift]]:
+    """
+    The first shift of SHIFT's block, and the block. Raises `SwapError` if the block is not one registrar's.
+    """
+    block = AutoAssigner.coupled_shifts([shift], snapshot.shifts)
+    leads = [s for s in block if leads_block(s)]
+    if not leads or any(s.registrar is not shift.registrar for s in block):
+        raise SwapError(f"The shifts coupled to {shift.date} {shift.type.label} are not all worked by one registrar")
+    return leads[0], block
+
+
+def _offer(snapshot: RosterSnapshot, offered: domain.Shift, given: list[domain.Shift], counter_shift: domain.Shift):
+    """
+    The swap of the GIVEN block, led by OFFERED, for COUNTER_SHIFT's block, or None if either registrar
+    would not be compliant afterwards.
+    """
+    proposer, counterpart = offered.registrar, counter_shift.registrar
+    try:
+        lead, taken = _block(snapshot, counter_shift)
+    except SwapError:
+        return None
+    for registrar, received, returned in ((counterpart, given, taken), (proposer, taken, given)):
+        calendar = snapshot.calendars[registrar.id]
+        if not validate_swap(registrar, received, returned, calendar.shifts, calendar.leaves, calendar.statuses):
+            return None
+    return SwapOffer(offered, lead, proposer, counterpart, given, taken, _fatigue(taken) - _fatigue(given))
+
+
+def _find(snapshot: RosterSnapshot, shift_id: int) -> domain.Shift:
+    for shift in snapshot.shifts:
+        if shift.id == shift_id:
+            if shift.extra_duty:
+                raise SwapError("Extra duties are not swapped, they are allocated")
+            return shift
+    raise SwapError(f"Shift {shift_id} is not rostered to anyone")
+
+
+def swap_offers(shift_id: int, limit: int = 20) -> list[SwapOffer]:
+    """
+    Compliant swaps for the block of shift SHIFT_ID, least change in fatigue first.
+    """
+    day = Shift.objects.values_list("date", flat=True).get(pk=shift_id)
+    snapshot, _ = roster_snapshot(*_period(day - SWAP_HORIZON, day + SWAP_HORIZON))
+    offered, given = _block(snapshot, _find(snapshot, shift_id))
+
+    offers = []
+    for shift in snapshot.shifts:
+        if (
+            shift.registrar is offered.registrar
+            or shift.extra_duty
+            or not leads_block(shift)
+            or abs(shift.date - offered.date) > SWAP_HORIZON
+        ):
+            continue
+        offer = _offer(snapshot, offered, given, shift)
+        if offer is not None:
+            offers.append(offer)
+    offers.sort(key=lambda o: (abs(o.impact), abs(o.shift.date - offered.date), o.shift.date, o.registrar.username))
+    return offers[:limit]
+
+
+def _check(snapshot: RosterSnapshot, shift_id: int, counter_shift_id: int) -> SwapOffer:
+    shift, counter_shift = _find(snapshot, shift_id), _find(snapshot, counter_shift_id)
+    if shift.registrar is counter_shift.registrar:
+        raise SwapError("Both shifts are worked by the same registrar")
+    offered, given = _block(snapshot, shift)
+    offer = _offer(snapshot, offered, given, counter_shift)
+    if offer is None:
+        raise SwapError("The swap would break the roster rules for one of the registrars")
+    return offer
+
+
+def propose_swap(shift_id: int, counter_shift_id: int, comment: str = "") -> SwapRequest:
+    """
+    Propose swapping shift SHIFT_ID for COUNTER_SHIFT_ID. Raises `SwapError` if the swap is not compliant.
+    """
+    days = Shift.objects.filter(pk__in=[shift_id, counter_shift_id]).values_list("date", flat=True)
+    if len(days) != 2:
+        raise SwapError("Both shifts must exist")
+    snapshot, _ = roster_snapshot(*_period(*days))
+    offer = _check(snapshot, shift_id, counter_shift_id)
+    return SwapRequest.objects.create(
+        shift_id=offer.offered.id,
+        counter_shift_id=offer.shift.id,
+        proposer_id=offer.proposer.id,
+        counterpart_id=offer.registrar.id,
+        comment=comment,
+    )
+
+
+@transaction.atomic
+def accept_swap(swap: SwapRequest) -> SwapOffer:
+    """
+    Swap both blocks of a pending SWAP in one transaction, after checking them again on fresh rows.
+
+    Any other pending request involving the swapped shifts is cancelled.
+    """
+    if swap.state != SwapRequest.State.PENDING:
+        raise SwapError(f"The swap is {swap.get_state_display().lower()}")
+    # Lock both sides so that neither changes hands while the swap is checked and saved
+    days = list(
+        Shift.objects.select_for_update()
+        .filter(pk__in=[swap.shift_id, swap.counter_shift_id])
+        .values_list("date", flat=True)
+    )
+    if len(days) != 2:
+        raise SwapError("Both shifts must exist")
+    snapshot = RosterSnapshot.load(*_period(*days))
+    offer = _check(snapshot, swap.shift_id, swap.counter_shift_id)
+    if (offer.proposer.id, offer.registrar.id) != (swap.proposer_id, swap.counterpart_id):
+        raise SwapError("The shifts have changed hands since the swap was proposed")
+
+    swapped = offer.given + offer.taken
+    ids = [shift.id for shift in swapped]
+    list(Shift.objects.select_for_update().filter(pk__in=ids).values_list("pk"))
+    previous = {shift.id: shift.registrar.id for shift in swapped}
+    reassign_shifts(
+        [dataclasses.replace(shift, registrar=offer.registrar) for shift in offer.given]
+        + [dataclasses.replace(shift, registrar=offer.proposer) for shift in offer.taken],
+        previous,
+    )
+
+    swap.state = SwapRequest.State.ACCEPTED
+    swap.save()
+    SwapRequest.objects.filter(Q(shift__in=ids) | Q(counter_shift__in=ids), state=SwapRequest.State.PENDING).exclude(
+        pk=swap.pk
+    ).update(state=SwapRequest.State.CANCELLED, last_edited=timezone.now())
+    return offer
@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+import pytest
+from django.urls import reverse
+
+from radscheduler.core.allocation import ExtraDutyAllocator, allocate_extra_duties, open_extra_duties
+from radscheduler.core.models import Leave, Shift, ShiftInterest
+from radscheduler.roster import LeaveType, ShiftType
+
+SATURDAY = date.today() + timedelta(days=12 - date.today().weekday())
+
+
+def extra_duty(day, *registrars):
+    shift = Shift.objects.create(date=day, type=ShiftType.LONG, extra_duty=True, series=2)
+    for registrar in registrars:
+        ShiftInterest.objects.create(shift=shift, registrar=registrar)
+    return shift
+
+
+def allocated(shift):
+    shift.refresh_from_db()
+    return shift.registrar
+
+
+@pytest.mark.django_db
+class TestAllocation:
+    def test_fewer_extra_duties_first(self, juniors_db):
+        erika, will = juniors_db[:2]
+        Shift.objects.create(date=SATURDAY - timedelta(weeks=4), type=ShiftType.LONG, extra_duty=True, registrar=erika)
+        shift = extra_duty(SATURDAY, erika, will)
+
+        candidates = ExtraDutyAllocator(open_extra_duties()).rank(open_extra_duties().get())
+        assert [candidate.registrar.id for candidate in candidates] == [will.pk, erika.pk]
+        assert (candidates[0].extra_duties, candidates[1].extra_duties) == (0, 1)
+        assert shift.pk in {allocation.shift.pk for allocation in allocate_extra_duties()}
+        assert allocated(shift) == will
+
+    def test_rostered_fatigue_counts(self, juniors_db):
+        erika, will = juniors_db[:2]
+        for day in range(5):
+            Shift.objects.create(date=SATURDAY - timedelta(days=12 - day), type=ShiftType.LONG, registrar=will)
+        shift = extra_duty(SATURDAY, will, erika)
+
+        allocate_extra_duties()
+        assert allocated(shift) == erika
+
+    def test_not_compliant_never_allocated(self, juniors_db):
+        erika = juniors_db[0]
+        Leave.objects.create(date=SATURDAY, type=LeaveType.ANNUAL, registrar=erika)
+        shift = extra_duty(SATURDAY, erika)
+
+        (allocation,) = allocate_extra_duties()
+        assert not allocation.candidates[0].valid
+        assert allocation.registrar is None
+        assert allocated(shift) is None
+
+    def test_batch_is_spread(self, juniors_db):
+        erika, will = juniors_db[:2]
+        saturday = extra_duty(SATURDAY, erika, will)
+        sunday = extra_duty(SATURDAY + timedelta(days=7), erika, will)
+
+        allocate_extra_duties()
+        assert {allocated(saturday), allocated(sunday)} == {erika, will}
+
+
+@pytest.mark.django_db
+class TestAllocationViews:
+    def test_suggest(self, admin_client, juniors_db):
+        erika, will = juniors_db[:2]
+        Leave.objects.create(date=SATURDAY, type=LeaveType.ANNUAL, registrar=erika)
+        shift = extra_duty(SATURDAY, erika, will)
+
+        content = admin_client.get(reverse("extra_suggest_registrar"), {"id": shift.pk}).json()
+        assert content["registrar"] == will.pk
+        assert [candidate["valid"] for candidate in content["candidates"]] == [True, False]
+
+    def test_allocate(self, admin_client, juniors_db):
+        shift = extra_duty(SATURDAY, juniors_db[0])
+        assert admin_client.get(reverse("extra_allocate")).status_code == 405
+
+        response = admin_client.post(reverse("extra_allocate"))
+        assert response.status_code == 302
+        assert allocated(shift) == juniors_db[0]
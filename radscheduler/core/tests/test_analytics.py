@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+
+import pytest
+from django.urls import reverse
+
+import radscheduler.roster.models as domain
+from radscheduler.core.analytics import COLUMN_NAMES, LedgerColumns, WorkloadAnalytics, workload_summary
+from radscheduler.core.models import Shift
+from radscheduler.core.service import retrieve_workload_breakdown
+from radscheduler.roster import SingleOnCallRoster
+from radscheduler.roster.models import DetailedShiftType, ShiftType
+
+pytestmark = pytest.mark.django_db
+
+MONDAY = date(2023, 1, 2)
+
+
+@pytest.fixture
+def cache(settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def test_matches_domain_rules(juniors_db):
+    reg = juniors_db[0]
+    shifts = [
+        Shift(date=MONDAY + timedelta(days=n), type=shift_type, registrar=reg)
+        for n in range(7)
+        for shift_type in [ShiftType.LONG, ShiftType.NIGHT, ShiftType.RDO]
+    ]
+    shifts[0].stat_day = True
+    shifts[1].fatigue_override = 3.0
+    for shift in shifts:
+        shift.save()
+
+    analytics = WorkloadAnalytics(LedgerColumns.load(MONDAY, MONDAY + timedelta(days=6)))
+    domain_shifts = [
+        domain.Shift(date=s.date, type=s.type, stat_day=s.stat_day, fatigue_override=s.fatigue_override)
+        for s in shifts
+    ]
+    counts = analytics.counts().loc[reg.id]
+    for shift_type, name in COLUMN_NAMES.items():
+        assert counts[name] == sum(1 for s in domain_shifts if DetailedShiftType.from_shift(s) == shift_type)
+    assert analytics.fatigue().loc[reg.id, "ROSTER FATIGUE"] == pytest.approx(
+        sum(SingleOnCallRoster.shift_fatigue(s) for s in domain_shifts)
+    )
+
+
+def test_rolling_fatigue(juniors_db):
+    reg = juniors_db[0]
+    # One weekday long (1.25) every week for 6 weeks
+    for week in range(6):
+        Shift.objects.create(date=MONDAY + timedelta(weeks=week), type=ShiftType.LONG, registrar=reg)
+
+    analytics = WorkloadAnalytics(LedgerColumns.load(MONDAY, MONDAY + timedelta(weeks=6, days=-1)))
+    assert analytics.rolling_fatigue(4)[reg.id].tolist() == [1.25, 2.5, 3.75, 5.0, 5.0, 5.0]
+
+
+def test_breakdown_with_missing_categories(juniors_db):
+    reg1, reg2 = juniors_db[0], juniors_db[1]
+    Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=reg1)
+    Shift.objects.create(date=date(2023, 1, 6), type=ShiftType.NIGHT, registrar=reg1)  # Fri
+    Shift.objects.create(date=date(2023, 1, 7), type=ShiftType.LONG, registrar=reg2)  # Sat
+    Shift.objects.create(date=date(2023, 1, 5), type=ShiftType.LONG, registrar=reg2, extra_duty=True)
+
+    # No weekday nights in range, which should not raise
+    rows = retrieve_workload_breakdown(MONDAY, date(2023, 1, 8)).to_dict(orient="records")
+    assert [row["username"] for row in rows] == [reg1.user.username, reg2.user.username]
+    assert rows[0]["LONG"] == 1
+    assert rows[0]["WKD NIGHT"] == 1
+    assert rows[0]["NIGHT"] == 0
+    assert rows[0]["FATIGUE"] == 1 + 5
+    assert rows[0]["FATIGUE RANK"] == 1
+    assert rows[1]["WEEKEND"] == 1
+    assert rows[1]["LONG"] == 0
+
+
+def test_custom_weights(juniors_db):
+    reg = juniors_db[0]
+    Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=reg)
+
+    summary = workload_summary(MONDAY, date(2023, 1, 8), weights={DetailedShiftType.LONG: 2.5})
+    assert summary.loc[reg.id, "FATIGUE"] == 2.5
+
+
+def test_partial_weeks_clipped(juniors_db):
+    reg = juniors_db[0]
+    Shift.objects.create(date=MONDAY, type=ShiftType.LONG, registrar=reg)
+    Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=reg)  # Wed
+
+    summary = workload_summary(date(2023, 1, 3), date(2023, 1, 8))
+    assert summary.loc[reg.id, "LONG"] == 1
+    assert summary.loc[reg.id, "ROSTER FATIGUE"] == 1.5
+
+
+def test_summary_cached_until_shifts_change(cache, juniors_db, django_assert_num_queries):
+    reg = juniors_db[0]
+    Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=reg)
+    workload_summary(MONDAY, date(2023, 1, 8))
+
+    # Only the freshness check
+    with django_assert_num_queries(1):
+        workload_summary(MONDAY, date(2023, 1, 8))
+
+    Shift.objects.create(date=date(2023, 1, 5), type=ShiftType.LONG, registrar=reg)
+    assert workload_summary(MONDAY, date(2023, 1, 8)).loc[reg.id, "LONG"] == 2
+
+
+def test_workload_view(client, juniors_db):
+    reg = juniors_db[0]
+    for day in [date(2023, 1, 4), date(2023, 1, 10), date(2023, 1, 17)]:  # Wed edge, whole week, Tue edge
+        Shift.objects.create(date=day, type=ShiftType.LONG, registrar=reg)
+    Shift.objects.create(date=date(2023, 1, 3), type=ShiftType.LONG, registrar=juniors_db[1])  # before the range
+
+    # Over the query budget raises in the tests
+    response = client.get(reverse("workload"), {"start": "2023-01-04", "end": "2023-01-17"})
+    assert response.status_code == 200
+    rows = {row["username"]: row for row in response.json()["data"]}
+    assert list(rows) == [reg.user.username]
+    assert rows[reg.user.username]["LONG"] == 3
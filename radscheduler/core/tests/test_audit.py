@@ -0,0 +1,121 @@
+import json
+from datetime import date
+from io import StringIO
+from random import Random
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from radscheduler.core.audit import AuditData, AuditReport, audit_report, audit_violations
+from radscheduler.core.models import Leave, Shift
+from radscheduler.roster import AutoAssigner, LeaveType, ShiftType, SingleOnCallRoster
+from radscheduler.roster.generator import generate_shifts
+from radscheduler.roster.synthetic import synthetic_roster
+from radscheduler.roster.validators import Clause, validate_roster
+
+
+def as_tuples(violations):
+    return [(str(v.clause.value), v.registrar, v.dates) for v in violations]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_same_as_validate_roster(seed):
+    data = synthetic_roster(12, date(2023, 1, 2), date(2023, 6, 25), seed=seed)
+    shifts = generate_shifts(SingleOnCallRoster, data.start, data.end)
+    shifts = AutoAssigner(registrars=data.registrars, unfilled=shifts).fill_roster()
+    # Reassign some shifts at random to break every rule
+    rng = Random(seed)
+    for shift in rng.sample(shifts, len(shifts) // 5):
+        shift.registrar = rng.choice(data.registrars)
+
+    expected = validate_roster(shifts, data.leaves, data.statuses)
+    result = audit_violations(AuditData.from_roster(shifts, data.leaves, data.statuses))
+
+    assert {v.clause for v in expected} == set(Clause)
+    assert list(zip(result["clause"], result["registrar"], result["dates"])) == as_tuples(expected)
+
+
+def test_empty():
+    result = audit_violations(AuditData.from_roster([], [], []))
+    assert result.empty
+
+
+@pytest.mark.django_db
+class TestAuditReport:
+    @pytest.fixture
+    def roster(self, juniors_db):
+        reg = juniors_db[0]
+        # Two weekends in a row, the second next to a Friday leave
+        for day in (date(2023, 1, 7), date(2023, 1, 8), date(2023, 1, 14), date(2023, 1, 15)):
+            Shift.objects.create(date=day, type=ShiftType.LONG, registrar=reg)
+        Leave.objects.create(date=date(2023, 1, 13), type=LeaveType.ANNUAL, registrar=reg)
+        # Cancelled leave is not audited
+        Leave.objects.create(date=date(2023, 1, 6), type=LeaveType.ANNUAL, registrar=reg, cancelled=True)
+        return juniors_db
+
+    def test_report(self, roster):
+        report = AuditReport.build(date(2023, 1, 1), date(2023, 1, 31))
+        username = roster[0].user.username
+
+        assert [(v.clause, v.registrar) for v in report.to_violations()] == [
+            (Clause.WEEKEND_FREE, username),
+            (Clause.ABUTTING_LEAVE, username),
+        ]
+        summary = report.summary()
+        assert summary.loc["17.3.5", "violations"] == 1
+        assert summary.loc["ONE_SHIFT", "violations"] == 0
+
+    def test_violations_crossing_the_period(self, roster):
+        # The weekend of the 7th is outside the period, but is needed to see the 17.3.5 violation
+        report = AuditReport.build(date(2023, 1, 14), date(2023, 1, 31))
+        assert Clause.WEEKEND_FREE in {v.clause for v in report.to_violations()}
+
+        report = AuditReport.build(date(2023, 2, 1), date(2023, 2, 28))
+        assert report.violations.empty
+
+    def test_export(self, roster):
+        report = AuditReport.build(date(2023, 1, 1), date(2023, 1, 31))
+
+        lines = report.to_csv().splitlines()
+        assert lines[0] == "clause,description,registrar,start,end,dates"
+        assert len(lines) == 3
+
+        content = json.loads(report.to_json())
+        assert content["summary"]["21.4.1"] == {
+            "description": "Weekend abutting leave",
+            "violations": 1,
+            "registrars": 1,
+        }
+        assert content["violations"][-1]["dates"] == ["2023-01-13", "2023-01-14"]
+
+    def test_cached_until_changed(self, roster, django_assert_num_queries):
+        start, end = date(2023, 1, 1), date(2023, 1, 31)
+        audit_report(start, end)
+        with django_assert_num_queries(3):
+            report = audit_report(start, end)
+        assert len(report.violations) == 2
+
+        Shift.objects.filter(date=date(2023, 1, 15)).delete()
+        Shift.objects.filter(date=date(2023, 1, 14)).delete()
+        assert len(audit_report(start, end).violations) == 0
+
+    def test_command(self, roster, tmp_path):
+        out = StringIO()
+        call_command("audit_roster", "01/01/2023", "31/01/2023", stdout=out)
+        assert "Every second weekend free" in out.getvalue()
+
+        path = tmp_path / "audit.json"
+        call_command("audit_roster", "01/01/2023", "31/01/2023", "--format", "json", "--output", str(path), stdout=out)
+        assert len(json.loads(path.read_text())["violations"]) == 2
+
+    def test_view(self, roster, client, admin_client):
+        params = {"start": "2023-01-01", "end": "2023-01-31"}
+        assert client.get(reverse("audit"), params).status_code == 302
+
+        response = admin_client.get(reverse("audit"), params)
+        assert response["Content-Type"] == "text/csv"
+        assert len(response.content.decode().splitlines()) == 3
+
+        response = admin_client.get(reverse("audit"), params | {"format": "json"})
+        assert response.json()["end"] == "2023-01-31"
@@ -0,0 +1,170 @@
+import pstats
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from radscheduler.core.io import DEFAULT_PASSWORD, import_history, import_users
+from radscheduler.core.ledger import LEDGER_FIELDS, rebuild_ledger
+from radscheduler.core.models import Leave, Registrar, RosterRun, Shift, Status, WorkloadLedger
+
+pytestmark = pytest.mark.django_db
+
+
+class TestGenerateSyntheticData:
+    def generate(self, **options):
+        call_command(
+            "generate_synthetic_data",
+            registrars=10,
+            years=1,
+            start=date(2023, 1, 2),
+            stdout=StringIO(),
+            **options,
+        )
+
+    def test_generates_assigned_roster(self):
+        self.generate()
+
+        assert Registrar.objects.count() == 10
+        assert Shift.objects.filter(extra_duty=False, date=date(2023, 6, 5)).exclude(registrar=None).exists()
+        assert Shift.objects.filter(extra_duty=True).exists()
+        assert Leave.objects.exists()
+
+        def ledger():
+            rows = WorkloadLedger.objects.order_by("registrar", "week")
+            return list(rows.values("registrar", "week", *LEDGER_FIELDS))
+
+        # The shifts are saved through the service, which keeps the ledger of their weeks up to date
+        saved = ledger()
+        assert saved
+        rebuild_ledger(date(2023, 1, 2), date(2024, 1, 1))
+        assert saved == ledger()
+
+    def test_seeded(self):
+        def roster(prefix):
+            return list(
+                Shift.objects.filter(registrar__user__username__startswith=prefix)
+                .order_by("date", "type")
+                .values_list("date", "type", "registrar__user__name")
+            )
+
+        self.generate(prefix="a-")
+        first = roster("a-")
+        # A slot holds a single shift, so the second roster replaces the first
+        Shift.objects.all().delete()
+        self.generate(prefix="b-")
+
+        assert first == roster("b-")
+
+    def test_refuses_existing_shifts(self):
+        self.generate(prefix="a-")
+        with pytest.raises(CommandError, match="already has shifts"):
+            self.generate(prefix="b-")
+
+    def test_refuses_existing_prefix(self):
+        self.generate()
+        with pytest.raises(CommandError):
+            self.generate()
+
+
+class TestProfileRoster:
+    def test_records_run(self, juniors_db, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        out = StringIO()
+        call_command("profile_roster", "02/01/2023", "29/01/2023", "--profile", "--top", "5", stdout=out)
+
+        run = RosterRun.objects.get()
+        assert set(run.timings) == {"load", "map", "generate", "assign", "validate", "filter"}
+        assert run.counters["shifts"] > 0
+        assert pstats.Stats(run.profile.path).total_calls > 0
+        assert "assign" in out.getvalue()
+        assert "fill_shifts" in out.getvalue()
+
+    def test_without_profile(self, juniors_db):
+        call_command("profile_roster", "02/01/2023", "08/01/2023", stdout=StringIO())
+        assert not RosterRun.objects.get().profile
+
+
+class TestImport:
+    @pytest.fixture
+    def files(self, tmp_path):
+        (tmp_path / "users.yaml").write_text(
+            "alice:\n  senior: true\n  start: 01/12/2019\n  finish: 01/12/2024\n"
+            "bob:\n  senior: false\n  start: 01/12/2021\n  finish: 01/12/2026\n"
+        )
+        (tmp_path / "statuses.yaml").write_text("bob:\n  type: buddy\n  start: 01/12/2021\n  finish: 31/12/2021\n")
+        (tmp_path / "history.csv").write_text(
+            "02/01/2023,alice,Long day\n"
+            "03/01/2023,bob,Nights\n"
+            "04/01/2023,bob,Annual leave - a.m.\n"
+            "05/01/2023,carol,Long day\n"  # unknown registrar
+            "2023-01-06,alice,Long day\n"  # malformed date
+            "07/01/2023,alice,Day off\n"  # neither a shift nor a leave
+            "\n"
+            "02/01/2022,alice,Extra duty - long day\n"  # out of range
+        )
+        return tmp_path
+
+    def test_import(self, files):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import",
+            str(files / "history.csv"),
+            users=str(files / "users.yaml"),
+            statuses=str(files / "statuses.yaml"),
+            start=date(2023, 1, 1),
+            stdout=out,
+            stderr=err,
+        )
+
+        assert Shift.objects.count() == 2
+        leave = Leave.objects.get()
+        assert (leave.registrar.user.username, leave.portion) == ("bob", "AM")
+        assert Status.objects.get().registrar.user.username == "bob"
+        assert WorkloadLedger.objects.filter(registrar__user__username="bob").exists()
+        assert Registrar.objects.get(user__username="alice").user.check_password(DEFAULT_PASSWORD)
+        assert "Line 4: Unknown registrar 'carol'" in err.getvalue()
+        assert "Line 5:" in err.getvalue()
+        assert "2 shifts and 1 leaves from 8 rows, 3 skipped and 2 rejected" in out.getvalue()
+
+    def test_chunks(self, files):
+        import_users(files / "users.yaml")["registrars"][0].save()
+        reports = []
+        report = import_history(files / "history.csv", chunk_size=3, progress=lambda r: reports.append(r.rows))
+
+        assert reports == [3, 6, 8]
+        assert (report.shifts, report.leaves) == (2, 0)  # bob has no registrar
+        assert (report.first, report.last) == (date(2022, 1, 2), date(2023, 1, 2))
+        assert [line for line, _, _ in report.errors] == [2, 3, 4, 5]
+
+    def test_upsert(self, files):
+        def sync():
+            out = StringIO()
+            options = {"users": str(files / "users.yaml"), "statuses": str(files / "statuses.yaml")}
+            call_command("import", str(files / "history.csv"), upsert=True, stdout=out, stderr=StringIO(), **options)
+            return out.getvalue()
+
+        sync()
+        untouched = Shift.objects.create(date=date(2023, 1, 3), type="LONG", extra_duty=True, series=2)
+        (files / "statuses.yaml").write_text("bob:\n  type: buddy\n  start: 01/12/2021\n  finish: 31/01/2022\n")
+        (files / "history.csv").write_text(
+            "02/01/2023,bob,Long day\n"  # was alice
+            "04/01/2023,bob,Annual leave - p.m.\n"
+            "02/01/2023,alice,Long day\n"  # the same slot again
+            "06/01/2023,alice,Nights\n"
+            "02/01/2022,alice,Extra duty - long day\n"
+        )
+
+        assert "3 shifts and 1 leaves from 5 rows, 0 skipped and 1 rejected, 2 updated and 1 deleted" in sync()
+        shifts = Shift.objects.exclude(pk=untouched.pk).order_by("date")
+        assert [(s.date, s.type, s.registrar.user.username) for s in shifts] == [
+            (date(2022, 1, 2), "LONG", "alice"),
+            (date(2023, 1, 2), "LONG", "bob"),
+            (date(2023, 1, 6), "NIGHT", "alice"),
+        ]
+        assert Leave.objects.get().portion == "PM"
+        assert Status.objects.get().end == date(2022, 1, 31)
+        assert Shift.objects.filter(pk=untouched.pk).exists()  # open shifts are not in the sheet
+        # Nothing is written again when the file has not changed
+        assert "0 updated and 0 deleted" in sync()
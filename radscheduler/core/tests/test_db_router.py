@@ -0,0 +1,99 @@
+from datetime import date
+
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from radscheduler.core.db_router import STICKY_COOKIE
+from radscheduler.core.models import Leave, Shift
+from radscheduler.roster.models import LeaveType, ShiftType
+
+# The replica mirrors the test database over its own connection, so the rows must be committed
+pytestmark = pytest.mark.django_db(databases=["default", "replica"], transaction=True)
+
+CALENDAR = {"start": "2023-05-01", "end": "2023-05-31"}
+
+
+@pytest.fixture(autouse=True)
+def replica(settings):
+    settings.REPLICA_DATABASE = "replica"
+    cache.clear()
+
+
+def replica_queries(client, *args, **kwargs) -> int:
+    with CaptureQueriesContext(connections["replica"]) as queries:
+        response = client.get(*args, **kwargs)
+        if response.streaming:
+            b"".join(response.streaming_content)
+    assert response.status_code == 200
+    return len(queries)
+
+
+def test_calendar_reads_replica(client, juniors_db):
+    Shift.objects.create(date=date(2023, 5, 1), type=ShiftType.LONG, registrar=juniors_db[0])
+
+    with CaptureQueriesContext(connections["replica"]) as queries:
+        response = client.get("/api/calendar/shifts", CALENDAR)
+    assert len(response.json()) == 1
+    assert len(queries) == 2
+
+
+def test_streamed_feed_reads_replica(client, juniors_db):
+    assert replica_queries(client, reverse("ical_shifts")) > 0
+
+
+def test_other_views_read_default(client, juniors_db):
+    client.force_login(juniors_db[0].user)
+    with CaptureQueriesContext(connections["replica"]) as queries:
+        client.get(reverse("leave_page"))
+    assert len(queries) == 0
+
+
+def test_read_your_writes(client, juniors_db):
+    client.force_login(juniors_db[0].user)
+    assert replica_queries(client, "/api/calendar/shifts", CALENDAR) > 0
+
+    leave = Leave.objects.create(date=date(2023, 5, 2), type=LeaveType.ANNUAL, registrar=juniors_db[0])
+    client.post(reverse("leave_delete", args=[leave.pk]))
+    assert client.cookies[STICKY_COOKIE]
+    assert replica_queries(client, "/api/calendar/shifts", CALENDAR) == 0
+
+
+def test_read_your_writes_expires(client, juniors_db, settings):
+    settings.READ_YOUR_WRITES_SECONDS = 0
+    client.force_login(juniors_db[0].user)
+    client.post(reverse("leave_delete", args=[0]))
+    assert replica_queries(client, "/api/calendar/shifts", CALENDAR) > 0
+
+
+def test_without_replica(client, juniors_db, settings):
+    settings.REPLICA_DATABASE = None
+    assert replica_queries(client, "/api/calendar/shifts", CALENDAR) == 0
+
+
+@pytest.mark.parametrize(
+    "name, args",
+    [
+        ("calendar", []),
+        ("ical_shifts", []),
+        ("ical_leaves", []),
+        ("api-1.0.0:shift_events", []),
+        ("api-1.0.0:leave_events", []),
+        ("api-1.0.0:holiday_events", []),
+        ("leave_list", []),
+        ("leave_row", [1]),
+    ],
+)
+def test_read_only_views_are_not_atomic(name, args):
+    view = resolve(reverse(name, args=args)).func
+    assert view.read_only
+    assert "default" in view._non_atomic_requests
+
+
+@pytest.mark.parametrize("name", ["leave_page", "api-1.0.0:simulate_leave", "api-1.0.0:propose"])
+def test_other_views_are_atomic(name):
+    view = resolve(reverse(name)).func
+    assert not getattr(view, "read_only", False)
+    assert not getattr(view, "_non_atomic_requests", set())
@@ -3,9 +3,9 @@ Tests for iCal feed views.
 
 These feeds are accessed by calendar applications (Google Calendar, Apple Calendar, etc.)
 and must be fast to avoid timeouts. The main optimizations tested here:
-- Limited date range (30 days history instead of 180)
-- Query optimization with select_related and only()
-- Server-side caching (15 minutes) to reduce DB load
+- Limited date range (30 days history, bounded horizon clamped to the publish range)
+- Query optimization with select_related, only() and iterator()
+- Streamed responses, with server-side caching (15 minutes) to reduce DB load
 """
 
 from datetime import date, timedelta
@@ -14,7 +14,7 @@ import pytest
 from django.core.cache import cache
 from django.urls import reverse
 
-from radscheduler.core.models import Leave, Shift
+from radscheduler.core.models import Leave, Settings, Shift
 from radscheduler.roster.models import LeaveType, ShiftType
 
 pytestmark = pytest.mark.django_db
@@ -38,7 +38,7 @@ class TestShiftFeed:
     def test_has_cache_control_header(self, app, juniors_db):
         """Feed should have Cache-Control header for client-side caching."""
         resp = app.get(reverse("ical_shifts"))
-        # cache_page sets max-age header
+        # cache_control sets max-age header
         assert "max-age" in resp.headers.get("Cache-Control", "")
 
     def test_returns_valid_ical_format(self, app, juniors_db):
@@ -117,6 +117,63 @@ class TestShiftFeed:
         content = resp.content.decode("utf-8")
         assert "(extra)" in content
 
+    def test_excludes_shifts_beyond_horizon(self, app, juniors_db, settings):
+        """Shifts further ahead than the configured horizon should be excluded."""
+        settings.ICAL_HORIZON_DAYS = 60
+        registrar = juniors_db[0]
+        near = Shift.objects.create(date=date.today() + timedelta(days=30), type=ShiftType.LONG, registrar=registrar)
+        far = Shift.objects.create(date=date.today() + timedelta(days=90), type=ShiftType.LONG, registrar=registrar)
+        content = app.get(reverse("ical_shifts")).content.decode("utf-8")
+        assert f"shift_{near.id}" in content
+        assert f"shift_{far.id}" not in content
+
+    def test_horizon_query_param_cannot_exceed_setting(self, app, juniors_db, settings):
+        """Subscribers may shorten the horizon, but not extend it past the setting."""
+        settings.ICAL_HORIZON_DAYS = 60
+        registrar = juniors_db[0]
+        near = Shift.objects.create(date=date.today() + timedelta(days=5), type=ShiftType.LONG, registrar=registrar)
+        mid = Shift.objects.create(date=date.today() + timedelta(days=30), type=ShiftType.LONG, registrar=registrar)
+        far = Shift.objects.create(date=date.today() + timedelta(days=90), type=ShiftType.LONG, registrar=registrar)
+
+        content = app.get(reverse("ical_shifts"), {"horizon": 10}).content.decode("utf-8")
+        assert f"shift_{near.id}" in content
+        assert f"shift_{mid.id}" not in content
+
+        content = app.get(reverse("ical_shifts"), {"horizon": 1000}).content.decode("utf-8")
+        assert f"shift_{mid.id}" in content
+        assert f"shift_{far.id}" not in content
+
+    def test_clamped_to_publish_date_range(self, app, juniors_db):
+        """Shifts after the publish end date should not be leaked through the feed."""
+        Settings.objects.create(
+            publish_start_date=date.today() - timedelta(days=365),
+            publish_end_date=date.today() + timedelta(days=14),
+        )
+        registrar = juniors_db[0]
+        published = Shift.objects.create(date=date.today(), type=ShiftType.LONG, registrar=registrar)
+        unpublished = Shift.objects.create(
+            date=date.today() + timedelta(days=15), type=ShiftType.LONG, registrar=registrar
+        )
+        content = app.get(reverse("ical_shifts")).content.decode("utf-8")
+        assert f"shift_{published.id}" in content
+        assert f"shift_{unpublished.id}" not in content
+
+    def test_response_is_streamed_then_cached(self, client, juniors_db, django_assert_max_num_queries):
+        """The first request streams the calendar, later requests are served from the cache."""
+        Shift.objects.create(date=date.today(), type=ShiftType.LONG, registrar=juniors_db[0])
+
+        resp = client.get(reverse("ical_shifts"))
+        assert resp.streaming
+        content = b"".join(resp.streaming_content)
+        assert content.count(b"BEGIN:VEVENT") == 1
+        assert content.endswith(b"END:VCALENDAR\r\n")
+
+        # Only the publish settings lookup remains (plus the ATOMIC_REQUESTS savepoint)
+        with django_assert_max_num_queries(3):
+            resp = client.get(reverse("ical_shifts"))
+        assert not resp.streaming
+        assert resp.content == content
+
 
 class TestLeaveFeed:
     def test_returns_ical_content_type(self, app, juniors_db):
@@ -128,7 +185,7 @@ class TestLeaveFeed:
     def test_has_cache_control_header(self, app, juniors_db):
         """Feed should have Cache-Control header for client-side caching."""
         resp = app.get(reverse("ical_leaves"))
-        # cache_page sets max-age header
+        # cache_control sets max-age header
         assert "max-age" in resp.headers.get("Cache-Control", "")
 
     def test_returns_valid_ical_format(self, app, juniors_db):
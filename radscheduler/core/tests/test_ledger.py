@@ -0,0 +1,141 @@
+from datetime import date
+
+import pytest
+
+from radscheduler.core.ledger import ledger_fatigue, rebuild_ledger
+from radscheduler.core.models import Leave, Registrar, Shift, WorkloadLedger
+from radscheduler.core.service import retrieve_workload_breakdown
+from radscheduler.roster.models import LeaveType, ShiftType
+
+pytestmark = pytest.mark.django_db
+
+MONDAY = date(2023, 1, 2)
+
+
+class TestLedgerSignals:
+    def test_shift_creates_row(self, juniors_db):
+        reg = juniors_db[0]
+        Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=reg)  # Wed
+        Shift.objects.create(date=date(2023, 1, 7), type=ShiftType.LONG, registrar=reg)  # Sat
+
+        row = WorkloadLedger.objects.get(registrar=reg)
+        assert row.week == MONDAY
+        assert row.long == 1
+        assert row.weekend == 1
+        assert row.shift_fatigue == 1.5 + 2.0
+
+    def test_extra_duty_not_counted_as_fatigue(self, juniors_db):
+        reg = juniors_db[0]
+        Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=reg, extra_duty=True)
+
+        row = WorkloadLedger.objects.get(registrar=reg)
+        assert row.extra_duty == 1
+        assert row.long == 0
+        assert row.shift_fatigue == 0
+
+    def test_reassigned_shift_moves_between_registrars(self, juniors_db):
+        reg1, reg2 = juniors_db[0], juniors_db[1]
+        shift = Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=reg1)
+
+        shift.registrar = reg2
+        shift.save()
+
+        assert not WorkloadLedger.objects.filter(registrar=reg1).exists()
+        assert WorkloadLedger.objects.get(registrar=reg2).long == 1
+
+    def test_deleted_shift_removes_row(self, juniors_db):
+        shift = Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=juniors_db[0])
+        shift.delete()
+        assert not WorkloadLedger.objects.exists()
+
+    def test_parental_leave_adds_fatigue(self, juniors_db):
+        reg = juniors_db[0]
+        Leave.objects.create(date=date(2023, 1, 4), type=LeaveType.PARENTAL, registrar=reg)
+        Leave.objects.create(date=date(2023, 1, 5), type=LeaveType.ANNUAL, registrar=reg)
+
+        assert WorkloadLedger.objects.get(registrar=reg).leave_fatigue == pytest.approx(0.2)
+        assert ledger_fatigue(MONDAY, date(2023, 1, 8)) == {reg.id: pytest.approx(0.2)}
+
+    def test_cancelled_parental_leave_adds_no_fatigue(self, juniors_db):
+        reg = juniors_db[0]
+        leave = Leave.objects.create(date=date(2023, 1, 4), type=LeaveType.PARENTAL, registrar=reg)
+        Leave.objects.create(date=date(2023, 1, 5), type=LeaveType.PARENTAL, registrar=reg, cancelled=True)
+        assert ledger_fatigue(MONDAY, date(2023, 1, 8)) == {reg.id: pytest.approx(0.2)}
+
+        # Cancelling refreshes the week
+        leave.cancelled = True
+        leave.save()
+        assert not WorkloadLedger.objects.exists()
+        assert ledger_fatigue(MONDAY, date(2023, 1, 8)) == {}
+
+    def test_uncounted_shift_types_add_fatigue(self, juniors_db):
+        reg = juniors_db[0]
+        Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.SWING, registrar=reg, fatigue_override=3.0)
+        Shift.objects.create(date=date(2023, 1, 5), type=ShiftType.HELP, registrar=reg, stat_day=True)
+        Shift.objects.create(date=date(2023, 1, 6), type=ShiftType.SWING, registrar=reg)
+
+        row = WorkloadLedger.objects.get(registrar=reg)
+        assert row.shift_fatigue == 3.0 + 2.0
+        assert row.long == 0
+
+    def test_deleting_registrar_cascades(self, juniors_db):
+        reg = juniors_db[0]
+        Shift.objects.create(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=reg)
+        Leave.objects.create(date=date(2023, 1, 5), type=LeaveType.PARENTAL, registrar=reg)
+
+        Registrar.objects.filter(pk=reg.pk).delete()
+        assert not WorkloadLedger.objects.exists()
+
+
+class TestRebuildLedger:
+    def test_rebuild_after_bulk_create(self, juniors_db):
+        reg = juniors_db[0]
+        Shift.objects.bulk_create(
+            [
+                Shift(date=date(2023, 1, 2), type=ShiftType.NIGHT, registrar=reg),
+                Shift(date=date(2023, 1, 9), type=ShiftType.NIGHT, registrar=reg),
+            ]
+        )
+        assert not WorkloadLedger.objects.exists()
+
+        assert rebuild_ledger(date(2023, 1, 4), date(2023, 1, 10)) == 2
+        assert list(WorkloadLedger.objects.order_by("week").values_list("week", "night")) == [
+            (date(2023, 1, 2), 1),
+            (date(2023, 1, 9), 1),
+        ]
+
+
+class TestLedgerRange:
+    def test_clipped_to_range(self, juniors_db):
+        reg = juniors_db[0]
+        Shift.objects.create(date=date(2023, 1, 1), type=ShiftType.LONG, registrar=reg)  # Sun, week before
+        Shift.objects.create(date=date(2023, 1, 2), type=ShiftType.LONG, registrar=reg)  # Mon, 1.25
+        Shift.objects.create(date=date(2023, 1, 11), type=ShiftType.LONG, registrar=reg)  # Wed, 1.5
+        Shift.objects.create(date=date(2023, 1, 17), type=ShiftType.LONG, registrar=reg)  # Tue, 1.25
+
+        # Partial weeks at both edges
+        assert ledger_fatigue(date(2023, 1, 1), date(2023, 1, 16)) == {reg.id: pytest.approx(2.0 + 1.25 + 1.5)}
+        # Days before START in its week are not counted
+        assert ledger_fatigue(date(2023, 1, 3), date(2023, 1, 17)) == {reg.id: pytest.approx(1.5 + 1.25)}
+        # Within a single week
+        assert ledger_fatigue(date(2023, 1, 10), date(2023, 1, 12)) == {reg.id: pytest.approx(1.5)}
+
+
+class TestWorkloadBreakdown:
+    def test_breakdown_from_ledger(self, juniors_db):
+        reg = juniors_db[0]
+        Shift.objects.bulk_create(
+            [
+                Shift(date=date(2023, 1, 4), type=ShiftType.LONG, registrar=reg),
+                Shift(date=date(2023, 1, 6), type=ShiftType.NIGHT, registrar=reg),  # Fri
+            ]
+        )
+        # bulk_create bypasses the signals, so whole weeks are missing until the ledger is rebuilt
+        assert retrieve_workload_breakdown(MONDAY, date(2023, 1, 8)).empty
+
+        rebuild_ledger(MONDAY, date(2023, 1, 8))
+        row = retrieve_workload_breakdown(MONDAY, date(2023, 1, 8)).to_dict(orient="records")[0]
+        assert row["username"] == reg.user.username
+        assert row["LONG"] == 1
+        assert row["WKD NIGHT"] == 1
+        assert row["FATIGUE"] == 1 + 5
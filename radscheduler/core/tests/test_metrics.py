@@ -0,0 +1,128 @@
+import re
+from datetime import date, timedelta
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from radscheduler.core.db_backend.base import DatabaseWrapper
+from radscheduler.core.metrics import QueryBudgetExceeded, RequestMetrics, current_metrics, view_metrics
+from radscheduler.core.models import Leave, Shift, ShiftInterest
+from radscheduler.roster.models import LeaveType, ShiftType
+
+pytestmark = pytest.mark.django_db
+
+
+def queries(response) -> int:
+    return int(re.search(r'db;desc="(\d+) queries"', response["Server-Timing"]).group(1))
+
+
+@pytest.fixture
+def roster(juniors_db):
+    """
+    Enough rows per registrar that an N+1 shows up as extra queries.
+    """
+    monday = date.today() + timedelta(days=7 - date.today().weekday())
+    for reg in juniors_db:
+        for week in range(3):
+            Leave.objects.create(
+                date=monday + timedelta(weeks=week, days=juniors_db.index(reg)), type=LeaveType.ANNUAL, registrar=reg
+            )
+    for day in range(6):
+        shift = Shift.objects.create(date=monday + timedelta(days=day), type=ShiftType.LONG, extra_duty=True, series=2)
+        Shift.objects.create(date=shift.date, type=ShiftType.LONG, registrar=juniors_db[day % 5])
+        for reg in juniors_db[:3]:
+            ShiftInterest.objects.create(shift=shift, registrar=reg)
+    return juniors_db
+
+
+class TestMetricsMiddleware:
+    def test_server_timing(self, client):
+        response = client.get("/api/calendar/shifts", {"start": "2023-01-01", "end": "2023-01-31"})
+        assert re.fullmatch(
+            r'db;desc="2 queries";dur=[\d.]+, pool;dur=[\d.]+, tpl;dur=[\d.]+, app;dur=[\d.]+',
+            response["Server-Timing"],
+        )
+
+    def test_records_per_view(self, client, roster):
+        view_metrics.clear()
+        client.force_login(roster[0].user)
+        client.get(reverse("leave_page"))
+        client.get(reverse("leave_page"))
+
+        snapshot = view_metrics.snapshot()["leave_page"]
+        assert snapshot["requests"] == 2
+        assert snapshot["mean_template_ms"] > 0
+        assert snapshot["histogram"]["le_inf"] == 2
+
+    @override_settings(QUERY_BUDGETS={"api-1.0.0:shift_events": 1})
+    def test_over_budget_raises(self, client):
+        with pytest.raises(QueryBudgetExceeded):
+            client.get("/api/calendar/shifts", {"start": "2023-01-01", "end": "2023-01-31"})
+
+    @override_settings(QUERY_BUDGETS={"api-1.0.0:shift_events": 1}, QUERY_BUDGET_RAISE=False)
+    def test_over_budget_logs(self, client, caplog):
+        client.get("/api/calendar/shifts", {"start": "2023-01-01", "end": "2023-01-31"})
+        assert "over its budget of 1" in caplog.text
+
+
+def test_pool_wait():
+    pytest.importorskip("psycopg_pool")
+    pooled = DatabaseWrapper(
+        {**connection.settings_dict, "OPTIONS": {"pool": {"min_size": 1, "max_size": 1}}}, "pooled"
+    )
+    metrics = RequestMetrics()
+    token = current_metrics.set(metrics)
+    try:
+        pooled.ensure_connection()
+        assert pooled.pool.get_stats()["requests_num"] == 1
+    finally:
+        current_metrics.reset(token)
+        pooled.close()
+        pooled.close_pool()
+    assert metrics.pool_wait > 0
+
+
+class TestViewBudgets:
+    """
+    Render the budgeted views over a populated roster. The middleware raises if any goes over budget.
+    """
+
+    def test_leave_page(self, client, roster):
+        client.force_login(roster[0].user)
+        assert client.get(reverse("leave_page")).status_code == 200
+        assert client.get(reverse("leave_list")).status_code == 200
+        leave = {"date": "2030-03-01", "type": LeaveType.ANNUAL, "portion": "ALL", "registrar": roster[0].pk}
+        assert client.post(reverse("leave_page"), leave).status_code == 200
+        assert client.post(reverse("leave_page"), {}).status_code == 200
+
+    def test_extra_duties(self, client, roster):
+        client.force_login(roster[0].user)
+        assert client.get(reverse("extra_page")).status_code == 200
+
+    def test_extra_duties_editor(self, admin_client, roster):
+        assert admin_client.get(reverse("extra_edit_page")).status_code == 200
+
+    def test_editor(self, admin_client, roster):
+        assert admin_client.get(reverse("editor")).status_code == 200
+
+    def test_leave_admin(self, admin_client, roster):
+        assert admin_client.get(reverse("admin:core_leave_changelist")).status_code == 200
+
+    def test_workload(self, client, roster, settings):
+        settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        # Wednesday to Tuesday: partial weeks at both ends take the most queries on a miss
+        monday = date.today() + timedelta(days=7 - date.today().weekday())
+        params = {"start": monday + timedelta(days=2), "end": monday + timedelta(days=15)}
+        miss = client.get(reverse("workload"), params)
+        assert miss.status_code == 200
+        assert queries(miss) == 7
+        hit = client.get(reverse("workload"), params)
+        assert hit.status_code == 200
+        assert queries(hit) == 1
+
+    def test_calendar(self, client, roster):
+        start, end = date.today().isoformat(), (date.today() + timedelta(weeks=4)).isoformat()
+        assert client.get("/api/calendar/shifts", {"start": start, "end": end}).status_code == 200
+        assert client.get("/api/calendar/leaves", {"start": start, "end": end}).status_code == 200
@@ -1,7 +1,9 @@
 from datetime import date
 
 import pytest
+from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.urls import reverse
 from freezegun import freeze_time
 
 from radscheduler.core.models import Leave, Registrar, Shift, Status
@@ -19,6 +21,29 @@ class TestRegistrar:
         r = Registrar(user=user, start=date(2019, 12, 1), finish=date(2024, 12, 1))
         assert r.year == 4
 
+    @freeze_time("2023-8-01")
+    def test_training_year_stored_on_save(self, user):
+        r = Registrar.objects.create(user=user, start=date(2021, 2, 1))
+        assert Registrar.objects.get(pk=r.pk).training_year == 3
+
+    def test_year_unknown_without_start(self, user):
+        assert Registrar(user=user).year is None
+
+        r = Registrar.objects.create(user=user, start=date(2021, 2, 1))
+        r.start = None
+        assert r.year is None
+
+    def test_refresh_training_years(self, user):
+        with freeze_time("2023-8-01"):
+            r = Registrar.objects.create(user=user, start=date(2023, 2, 1))
+        assert r.training_year == 1
+
+        with freeze_time("2024-2-01"):
+            assert Registrar.objects.refresh_training_years() == 1
+            # Already up to date, nothing to change
+            assert Registrar.objects.refresh_training_years() == 0
+        assert Registrar.objects.get(pk=r.pk).year == 2
+
 
 class TestShift:
     def test_one_shift_per_day(self, juniors_db):
@@ -68,6 +93,81 @@ class TestStatus:
         assert s.shift_types == [ShiftType.NIGHT]
         assert s.registrar == reg
 
+    def test_overlapping(self, juniors_db):
+        reg = juniors_db[0]
+        for start, end in [(1, 10), (11, 20), (25, 31)]:
+            Status.objects.create(
+                registrar=reg,
+                start=date(2023, 8, start),
+                end=date(2023, 8, end),
+                type=StatusType.NA,
+            )
+
+        def overlapping(start, end):
+            statuses = Status.objects.overlapping(date(2023, 8, start), date(2023, 8, end))
+            return sorted(status.start.day for status in statuses)
+
+        assert overlapping(10, 11) == [1, 11]  # both ends are included
+        assert overlapping(21, 24) == []
+        assert overlapping(1, 31) == [1, 11, 25]
+
+    def test_conflicting_statuses_excluded(self, juniors_db):
+        reg = juniors_db[0]
+        Status.objects.create(
+            registrar=reg, start=date(2023, 8, 1), end=date(2023, 8, 10), type=StatusType.NA
+        )
+        Status.objects.create(
+            registrar=reg, start=date(2023, 8, 5), end=date(2023, 8, 6), type=StatusType.BUDDY
+        )
+        conflicting = Status(
+            registrar=reg, start=date(2023, 8, 10), end=date(2023, 8, 12), type=StatusType.NA
+        )
+        with pytest.raises(ValidationError):
+            conflicting.full_clean()
+        with pytest.raises(IntegrityError):
+            conflicting.save()
+
+    def test_overlapping_part_time_days(self, juniors_db):
+        reg = juniors_db[0]
+        Status.objects.create(
+            registrar=reg,
+            start=date(2023, 1, 1),
+            end=date(2023, 12, 31),
+            type=StatusType.PART_TIME,
+            shift_types=[ShiftType.NIGHT],
+        )
+        fridays = Status(
+            registrar=reg,
+            start=date(2023, 8, 1),
+            end=date(2023, 10, 31),
+            type=StatusType.PART_TIME,
+            weekdays=[Weekday.FRI],
+        )
+        fridays.full_clean()
+        fridays.save()
+
+        with pytest.raises(IntegrityError):
+            Status.objects.create(
+                registrar=reg,
+                start=date(2023, 9, 1),
+                end=date(2023, 9, 30),
+                type=StatusType.PART_TIME,
+                weekdays=[Weekday.FRI],
+            )
+
+    def test_conflicting_status_admin_error(self, admin_client, juniors_db):
+        reg = juniors_db[0]
+        Status.objects.create(
+            registrar=reg, start=date(2023, 8, 1), end=date(2023, 8, 10), type=StatusType.NA
+        )
+        response = admin_client.post(
+            reverse("admin:core_status_add"),
+            {"registrar": reg.pk, "start": "2023-08-10", "end": "2023-08-12", "type": StatusType.NA},
+        )
+        assert response.status_code == 200
+        assert "already has a status of this type" in response.content.decode()
+        assert Status.objects.count() == 1
+
 
 class TestLeave:
     def test_cancelled_leaves_filtered_by_default(self):
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from radscheduler.core.models import Leave, Shift
+from radscheduler.core.query_plans import HOT_QUERIES, forced_plans
+from radscheduler.roster import LeaveType, ShiftType
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def seeded(juniors_db, seniors_db):
+    """
+    Open shifts and cancelled leaves around today, the rows the partial indexes leave out, with the
+    statistics of the tables up to date.
+    """
+    days = [date.today() + timedelta(days=i) for i in range(-100, 100)]
+    Shift.objects.bulk_create(
+        Shift(date=day, type=shift_type, series=series)
+        for day in days
+        for shift_type in ShiftType
+        for series in range(1, 4)
+    )
+    Leave.objects.bulk_create(
+        Leave(date=day, type=LeaveType.ANNUAL, registrar=registrar, cancelled=True)
+        for day in days
+        for registrar in juniors_db + seniors_db
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE core_shift, core_leave")
+
+
+@pytest.mark.parametrize("query", HOT_QUERIES, ids=lambda query: query.name)
+def test_hot_queries_use_their_index(seeded, query):
+    assert query.index in forced_plans()[query.name]
+
+
+def test_explain_queries():
+    out = StringIO()
+    call_command("explain_queries", stdout=out)
+    assert "shift feed (expects core_shift_rostered_idx)" in out.getvalue()
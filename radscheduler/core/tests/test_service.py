@@ -1,9 +1,77 @@
-def test_generate_shifts():
-    # Some shifts were created previously
-    # Generate new shifts
-    # Ensure no duplicate shifts were generated
-    pass
+from datetime import date
+
+import pytest
+
+from radscheduler.core.models import Leave, Shift, WorkloadLedger
+from radscheduler.core.service import fill_shifts, reroster, save_roster
+from radscheduler.roster import LeaveType, RunStats, ShiftType
+
+
+@pytest.mark.django_db
+def test_generate_shifts(juniors_db, seniors_db):
+    save_roster(fill_shifts(date(2023, 1, 2), date(2023, 1, 29)))
+    saved = Shift.objects.count()
+
+    # The shifts saved before are loaded into their slots, not generated again
+    shifts = fill_shifts(date(2023, 1, 16), date(2023, 2, 12))
+    assert save_roster(shifts) == len(shifts)
+    assert all(shift.id is not None for shift in shifts)
+    assert Shift.objects.count() == saved + len([shift for shift in shifts if shift.date > date(2023, 1, 29)])
+    assert WorkloadLedger.objects.filter(week=date(2023, 2, 6)).exists()
+
+
+@pytest.mark.django_db
+def test_cancelled_leaves_ignored(juniors_db, seniors_db):
+    wednesday = date(2023, 1, 11)
+    Leave.objects.bulk_create(
+        Leave(date=wednesday, type=LeaveType.ANNUAL, registrar=registrar, cancelled=True)
+        for registrar in juniors_db + seniors_db
+    )
+
+    stats = RunStats()
+    shifts = fill_shifts(date(2023, 1, 2), date(2023, 1, 29), stats)
+    assert all(shift.registrar for shift in shifts if shift.date == wednesday)
+    assert not stats.violations
 
 
 def test_generate_buddy_shifts():
     pass
+
+
+@pytest.mark.django_db
+class TestReroster:
+    @pytest.fixture
+    def roster(self, juniors_db, seniors_db):
+        save_roster([shift for shift in fill_shifts(date(2023, 1, 2), date(2023, 2, 26)) if shift.registrar])
+        return juniors_db + seniors_db
+
+    def test_sick_on_weekend(self, roster):
+        saturday = Shift.objects.get(date=date(2023, 1, 28), type=ShiftType.LONG)
+        sick = saturday.registrar
+        Leave.objects.create(date=saturday.date, type=LeaveType.SICK, registrar=sick)
+        before = dict(Shift.objects.values_list("pk", "registrar_id"))
+
+        stats = RunStats()
+        refilled = reroster(sick.pk, saturday.date, saturday.date, stats=stats)
+
+        # Only the weekend and its RDOs are refilled
+        assert {(shift.date, shift.type) for shift in refilled} == {
+            (date(2023, 1, 23), ShiftType.RDO),
+            (date(2023, 1, 24), ShiftType.RDO),
+            (date(2023, 1, 28), ShiftType.LONG),
+            (date(2023, 1, 29), ShiftType.LONG),
+            (date(2023, 2, 2), ShiftType.RDO),
+            (date(2023, 2, 3), ShiftType.RDO),
+        }
+        after = dict(Shift.objects.values_list("pk", "registrar_id"))
+        assert {pk for pk in before if before[pk] != after[pk]} <= {shift.id for shift in refilled}
+        assert after[saturday.pk] not in (None, sick.pk)
+        assert stats.counters["shifts"] == 6
+        # The ledger follows the weekend to its new registrar
+        week = WorkloadLedger.objects.get(registrar_id=after[saturday.pk], week=date(2023, 1, 23))
+        assert week.weekend == 2
+
+    def test_nothing_to_refill(self, roster):
+        registrar = roster[0]
+        Shift.objects.filter(registrar=registrar, date__month=2).delete()
+        assert reroster(registrar.pk, date(2023, 2, 1), date(2023, 2, 28)) == []
@@ -0,0 +1,127 @@
+from datetime import date
+
+import pytest
+
+from radscheduler.core.models import Leave, Shift
+from radscheduler.core.service import fill_shifts
+from radscheduler.core.simulation import affected_window, roster_snapshot, simulate, snapshot_period
+from radscheduler.roster import LeaveType, ShiftType, StatusType
+from radscheduler.roster import models as domain
+
+START, END = date(2023, 1, 2), date(2023, 2, 26)
+URL = "/api/simulation/leave"
+
+
+def test_snapshot_period():
+    assert snapshot_period(date(2023, 1, 10), date(2023, 1, 20)) == (date(2022, 12, 5), date(2023, 3, 5))
+    assert snapshot_period(date(2023, 3, 1), date(2023, 3, 10)) == (date(2022, 12, 5), date(2023, 6, 4))
+
+
+def test_affected_window():
+    # A Wednesday: the weeks before and after are included
+    assert affected_window(date(2023, 2, 1), date(2023, 2, 1)) == (date(2023, 1, 23), date(2023, 2, 12))
+
+
+def leave(day):
+    return domain.Leave(date=day, type=LeaveType.ANNUAL, registrar=None)
+
+
+@pytest.mark.django_db
+class TestSimulate:
+    @pytest.fixture
+    def roster(self, juniors_db, seniors_db):
+        for shift in fill_shifts(START, END):
+            if shift.registrar is not None:
+                Shift.objects.create(date=shift.date, type=shift.type, registrar_id=shift.registrar.id)
+        return juniors_db + seniors_db
+
+    @pytest.fixture
+    def night(self, roster):
+        return Shift.objects.filter(date__range=[date(2023, 1, 30), date(2023, 2, 3)], type=ShiftType.NIGHT).first()
+
+    def test_leave_on_rostered_shift(self, night):
+        result = simulate(night.registrar_id, leaves=[leave(night.date)])
+        username = night.registrar.user.username
+
+        assert (result.start, result.end) == affected_window(night.date, night.date)
+        assert result.fillable
+        assert result.unfilled == [] and result.violations == []
+        assert night.pk in {shift.id for shift in result.conflicts}
+        assert result.changed > 0
+        before, after = result.fatigue[username]
+        assert after < before
+
+    def test_status(self, night):
+        status = domain.Status(start=night.date, end=night.date, type=StatusType.NA, registrar=None)
+        result = simulate(night.registrar_id, statuses=[status])
+        assert night.pk in {shift.id for shift in result.conflicts}
+
+        buddy = domain.Status(start=night.date, end=night.date, type=StatusType.BUDDY, registrar=None)
+        assert simulate(night.registrar_id, statuses=[buddy]).conflicts == []
+
+    def test_unfillable(self, roster, night):
+        # Everyone else is away for the week, no one is left to cover the nights
+        for registrar in roster:
+            if registrar.pk != night.registrar_id:
+                for day in range(30, 32):
+                    Leave.objects.create(date=date(2023, 1, day), type=LeaveType.ANNUAL, registrar=registrar)
+                for day in range(1, 6):
+                    Leave.objects.create(date=date(2023, 2, day), type=LeaveType.ANNUAL, registrar=registrar)
+
+        result = simulate(night.registrar_id, leaves=[leave(night.date)])
+        assert not result.fillable
+        assert any(shift.date == night.date for shift in result.unfilled)
+
+    def test_unknown_registrar(self, roster):
+        with pytest.raises(Exception, match="not active"):
+            simulate(0, leaves=[leave(date(2023, 2, 1))])
+
+    def test_snapshot_cached_until_changed(self, night, django_assert_num_queries):
+        simulate(night.registrar_id, leaves=[leave(night.date)])
+        # Only the cache key stamps are queried
+        with django_assert_num_queries(4):
+            result = simulate(night.registrar_id, leaves=[leave(night.date)])
+        assert night.pk in {shift.id for shift in result.conflicts}
+
+        night.delete()
+        snapshot, _ = roster_snapshot(START, END)
+        assert night.pk not in {shift.id for shift in snapshot.shifts}
+
+
+@pytest.mark.django_db
+class TestSimulationAPI:
+    @pytest.fixture
+    def registrar(self, juniors_db, seniors_db):
+        return juniors_db[0]
+
+    def test_login_required(self, client, registrar):
+        response = client.post(URL, {"dates": ["2023-02-01"]}, content_type="application/json")
+        assert response.status_code == 401
+
+    def test_own_leave(self, client, registrar):
+        client.force_login(registrar.user)
+        response = client.post(URL, {"dates": ["2023-02-01"]}, content_type="application/json")
+        assert response.status_code == 200
+        content = response.json()
+        assert content["start"] == "2023-01-23"
+        assert content["end"] == "2023-02-12"
+        assert content["fillable"] is True
+
+    def test_other_registrar(self, client, admin_client, registrar, juniors_db):
+        payload = {"registrar_id": juniors_db[1].pk, "dates": ["2023-02-01"]}
+        client.force_login(registrar.user)
+        assert client.post(URL, payload, content_type="application/json").status_code == 403
+        assert admin_client.post(URL, payload, content_type="application/json").status_code == 200
+
+        payload["registrar_id"] = 0
+        assert admin_client.post(URL, payload, content_type="application/json").status_code == 404
+
+    def test_status(self, client, registrar):
+        client.force_login(registrar.user)
+        payload = {"start": "2023-02-01", "end": "2023-01-01", "type": StatusType.PRE_EXAM}
+        response = client.post("/api/simulation/status", payload, content_type="application/json")
+        assert response.status_code == 400
+
+        payload["end"] = "2023-02-05"
+        response = client.post("/api/simulation/status", payload, content_type="application/json")
+        assert response.status_code == 200
@@ -0,0 +1,124 @@
+from datetime import date
+
+import pytest
+
+from radscheduler.core.models import Leave, Shift, SwapRequest, WorkloadLedger
+from radscheduler.core.service import fill_shifts, save_roster
+from radscheduler.core.swaps import SwapError, accept_swap, propose_swap, swap_offers
+from radscheduler.roster import LeaveType, ShiftType
+
+URL = "/api/swaps/"
+
+
+@pytest.fixture
+def roster(juniors_db, seniors_db):
+    save_roster([shift for shift in fill_shifts(date(2023, 1, 2), date(2023, 3, 5)) if shift.registrar])
+    return juniors_db + seniors_db
+
+
+@pytest.fixture
+def weekday(roster):
+    return Shift.objects.get(date=date(2023, 2, 1), type=ShiftType.LONG)
+
+
+@pytest.fixture
+def weekend(roster):
+    return Shift.objects.get(date=date(2023, 2, 4), type=ShiftType.LONG)
+
+
+def registrars(shift_ids):
+    return dict(Shift.objects.filter(pk__in=shift_ids).values_list("pk", "registrar_id"))
+
+
+@pytest.mark.django_db
+class TestSwaps:
+    def test_offers(self, weekday):
+        offers = swap_offers(weekday.pk)
+
+        assert offers
+        assert all(offer.registrar.id != weekday.registrar_id for offer in offers)
+        assert [abs(offer.impact) for offer in offers] == sorted(abs(offer.impact) for offer in offers)
+        assert [shift.id for shift in offers[0].given] == [weekday.pk]
+
+    def test_whole_blocks_are_swapped(self, weekend):
+        offers = swap_offers(weekend.pk)
+        offer = next(offer for offer in offers if offer.shift.type == ShiftType.LONG and len(offer.taken) == 1)
+
+        swap = propose_swap(weekend.pk, offer.shift.id)
+        assert (swap.proposer_id, swap.counterpart_id) == (weekend.registrar_id, offer.registrar.id)
+        accept_swap(swap)
+
+        given = registrars([shift.id for shift in offer.given])
+        assert len(given) == 6
+        assert set(given.values()) == {offer.registrar.id}
+        assert registrars([offer.shift.id]) == {offer.shift.id: weekend.registrar_id}
+        assert SwapRequest.objects.get().state == SwapRequest.State.ACCEPTED
+        # The ledger follows the weekend
+        ledger = WorkloadLedger.objects.get(registrar_id=offer.registrar.id, week=date(2023, 1, 30))
+        assert ledger.weekend == 2
+
+    def test_not_compliant(self, weekday):
+        offer = swap_offers(weekday.pk)[0]
+        # The counterpart took leave since, so it can no longer be proposed
+        Leave.objects.create(date=weekday.date, type=LeaveType.ANNUAL, registrar_id=offer.registrar.id)
+        with pytest.raises(SwapError, match="break the roster rules"):
+            propose_swap(weekday.pk, offer.shift.id)
+
+    def test_checked_again_on_accept(self, weekday):
+        offer = swap_offers(weekday.pk)[0]
+        swap = propose_swap(weekday.pk, offer.shift.id)
+
+        Shift.objects.filter(pk=offer.shift.id).update(registrar_id=weekday.registrar_id)
+        with pytest.raises(SwapError):
+            accept_swap(swap)
+        assert registrars([weekday.pk]) == {weekday.pk: weekday.registrar_id}
+
+    def test_accept_cancels_other_requests(self, weekday):
+        first, second = swap_offers(weekday.pk)[:2]
+        swap = propose_swap(weekday.pk, first.shift.id)
+        accept_swap(propose_swap(weekday.pk, second.shift.id))
+
+        swap.refresh_from_db()
+        assert swap.state == SwapRequest.State.CANCELLED
+        with pytest.raises(SwapError, match="cancelled"):
+            accept_swap(swap)
+
+
+@pytest.mark.django_db
+class TestSwapAPI:
+    def test_offers(self, client, weekday, roster):
+        other = next(registrar for registrar in roster if registrar.pk != weekday.registrar_id)
+        client.force_login(other.user)
+        assert client.get(URL + "offers", {"shift_id": weekday.pk}).status_code == 403
+
+        client.force_login(weekday.registrar.user)
+        response = client.get(URL + "offers", {"shift_id": weekday.pk, "limit": 3})
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+        assert response.json()[0]["given"][0]["id"] == weekday.pk
+
+    def test_propose_and_accept(self, client, weekday):
+        offer = swap_offers(weekday.pk)[0]
+        payload = {"shift_id": weekday.pk, "counter_shift_id": offer.shift.id, "comment": "Family wedding"}
+
+        client.force_login(weekday.registrar.user)
+        response = client.post(URL, payload, content_type="application/json")
+        assert response.status_code == 201
+        swap_id = response.json()["id"]
+        assert response.json()["counterpart"] == offer.registrar.username
+        # Only the counterpart can accept
+        assert client.post(f"{URL}{swap_id}/accept").status_code == 403
+
+        client.force_login(Shift.objects.get(pk=offer.shift.id).registrar.user)
+        assert [swap["id"] for swap in client.get(URL).json()] == [swap_id]
+        response = client.post(f"{URL}{swap_id}/accept")
+        assert response.status_code == 200
+        assert response.json()["state"] == "ACCEPTED"
+        assert registrars([weekday.pk]) == {weekday.pk: offer.registrar.id}
+        assert client.post(f"{URL}{swap_id}/decline").status_code == 409
+
+    def test_cancel(self, client, weekday):
+        swap = propose_swap(weekday.pk, swap_offers(weekday.pk)[0].shift.id)
+        client.force_login(weekday.registrar.user)
+        assert client.post(f"{URL}{swap.pk}/decline").status_code == 403
+        assert client.post(f"{URL}{swap.pk}/cancel").json()["state"] == "CANCELLED"
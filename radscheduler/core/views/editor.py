@@ -17,10 +17,12 @@ from radscheduler.core.forms import (
     ShiftAddForm,
     ShiftChangeForm,
 )
+from radscheduler.core.metrics import query_budget
 from radscheduler.core.models import Registrar, Settings, Shift, Status
 from radscheduler.core.service import *
 
 
+@query_budget(7)
 @staff_member_required
 @require_GET
 def page(request, date_=None):
@@ -1,19 +1,22 @@
-import random
 from datetime import date, timedelta
 
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models import OuterRef, Prefetch, Subquery
 from django.http import HttpResponse, JsonResponse
-from django.shortcuts import redirect, render
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
+from radscheduler.core.allocation import ExtraDutyAllocator, allocate_extra_duties
 from radscheduler.core.forms import ShiftChangeForm, ShiftInterestForm
+from radscheduler.core.metrics import query_budget
 from radscheduler.core.models import Shift, ShiftInterest, Status
 from radscheduler.core.service import get_active_registrars
 from radscheduler.roster import ShiftType, StatusType, canterbury_holidays
 
 
+@query_budget(5)
 @login_required
 def page(request):
     if hasattr(request.user, "registrar"):
@@ -74,25 +77,32 @@ def interest(request, interest_id):
         return render(request, "extra_duties/row.html", {"shift": shift, "holidays": canterbury_holidays})
 
 
+@query_budget(6)
 @staff_member_required
 def edit_page(request):
-    subquery = ShiftInterest.objects.filter(registrar=OuterRef("registrar"), shift=OuterRef("pk"))
-    buddy_shifts = Shift.objects.filter(date=OuterRef("date"), type=OuterRef("type"), extra_duty=False).values(
-        "registrar__user__username"
-    )
-    extra_shifts = (
+    extra_shifts = list(
         Shift.objects.filter(extra_duty=True, date__gte=date.today() - timedelta(days=30))
-        .annotate(
-            interest_id=Subquery(subquery.values("pk")),
-            comment=Subquery(subquery.values("comment")),
-            buddy=Subquery(buddy_shifts[:1]),
-        )
         .order_by("-date")
         .select_related("registrar__user")
-        .prefetch_related("interests", "interests__registrar__user")
+        .prefetch_related(
+            Prefetch("interests", queryset=ShiftInterest.objects.select_related("registrar__user").order_by("created"))
+        )
     )
-    end = extra_shifts.first().date if extra_shifts else date.today()
-    start = extra_shifts.last().date if extra_shifts else date.today()
+    end = extra_shifts[0].date if extra_shifts else date.today()
+    start = extra_shifts[-1].date if extra_shifts else date.today()
+
+    # The rostered shift each extra duty is a buddy of, and the comment of whoever got it
+    buddies = {}
+    for day, shift_type, username in Shift.objects.filter(
+        extra_duty=False, date__range=[start, end], registrar__isnull=False
+    ).values_list("date", "type", "registrar__user__username"):
+        buddies.setdefault((day, shift_type), username)
+    for shift in extra_shifts:
+        shift.buddy = buddies.get((shift.date, shift.type))
+        shift.comment = next(
+            (interest.comment for interest in shift.interests.all() if interest.registrar_id == shift.registrar_id),
+            None,
+        )
     registrars = get_active_registrars(start, end)
 
     return render(
@@ -103,13 +113,45 @@ def edit_page(request):
 
 
 @staff_member_required
-def interested_random_registrar(request):
-    shift_id = request.GET.get("id")
-    interests = Shift.objects.get(pk=shift_id).interests.values("registrar").all()
-    if len(interests) == 0:
-        return JsonResponse({}, safe=True)
+def suggest_registrar(request):
+    """
+    The interested registrars of an extra duty, fairest first. See `allocation`.
+    """
+    shift = get_object_or_404(Shift.objects.prefetch_related("interests"), pk=request.GET.get("id"), extra_duty=True)
+    allocator = ExtraDutyAllocator([shift])
+    candidates = allocator.rank(shift)
+    registrar = candidates[0].registrar.id if candidates and candidates[0].valid else None
+    return JsonResponse(
+        {
+            "registrar": registrar,
+            "candidates": [
+                {
+                    "registrar": candidate.registrar.id,
+                    "username": candidate.registrar.username,
+                    "extra_duties": candidate.extra_duties,
+                    "fatigue": round(candidate.fatigue, 2),
+                    "valid": candidate.valid,
+                    "score": round(candidate.score, 2),
+                }
+                for candidate in candidates
+            ],
+        }
+    )
+
+
+@require_POST
+@staff_member_required
+def allocate(request):
+    allocations = allocate_extra_duties()
+    allocated = sum(1 for allocation in allocations if allocation.registrar is not None)
+    if allocated < len(allocations):
+        messages.warning(
+            request,
+            f"Allocated {allocated} of {len(allocations)} open extra duties, the rest have no eligible applicant.",
+        )
     else:
-        return JsonResponse(random.choice(list(interests)), safe=True)
+        messages.success(request, f"Allocated {allocated} open extra duties.")
+    return redirect("extra_edit_page")
 
 
 @staff_member_required
@@ -5,11 +5,14 @@ from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import get_object_or_404, redirect, render
 
+from radscheduler.core.db_router import read_only
 from radscheduler.core.forms import LeaveForm
+from radscheduler.core.metrics import query_budget
 from radscheduler.core.models import Leave
 from radscheduler.roster import canterbury_holidays
 
 
+@query_budget(11)
 @login_required
 def leave_page(request):
     try:
@@ -58,6 +61,7 @@ def leave_form_inline(request, pk):
     return render(request, "leaves/form_inline.html", {"form": form})
 
 
+@read_only
 @login_required
 def leave_row(request, pk):
     leave = get_object_or_404(Leave, pk=pk)
@@ -72,6 +76,8 @@ def leave_delete(request, pk):
     return redirect("leave_list")
 
 
+@read_only
+@query_budget(3)
 @login_required
 def leave_list(request):
     rows = Leave.objects.filter(registrar__user=request.user).order_by("-date")
@@ -1,9 +1,12 @@
 import json
 from datetime import date
 
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import HttpResponse, render
 
+from radscheduler.core.audit import audit_report
 from radscheduler.core.forms import DateRangeForm
+from radscheduler.core.metrics import query_budget
 from radscheduler.core.service import group_shifts_by_date_and_type, retrieve_roster, retrieve_workload_breakdown
 
 
@@ -29,6 +32,9 @@ def get_roster(request):
             return HttpResponse(events_json, content_type="application/json")
 
 
+# On a cache miss: the ledger stamp of the cache key, the whole weeks, the shifts and leaves of
+# each partial edge week, and the usernames. A hit reads the stamp only.
+@query_budget(7)
 def get_workload(request):
     """
     Various rankings of registrar workload
@@ -42,3 +48,22 @@ def get_workload(request):
             workload = retrieve_workload_breakdown(start, end)
             events_json = workload.to_json(orient="table", index=False)
             return HttpResponse(events_json, content_type="application/json")
+
+
+@staff_member_required
+def get_audit(request):
+    """
+    MECA compliance audit of a date range, as CSV or JSON (`?format=json`).
+    """
+    form = DateRangeForm(request.GET)
+    if not form.is_valid():
+        return HttpResponse(form.errors.as_json(), status=400, content_type="application/json")
+
+    start, end = form.cleaned_data["start"], form.cleaned_data["end"]
+    report = audit_report(start, end)
+    if request.GET.get("format") == "json":
+        return HttpResponse(report.to_json(), content_type="application/json")
+
+    response = HttpResponse(report.to_csv(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="audit-{start}-{end}.csv"'
+    return response
@@ -19,7 +19,7 @@ class UserInfo:
     training_programme: str = "Diagnostic Radiology"
     supervisor: str = "Stefan Gabrielson"
     signature: str = ""
-    sign_date: date = date.today().strftime("%d/%m/%Y")
+    sign_date: str = field(default_factory=lambda: date.today().strftime("%d/%m/%Y"))
 
 
 @dataclass
@@ -0,0 +1,113 @@
+"""
+Background print jobs.
+
+Printing a big batch of leave forms from the admin queues a `PrintJob` instead of rendering it in the
+request. A worker renders the forms to a file in the media storage, marks the leaves printed, and the
+file is then downloaded from the job's admin page. The worker is either a thread of the web process,
+woken whenever a job is queued, or the `print_worker` command.
+"""
+
+import logging
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from radscheduler.core.models import Leave, PrintJob
+
+from .render import write_leaves
+
+logger = logging.getLogger(__name__)
+
+INLINE_MAX_LEAVES = 20  # smaller batches are still printed in the request
+
+
+def enqueue(leave_ids, user=None) -> PrintJob:
+    """
+    Queue a print job for the leaves LEAVE_IDS, started once the current transaction commits.
+    """
+    job = PrintJob.objects.create(requested_by=user)
+    PrintJob.leaves.through.objects.bulk_create(
+        PrintJob.leaves.through(printjob=job, leave_id=leave_id) for leave_id in leave_ids
+    )
+    if settings.PRINT_JOBS_IN_PROCESS:
+        transaction.on_commit(_wake_worker)
+    return job
+
+
+def claim() -> PrintJob | None:
+    """
+    The oldest queued job, marked running. Jobs claimed by other workers are skipped.
+    """
+    with transaction.atomic():
+        job = (
+            PrintJob.objects.select_for_update(skip_locked=True)
+            .filter(state=PrintJob.State.QUEUED)
+            .order_by("created")
+            .first()
+        )
+        if job is not None:
+            job.state = PrintJob.State.RUNNING
+            job.save(update_fields=["state", "last_edited"])
+    return job
+
+
+def run(job: PrintJob):
+    """
+    Render JOB to its file and mark its leaves printed, or record why it failed.
+    """
+    leaves = Leave.objects.filter(print_jobs=job)
+    try:
+        # Spooled to a temporary file so the PDF is never held in memory whole
+        with tempfile.TemporaryFile() as stream:
+            write_leaves(leaves, stream)
+            stream.seek(0)
+            job.file.save(f"leaves-{job.pk}.pdf", File(stream), save=False)
+        leaves.update(printed=True)
+        job.state = PrintJob.State.DONE
+    except Exception as e:
+        logger.exception("Print job %s failed", job.pk)
+        job.state = PrintJob.State.FAILED
+        job.error = str(e)
+    job.finished = timezone.now()
+    job.save()
+
+
+def run_queued() -> int:
+    """
+    Run queued jobs until there are none left, and return how many were run.
+    """
+    count = 0
+    while (job := claim()) is not None:
+        run(job)
+        count += 1
+    return count
+
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _work():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        try:
+            run_queued()
+        except Exception:
+            logger.exception("Print worker failed")
+        finally:
+            close_old_connections()
+
+
+def _wake_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name="print-worker", daemon=True)
+            _worker.start()
+    _wakeup.set()
@@ -1,10 +1,13 @@
 import io
+import threading
 from datetime import date, timedelta
+from functools import cache
 from itertools import groupby
 from math import ceil
 
 import reportlab.pdfgen.canvas as pdf_canvas
-from pypdf import PdfReader, PdfWriter
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject
 from reportlab.lib.pagesizes import A4
 
 from radscheduler.core.models import Leave
@@ -136,24 +139,82 @@ def add_stamp(canvas):
     canvas.drawString(10, 30, "Director of Training approved")
 
 
-def same_user_same_leave_type(pdf, overlay, form_class, leaves):
-    if not leaves:
-        return
+_template_lock = threading.Lock()  # the cached readers are shared between threads
+
+
+@cache
+def template_page(pdf_path) -> PageObject:
+    """
+    The blank form at PDF_PATH, parsed once per process.
+    """
+    return PdfReader(pdf_path).pages[0]
+
+
+def fill_page(canvas, form_class, user, rows):
+    fill_header(canvas, form_class.header_fields, user)
+    for row_number, row in enumerate(rows):
+        fill_row(canvas, row_number, form_class, row)
+    add_stamp(canvas)
 
+
+def render_overlay(form_class, leaves) -> bytes:
+    """
+    The text written on the FORM_CLASS pages of one registrar's LEAVES of one type, one page per form.
+
+    The overlay only depends on the leaves, so it can be rendered in another process and cached.
+    """
     user = leaves[0].registrar.user
     rows = leaves_to_rows(leaves)
 
-    form_path = form_class.pdf_path
-    form = PdfReader(form_path).pages[0]
-
-    rows_per_page = [rows[i : i + form_class.ROW_LIMIT] for i in range(0, len(rows), form_class.ROW_LIMIT)]
-    for rel_page_number, rows in enumerate(rows_per_page):
-        fill_header(overlay, form_class.header_fields, user)
-        for row_number, row in enumerate(rows):
-            fill_row(overlay, row_number, form_class, row)
-        add_stamp(overlay)
+    buffer = io.BytesIO()
+    overlay = pdf_canvas.Canvas(buffer, pagesize=A4)
+    for i in range(0, len(rows), form_class.ROW_LIMIT):
+        fill_page(overlay, form_class, user, rows[i : i + form_class.ROW_LIMIT])
         overlay.showPage()
-        pdf.add_page(form)
+    overlay.save()
+    return buffer.getvalue()
+
+
+def _add_stream(pdf, data: bytes, **entries):
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    stream.update({NameObject(f"/{key}"): value for key, value in entries.items()})
+    return pdf._add_object(stream)
+
+
+def add_overlay(pdf, form_class, overlay: bytes):
+    """
+    Append a blank FORM_CLASS page to PDF for each page of OVERLAY, with the overlay page drawn over it.
+
+    Each overlay page is added as a form XObject drawn after the form's own content stream, which all
+    pages share, so the form is neither parsed nor copied for each page.
+    """
+    for overlay_page in PdfReader(io.BytesIO(overlay)).pages:
+        with _template_lock:
+            page = pdf.add_page(template_page(form_class.pdf_path))
+        xobject = _add_stream(
+            pdf,
+            overlay_page.get_contents().get_data(),
+            Type=NameObject("/XObject"),
+            Subtype=NameObject("/Form"),
+            BBox=ArrayObject(overlay_page.mediabox),
+            Resources=overlay_page["/Resources"].clone(pdf),
+        )
+        resources = DictionaryObject(page["/Resources"])
+        xobjects = DictionaryObject(resources.get("/XObject", {}))
+        xobjects[NameObject("/Overlay")] = xobject
+        resources[NameObject("/XObject")] = xobjects
+        page[NameObject("/Resources")] = resources
+        page[NameObject("/Contents")] = ArrayObject(
+            [_add_stream(pdf, b"q\n"), page.raw_get("/Contents"), _add_stream(pdf, b"\nQ\n/Overlay Do\n")]
+        )
+    return pdf
+
+
+def same_user_same_leave_type(pdf, form_class, leaves):
+    if not leaves:
+        return pdf
+    return add_overlay(pdf, form_class, render_overlay(form_class, leaves))
 
 
 def dispatch_form(leave_type):
@@ -163,9 +224,9 @@ def dispatch_form(leave_type):
         return EducationLeaveForm
 
 
-def same_user_different_leave_forms(pdf, overlay, leaves):
+def same_user_different_leave_forms(pdf, leaves):
     """
-    Append a list of leaves of different types from a single user into the given PDF.
+    Append a list of leaves of different types from a single user into the given PDF, and return it.
     """
     leaves = sorted(leaves, key=lambda leave: leave.type)
     groups = groupby(leaves, key=lambda leave: leave.type)
@@ -173,7 +234,9 @@ def same_user_different_leave_forms(pdf, overlay, leaves):
     for leave_type, leaves in groups:
         leaves = list(leaves)
         form_class = dispatch_form(leave_type)
-        same_user_same_leave_type(pdf, overlay, form_class, leaves)
+        if form_class is not None:
+            same_user_same_leave_type(pdf, form_class, leaves)
+    return pdf
 
 
 def leaves_to_pdf(leaves):
@@ -181,18 +244,8 @@ def leaves_to_pdf(leaves):
     leaves_grouped_by_registrars = [list(leaves) for _, leaves in groupby(leaves, key=lambda leave: leave.registrar)]
 
     pdf = PdfWriter()
-    canvas_buffer = io.BytesIO()
-    canvas = pdf_canvas.Canvas(canvas_buffer, pagesize=A4)
-
     for leaves in leaves_grouped_by_registrars:
-        same_user_different_leave_forms(pdf, canvas, leaves)
-
-    canvas.save()
-    canvas_buffer.seek(0)
-
-    overlay = PdfReader(canvas_buffer)
-    for page_num, page in enumerate(pdf.pages):
-        page.merge_page(overlay.pages[page_num], over=True)
+        same_user_different_leave_forms(pdf, leaves)
     return pdf
 
 
@@ -0,0 +1,119 @@
+"""
+Leave form printing for batches.
+
+A batch is split into parts, one per registrar and leave type, in the order `leaves_to_pdf` prints them.
+The overlay of each part (the text written on its forms) is cached, keyed by its leaves' ids and
+`last_edited` stamps and the registrar's details, and the overlays missing from the cache are rendered
+across a process pool. They are then stamped on the blank forms in order. Whole batches are cached as
+well, so reprinting a batch that has not changed is a single cache hit.
+"""
+
+import hashlib
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import cache
+from itertools import groupby
+
+import django
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from pypdf import PdfWriter
+
+from .pdf import add_overlay, dispatch_form, remove_stat_and_weekend_days, render_overlay
+
+FORM_CACHE_SECONDS = 60 * 60 * 24
+PARALLEL_MIN_PARTS = 8  # fewer overlays than this to render are not worth sending to the pool
+
+
+def split_parts(leaves) -> list[tuple[type, list]]:
+    """
+    The form class and leaves of each part of a batch, by registrar then leave type.
+    """
+    parts = []
+    leaves = sorted(leaves, key=lambda leave: (leave.registrar.id, leave.type))
+    for _, part in groupby(leaves, key=lambda leave: (leave.registrar.id, leave.type)):
+        part = list(part)
+        form_class = dispatch_form(part[0].type)
+        if form_class is not None:  # parental leave has no paper form
+            parts.append((form_class, part))
+    return parts
+
+
+def _part_key(form_class, leaves) -> str:
+    user = leaves[0].registrar.user
+    stamps = [
+        form_class.__name__,
+        user.name,
+        user.employee_number,
+        user.phone,
+        date.today(),  # the forms are signed today
+        sorted((leave.id, leave.last_edited) for leave in leaves),
+    ]
+    return "leave-form:" + hashlib.md5(repr(stamps).encode()).hexdigest()
+
+
+@cache
+def _pool() -> ProcessPoolExecutor:
+    # Spawned rather than forked, so the workers do not inherit the request's database connections
+    return ProcessPoolExecutor(
+        max_workers=settings.PAPER_FORMS_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    )
+
+
+def render_overlays(parts) -> list[bytes]:
+    """
+    The overlay of each of PARTS, from the cache or rendered.
+    """
+    keys = [_part_key(form_class, leaves) for form_class, leaves in parts]
+    overlays = django_cache.get_many(keys)
+    missing = [(key, part) for key, part in zip(keys, parts) if key not in overlays]
+
+    if settings.PAPER_FORMS_WORKERS and len(missing) >= PARALLEL_MIN_PARTS:
+        chunksize = -(-len(missing) // settings.PAPER_FORMS_WORKERS)  # one round trip per worker
+        rendered = _pool().map(render_overlay, *zip(*(part for _, part in missing)), chunksize=chunksize)
+    else:
+        rendered = (render_overlay(form_class, leaves) for _, (form_class, leaves) in missing)
+    rendered = dict(zip((key for key, _ in missing), rendered))
+    django_cache.set_many(rendered, FORM_CACHE_SECONDS)
+
+    overlays.update(rendered)
+    return [overlays[key] for key in keys]
+
+
+def _batch_parts(leaves):
+    if hasattr(leaves, "select_related"):
+        leaves = leaves.select_related("registrar__user")
+    return split_parts(remove_stat_and_weekend_days(leaves))
+
+
+def _write(parts, stream):
+    pdf = PdfWriter()
+    for (form_class, _), overlay in zip(parts, render_overlays(parts)):
+        add_overlay(pdf, form_class, overlay)
+    pdf.write(stream)
+
+
+def write_leaves(leaves, stream):
+    """
+    Write the leave forms of LEAVES from different users to STREAM as a single PDF.
+    """
+    _write(_batch_parts(leaves), stream)
+
+
+def print_leaves(leaves) -> io.BytesIO:
+    """
+    The leave forms of LEAVES from different users as a single PDF, like `leaves_to_buffer`.
+    """
+    parts = _batch_parts(leaves)
+    key = "leave-forms:" + hashlib.md5(repr([_part_key(*part) for part in parts]).encode()).hexdigest()
+    content = django_cache.get(key)
+    if content is None:
+        buffer = io.BytesIO()
+        _write(parts, buffer)
+        content = buffer.getvalue()
+        django_cache.set(key, content, FORM_CACHE_SECONDS)
+    return io.BytesIO(content)
@@ -1,11 +1,26 @@
-from datetime import date
+import io
+from datetime import date, timedelta
 
-from pypdf import PdfWriter
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from pypdf import PdfReader, PdfWriter
 
-from radscheduler.core.models import Leave
+from radscheduler.core.models import Leave, PrintJob
 from radscheduler.roster.models import LeaveType
 
-from .pdf import *
+from . import jobs, render
+from .forms import EducationLeaveForm
+from .pdf import (
+    combine_consecutive_leaves,
+    is_consecutive,
+    leaves_to_pdf,
+    leaves_to_rows,
+    remove_stat_and_weekend_days,
+    same_user_different_leave_forms,
+    template_page,
+)
+from .render import print_leaves
 
 
 def test_combine_consecutive_leaves(juniors_db):
@@ -81,3 +96,109 @@ def test_remove_stat_and_weekend_days(juniors_db):
         Leave(date=date(2021, 12, 25), type=LeaveType.ANNUAL, registrar=juniors_db[0]),  # Xmas
     ]
     assert remove_stat_and_weekend_days(leaves) == []
+
+
+def test_each_page_has_its_own_overlay(juniors_db):
+    # Every other weekday, so each leave is a row of its own, over two pages
+    leaves = [
+        Leave(date=date(2021, 1, 4) + timedelta(weeks=week, days=day), type=LeaveType.ANNUAL, registrar=juniors_db[0])
+        for week in range(4)
+        for day in (0, 2, 4)
+    ]
+    template_page.cache_clear()
+    pdf = leaves_to_pdf(leaves)
+
+    assert len(pdf.pages) == 2
+    assert template_page.cache_info().misses == 1
+    first, second = (page.extract_text() for page in pdf.pages)
+    assert "04/01/2021" in first and "04/01/2021" not in second
+    assert "29/01/2021" in second and "29/01/2021" not in first
+    assert "LEAVE REPORTING FORM" in second
+
+
+@pytest.fixture
+def batch(juniors_db):
+    caches["default"].clear()
+    leaves = []
+    for registrar in juniors_db:
+        leaves.append(Leave.objects.create(date=date(2021, 2, 1), type=LeaveType.ANNUAL, registrar=registrar))
+        leaves.append(Leave.objects.create(date=date(2021, 2, 3), type=LeaveType.EDU, registrar=registrar))
+    return Leave.objects.filter(pk__in=[leave.pk for leave in leaves])
+
+
+def counting(monkeypatch, name):
+    calls = []
+    function = getattr(render, name)
+    monkeypatch.setattr(render, name, lambda *args: calls.append(args) or function(*args))
+    return calls
+
+
+def test_print_leaves_cached(batch, monkeypatch):
+    content = print_leaves(batch).getvalue()
+    assert len(PdfReader(io.BytesIO(content)).pages) == 10
+
+    # The same batch again is a single cache hit
+    monkeypatch.setattr(render, "add_overlay", None)
+    assert print_leaves(batch).getvalue() == content
+    monkeypatch.undo()
+
+    # Only the part that changed is rendered again
+    batch.filter(type=LeaveType.EDU).first().save()
+    rendered = counting(monkeypatch, "render_overlay")
+    assert len(PdfReader(print_leaves(batch)).pages) == 10
+    assert [form_class for form_class, _ in rendered] == [EducationLeaveForm]
+
+
+def test_print_leaves_in_parallel(batch, juniors_db, settings, monkeypatch):
+    settings.PAPER_FORMS_WORKERS = 2
+    monkeypatch.setattr(render, "PARALLEL_MIN_PARTS", 2)
+    pdf = PdfReader(print_leaves(batch))
+
+    assert len(pdf.pages) == 10
+    # In the order of `leaves_to_pdf`, by registrar then leave type
+    assert ["01/02/2021" in page.extract_text() for page in pdf.pages] == [True, False] * 5
+    assert juniors_db[0].user.name in pdf.pages[0].extract_text()
+
+
+def test_print_job(batch, admin_user):
+    job = jobs.enqueue(batch.values_list("pk", flat=True), admin_user)
+    assert job.state == PrintJob.State.QUEUED
+
+    assert jobs.run_queued() == 1
+    job.refresh_from_db()
+    assert job.state == PrintJob.State.DONE and job.finished
+    with job.file.open("rb") as file:
+        assert len(PdfReader(file).pages) == 10
+    assert all(batch.values_list("printed", flat=True))
+    assert jobs.run_queued() == 0
+
+
+def test_failed_print_job(batch, monkeypatch):
+    def fail(leaves, stream):
+        raise ValueError("Out of paper")
+
+    monkeypatch.setattr(jobs, "write_leaves", fail)
+    job = jobs.enqueue(batch.values_list("pk", flat=True))
+    jobs.run_queued()
+
+    job.refresh_from_db()
+    assert (job.state, job.error) == (PrintJob.State.FAILED, "Out of paper")
+    assert not any(batch.values_list("printed", flat=True))
+
+
+def test_print_selected_in_background(admin_client, batch, monkeypatch):
+    monkeypatch.setattr(jobs, "INLINE_MAX_LEAVES", 1)
+    url = reverse("admin:core_leave_changelist")
+    data = {"action": "print_selected", "_selected_action": list(batch.values_list("pk", flat=True))}
+
+    response = admin_client.post(url, data)
+    assert response.status_code == 302
+    job = PrintJob.objects.get()
+    assert job.leaves.count() == 10
+
+    download = reverse("admin:core_printjob_download", args=[job.pk])
+    assert admin_client.get(download).status_code == 404
+    jobs.run_queued()
+    response = admin_client.get(download)
+    assert response.status_code == 200
+    assert len(PdfReader(io.BytesIO(b"".join(response.streaming_content))).pages) == 10
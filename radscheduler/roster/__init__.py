@@ -2,3 +2,19 @@ from .assigner import AutoAssigner
 from .generator import canterbury_holidays
 from .models import Leave, LeaveType, Registrar, Shift, ShiftType, Status, StatusType, Weekday
 from .rosters import SingleOnCallRoster
+from .stats import RunStats
+
+__all__ = [
+    "AutoAssigner",
+    "Leave",
+    "LeaveType",
+    "Registrar",
+    "RunStats",
+    "Shift",
+    "ShiftType",
+    "SingleOnCallRoster",
+    "Status",
+    "StatusType",
+    "Weekday",
+    "canterbury_holidays",
+]
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from datetime import date, timedelta
 from random import choice, shuffle
 
@@ -14,6 +15,7 @@ from .models import (
     Weekday,
 )
 from .rosters import SingleOnCallRoster
+from .stats import RunStats
 from .utils import filter_shifts, find_registrar_from_shifts, sort_shifts_by_date
 from .validators import StonzMecaValidator
 
@@ -28,14 +30,20 @@ class AutoAssigner:
         filled: list[Shift] = [],
         leaves: list[Leave] = [],
         statuses: list[Status] = [],
+        ledger_fatigue: dict[int, float] = None,
+        stats: RunStats = None,
     ):
         self.registrars = registrars
         self.leaves = leaves
         self.statuses = statuses
 
+        # Pre-aggregated shift and leave fatigue by registrar id (see core.ledger).
+        # When given, the baseline is read from it instead of scanning filled shifts and leaves.
+        self.ledger_fatigue = ledger_fatigue
         self.baseline_fatigue = None
         self.filled = filled
         self.unfilled = unfilled
+        self.stats = stats or RunStats()
 
     def fill_roster(self) -> list[Shift]:
         results: list[Shift] = []
@@ -44,6 +52,9 @@ class AutoAssigner:
         for shift in shifts:
             results.append(self._fill_shift(shift, results))
 
+        self.stats.counters["shifts"] += len(results)
+        self.stats.counters["unfilled"] += sum(1 for shift in results if shift.registrar is None)
+
         for idx, shift in enumerate(results):
             shift.input_id = idx
 
@@ -87,6 +98,61 @@ class AutoAssigner:
         shift.registrar = registrar
         return shift
 
+    @staticmethod
+    def coupled_slots(shift: Shift) -> list[tuple[date, ShiftType]]:
+        """
+        The (date, type) slots whose registrar is tied to SHIFT's by `_fill_shift`, in the same series:
+
+        - a weekend is worked by one registrar, who has the RDOs on Monday and Tuesday before and
+          Thursday and Friday after
+        - a block of nights (Monday to Thursday, or Friday to Sunday) is worked by one registrar,
+          who sleeps three days after each night
+        """
+        day = shift.date
+        match DetailedShiftType.from_shift(shift):
+            case DetailedShiftType.WEEKEND:
+                saturday = day - timedelta(days=day.weekday() - Weekday.SAT)
+                return [(saturday + timedelta(days=n), ShiftType.LONG) for n in (0, 1)] + [
+                    (saturday + timedelta(days=n), ShiftType.RDO) for n in (-5, -4, 5, 6)
+                ]
+            case DetailedShiftType.RDO:
+                if day.weekday() in [Weekday.MON, Weekday.TUE]:
+                    saturday = day + timedelta(days=Weekday.SAT - day.weekday())
+                else:
+                    saturday = day - timedelta(days=day.weekday() - Weekday.SAT + 7)
+                return [(saturday, ShiftType.LONG)]
+            case DetailedShiftType.NIGHT | DetailedShiftType.WEEKEND_NIGHT:
+                offset = day.weekday() if day.weekday() < Weekday.FRI else day.weekday() - Weekday.FRI
+                first = day - timedelta(days=offset)
+                nights = 4 if first.weekday() == Weekday.MON else 3
+                return [(first + timedelta(days=n), ShiftType.NIGHT) for n in range(nights)] + [
+                    (first + timedelta(days=n + 3), ShiftType.SLEEP) for n in range(nights)
+                ]
+            case DetailedShiftType.SLEEP:
+                return [(day - timedelta(days=3), ShiftType.NIGHT)]
+        return []
+
+    @classmethod
+    def coupled_shifts(cls, seeds: list[Shift], shifts: list[Shift]) -> list[Shift]:
+        """
+        The smallest set of SHIFTS containing SEEDS that can be refilled without breaking a coupled block.
+
+        Extra duties are never included.
+        """
+        slots = {s.slot: s for s in shifts if not s.extra_duty}
+        result = {}
+        pending = [s for s in seeds if not s.extra_duty]
+        while pending:
+            shift = pending.pop()
+            if shift.slot in result:
+                continue
+            result[shift.slot] = shift
+            for day, shift_type in cls.coupled_slots(shift):
+                coupled = slots.get((day, shift_type, shift.series))
+                if coupled is not None:
+                    pending.append(coupled)
+        return sort_shifts_by_date(list(result.values()))
+
     @classmethod
     def sort_shifts(cls, shifts: [Shift]) -> [Shift]:
         # shifts = shifts[:]
@@ -124,6 +190,7 @@ class AutoAssigner:
             ranked = sorted(zip(similarly_fatigued_registrars, shift_type_numbers), key=lambda x: x[1])
 
             for (registrar, _), _ in ranked:
+                self.stats.counters["candidates"] += 1
                 if self.validate_shift(shift, registrar, proposal):
                     return registrar
             continue
@@ -162,6 +229,7 @@ class AutoAssigner:
         return find_registrar_from_shifts(shifts, saturday, ShiftType.LONG, series=shift.series)
 
     def validate_shift(self, shift, registrar, proposal) -> bool:
+        self.stats.counters["validations"] += 1
         shifts = proposal + self.filled
         validator = StonzMecaValidator(shift, registrar, shifts, leaves=self.leaves, statuses=self.statuses)
         return validator.is_valid()
@@ -171,13 +239,20 @@ class AutoAssigner:
         shifts = self.filled
         for registrar in self.registrars:
             total: float = 0
-            leave_fatigue = [
-                SingleOnCallRoster.leave_fatigue(leave) for leave in self.leaves if leave.registrar == registrar
-            ]
             status_fatigue = self.baseline_status_fatigue(
                 [status for status in self.statuses if status.registrar == registrar]
             )
-            total += sum(leave_fatigue) + sum(status_fatigue)
+            total += sum(status_fatigue)
+
+            if self.ledger_fatigue is not None:
+                total += self.ledger_fatigue.get(registrar.id, 0.0)
+                result.append((registrar, total))
+                continue
+
+            leave_fatigue = [
+                SingleOnCallRoster.leave_fatigue(leave) for leave in self.leaves if leave.registrar == registrar
+            ]
+            total += sum(leave_fatigue)
 
             shift_fatigue = [
                 SingleOnCallRoster.shift_fatigue(shift)
@@ -208,11 +283,16 @@ class AutoAssigner:
         if not self.baseline_fatigue:
             self.baseline_fatigue = self.registrars_baseline_fatigue()
 
+        proposed = defaultdict(list)  # Registrar is unhashable, group by username
+        for shift in proposal:
+            if shift.registrar is not None:
+                proposed[shift.registrar.username].append(shift)
+
         result = []
         for registrar, baseline in self.baseline_fatigue:
             shift_fatigue = [
                 self.shift_fatigue_with_recency_bias(shift, current)
-                for shift in proposal
+                for shift in proposed[registrar.username]
                 if shift.registrar == registrar
             ]
             total = baseline + sum(shift_fatigue)
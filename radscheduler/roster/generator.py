@@ -17,6 +17,7 @@ def generate_shifts(roster, start: date, end: date, filled: [Shift] = []) -> lis
     If a shift is already filled, then it is not generated.
     """
     results = []
+    filled = {shift.slot for shift in filled}
 
     for day in daterange(start, end + timedelta(days=1)):
         match day.weekday():
@@ -39,15 +40,12 @@ def generate_shifts(roster, start: date, end: date, filled: [Shift] = []) -> lis
     return results
 
 
-def _gen_shifts(day, shifts, filled) -> [Shift]:
+def _gen_shifts(day, shifts, filled: set) -> [Shift]:
     result = []
     for shiftType, count in shifts:
         for i in range(count):
             series = i + 1
-            identical_shifts = [
-                shift for shift in filled if shift.same_shift(Shift(date=day, type=shiftType, series=series))
-            ]
-            if not identical_shifts:
+            if (day, shiftType, series) not in filled:
                 result.append(Shift(date=day, type=shiftType, series=series))
     return result
 
@@ -74,19 +72,13 @@ def mark_stat_day(shift: Shift, day_shifts: [ShiftType], night_shifts: [ShiftTyp
 
 def merge_shifts(*args) -> list[Shift]:
     """
-    Merge shifts that are the same date and type.
+    Merge shifts that are in the same slot (date, type and series).
 
     If the shift has a registrar, then the registrar is kept.
     """
-    shifts = [shift for arg in args for shift in arg]
-    result = []
-    sorted_shifts = sorted(shifts, key=lambda shift: (shift.date, shift.type, shift.series))
-    for i, shift in enumerate(sorted_shifts):
-        if next_shift := sorted_shifts[i + 1] if i + 1 < len(sorted_shifts) else None:
-            if shift.same_shift(next_shift):
-                if shift.registrar:
-                    next_shift.registrar = shift.registrar
-                    next_shift.id = shift.id
-                continue
-        result.append(shift)
-    return sort_shifts_by_date(result)
+    slots = {}
+    for shift in (shift for arg in args for shift in arg):
+        kept = slots.setdefault(shift.slot, shift)
+        if kept is not shift and shift.registrar and not kept.registrar:
+            slots[shift.slot] = shift
+    return sort_shifts_by_date(slots.values())
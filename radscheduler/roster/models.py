@@ -99,8 +99,13 @@ class Shift:
             return self.date.weekday() in [Weekday.FRI, Weekday.SAT, Weekday.SUN]
         return False
 
+    @property
+    def slot(self) -> tuple[date, ShiftType, int]:
+        """The identity of a shift in the roster, unique in the database"""
+        return self.date, self.type, self.series
+
     def same_shift(self, shift):
-        return self.date == shift.date and self.type == shift.type and self.series == shift.series
+        return self.slot == shift.slot
 
 
 @dataclass
@@ -0,0 +1,49 @@
+"""
+Per-stage timings and counters of a roster generation run.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass
+class RunStats:
+    """
+    Collected by `service.fill_shifts` (stage timings) and `AutoAssigner` (counters):
+
+    - shifts: shifts the assigner was asked to fill
+    - unfilled: shifts left without a registrar
+    - candidates: registrars examined for shifts picked by fatigue
+    - validations: `StonzMecaValidator` runs
+
+    and the `validate_roster` violations of the filled roster.
+    """
+
+    timings: dict[str, float] = field(default_factory=dict)  # seconds per stage
+    counters: Counter = field(default_factory=Counter)
+    violations: list = field(default_factory=list)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    @property
+    def total(self) -> float:
+        return sum(self.timings.values())
+
+    @property
+    def candidates_per_shift(self) -> float:
+        return self.counters["candidates"] / self.counters["shifts"] if self.counters["shifts"] else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "timings": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            "counters": dict(self.counters)
+            | {"candidates_per_shift": round(self.candidates_per_shift, 1), "violations": len(self.violations)},
+        }
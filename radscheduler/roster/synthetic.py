@@ -0,0 +1,118 @@
+"""
+Seeded synthetic registrars, leaves and statuses for benchmarks and load testing.
+
+The same seed always produces the same data.
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from random import Random
+
+from .models import Leave, LeaveType, Registrar, Status, StatusType, Weekday
+from .utils import daterange
+
+LEAVE_TYPES = [LeaveType.ANNUAL] * 6 + [LeaveType.EDU, LeaveType.CONF, LeaveType.SICK, LeaveType.LIEU]
+
+
+@dataclass
+class SyntheticRoster:
+    start: date
+    end: date
+    registrars: list[Registrar]
+    leaves: list[Leave]
+    statuses: list[Status]
+
+
+def synthetic_registrars(count: int, start: date, rng: Random) -> list[Registrar]:
+    """
+    COUNT registrars spread evenly over 5 training years, seniors from year 3 onwards.
+    """
+    registrars = []
+    for idx in range(count):
+        year = idx % 5 + 1
+        started = start - timedelta(days=365 * (year - 1) + rng.randrange(0, 180))
+        registrars.append(Registrar(username=f"reg{idx:03d}", senior=year >= 3, start=started, id=idx + 1))
+    return registrars
+
+
+def synthetic_intake(count: int, start: date, first_id: int, rng: Random) -> list[Registrar]:
+    """
+    COUNT first year registrars starting within a fortnight of START, finishing 5 years later.
+    """
+    registrars = []
+    for idx in range(first_id, first_id + count):
+        started = start + timedelta(days=rng.randrange(0, 14))
+        registrars.append(
+            Registrar(
+                username=f"reg{idx - 1:03d}",
+                senior=False,
+                start=started,
+                finish=started + timedelta(days=365 * 5),
+                id=idx,
+            )
+        )
+    return registrars
+
+
+def synthetic_leaves(registrars: list[Registrar], start: date, end: date, rng: Random) -> list[Leave]:
+    """
+    Roughly 6 weeks of leave a year per registrar, taken in blocks of 1 to 10 days.
+    A few registrars are on parental leave for a month.
+    """
+    days = (end - start).days + 1
+    leaves = []
+    for registrar in registrars:
+        taken = set()
+        for _ in range(max(1, days * 30 // 365 // 5)):
+            first = start + timedelta(days=rng.randrange(days))
+            length = rng.randint(1, 10)
+            leave_type = rng.choice(LEAVE_TYPES)
+            taken.update((day, leave_type) for day in daterange(first, min(first + timedelta(days=length), end)))
+
+        if rng.random() < 0.05:
+            first = start + timedelta(days=rng.randrange(days))
+            taken.update((day, LeaveType.PARENTAL) for day in daterange(first, min(first + timedelta(days=30), end)))
+
+        # One leave per registrar per day
+        by_day = dict(sorted(taken))
+        leaves.extend(
+            Leave(date=day, type=leave_type, registrar=registrar)
+            for day, leave_type in by_day.items()
+            if day.weekday() < Weekday.SAT
+        )
+    return leaves
+
+
+def synthetic_statuses(registrars: list[Registrar], start: date, end: date, rng: Random) -> list[Status]:
+    """
+    Pre-oncall for first years, part time, pre-exam and the occasional reliever.
+    """
+    days = (end - start).days + 1
+    statuses = []
+    for registrar in registrars:
+        roll = rng.random()
+        if (start - registrar.start).days < 90:
+            statuses.append(Status(start, start + timedelta(days=90), StatusType.PRE_ONCALL, registrar))
+        elif roll < 0.1:
+            statuses.append(
+                Status(start, end, StatusType.PART_TIME, registrar, weekdays=[Weekday(rng.randrange(0, 5))])
+            )
+        elif roll < 0.3:
+            first = start + timedelta(days=rng.randrange(days))
+            statuses.append(Status(first, first + timedelta(days=14), StatusType.PRE_EXAM, registrar))
+        elif roll < 0.35:
+            first = start + timedelta(days=rng.randrange(days))
+            statuses.append(Status(first, first + timedelta(days=28), StatusType.RELIEVER, registrar))
+    return statuses
+
+
+def synthetic_roster(registrars: int, start: date, end: date, seed: int = 0) -> SyntheticRoster:
+    rng = Random(seed)
+    people = synthetic_registrars(registrars, start, rng)
+    return SyntheticRoster(
+        start=start,
+        end=end,
+        registrars=people,
+        leaves=synthetic_leaves(people, start, end, rng),
+        statuses=synthetic_statuses(people, start, end, rng),
+    )
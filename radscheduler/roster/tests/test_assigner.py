@@ -7,8 +7,9 @@ import pandas as pd
 
 from radscheduler.roster.assigner import AutoAssigner
 from radscheduler.roster.generator import generate_shifts
-from radscheduler.roster.models import LeaveType, Shift, ShiftType, Status, StatusType
+from radscheduler.roster.models import Leave, LeaveType, Shift, ShiftType, Status, StatusType
 from radscheduler.roster.rosters import SingleOnCallRoster
+from radscheduler.roster.stats import RunStats
 from radscheduler.roster.utils import (
     filter_shifts,
     generate_leaves,
@@ -16,7 +17,7 @@ from radscheduler.roster.utils import (
     shift_breakdown,
     shifts_to_dataframe,
 )
-from radscheduler.roster.validators import validate_roster
+from radscheduler.roster.validators import validate_roster, validate_swap
 
 FATIGUE_STDEV_THRESHOLD = 6
 
@@ -172,7 +173,7 @@ def test_complete_week(juniors, seniors):
     assert wed_night.registrar == thur_night.registrar
     assert thur_night.registrar != fri_long.registrar  # not oncall post nights
 
-    assert validate_roster(result, [], [])
+    assert validate_roster(result, [], []) == []
 
 
 def test_weekend_and_rdos(seniors):
@@ -206,7 +207,7 @@ def test_weekend_and_rdos(seniors):
     assert sat2.registrar == mon_rdo2.registrar, "Mon RDO for weekend 2"
     assert mon_rdo2.registrar == tue_rdo2.registrar, "Tue RDO for weekend 2"
 
-    assert validate_roster(result, [], [])
+    assert validate_roster(result, [], []) == []
 
 
 def test_nights_and_rdos(seniors):
@@ -230,7 +231,51 @@ def test_nights_and_rdos(seniors):
     assert mon_rdo.registrar == sat_night.registrar, "same registrar for Mon RDO and Sat night"
     assert mon_rdo.registrar == tue_rdo.registrar, "same registrar for Tue RDO and Mon RDO"
 
-    assert validate_roster(result, [], [])
+    assert validate_roster(result, [], []) == []
+
+
+def test_coupled_shifts(seniors):
+    shifts = generate_shifts(SingleOnCallRoster, date(2023, 1, 2), date(2023, 1, 22))
+    get_shift = partial(filter_shifts, shifts)
+
+    def slots(result):
+        return {(shift.date.day, shift.type) for shift in result}
+
+    # A weekend brings its RDOs, and nothing else
+    sunday = get_shift(date(2023, 1, 8), ShiftType.LONG)
+    assert slots(AutoAssigner.coupled_shifts(sunday, shifts)) == {
+        (7, ShiftType.LONG),
+        (8, ShiftType.LONG),
+        (2, ShiftType.RDO),
+        (3, ShiftType.RDO),
+        (12, ShiftType.RDO),
+        (13, ShiftType.RDO),
+    }
+    # Weekday nights bring the sleeps after them
+    wednesday = get_shift(date(2023, 1, 11), ShiftType.NIGHT)
+    assert slots(AutoAssigner.coupled_shifts(wednesday, shifts)) == {
+        *[(day, ShiftType.NIGHT) for day in (9, 10, 11, 12)],
+        *[(day, ShiftType.SLEEP) for day in (13, 14, 15)],
+    }
+    # And a sleep brings the weekend nights before it
+    tuesday = get_shift(date(2023, 1, 10), ShiftType.SLEEP)
+    assert slots(AutoAssigner.coupled_shifts(tuesday, shifts)) == {
+        *[(day, ShiftType.NIGHT) for day in (6, 7, 8)],
+        *[(day, ShiftType.SLEEP) for day in (9, 10)],
+    }
+    # Weekday long days stand alone
+    monday = get_shift(date(2023, 1, 9), ShiftType.LONG)
+    assert AutoAssigner.coupled_shifts(monday, shifts) == monday
+
+    # The coupled set can be refilled on its own
+    result = AutoAssigner(registrars=seniors, unfilled=shifts).fill_roster()
+    affected = AutoAssigner.coupled_shifts(get_shift(date(2023, 1, 14), ShiftType.LONG), result)
+    for shift in affected:
+        shift.registrar = None
+    filled = [shift for shift in result if all(shift is not s for s in affected)]
+    refilled = AutoAssigner(registrars=seniors, unfilled=affected, filled=filled).fill_roster()
+    assert all(shift.registrar is not None for shift in affected)
+    assert validate_roster(refilled, [], []) == []
 
 
 def test_three_year_roster_equal_start(juniors, seniors):
@@ -253,7 +298,7 @@ def test_three_year_roster_equal_start(juniors, seniors):
         fatigue_stdev < FATIGUE_STDEV_THRESHOLD
     ), "Fatigue level should be fairly even across all registrars: f{fatigue_breakdown}"
 
-    assert validate_roster(result, [], [])
+    assert validate_roster(result, [], []) == []
 
 
 def test_no_shifts_when_on_leave(juniors, seniors):
@@ -263,7 +308,7 @@ def test_no_shifts_when_on_leave(juniors, seniors):
     result = assigner.fill_roster()
 
     assert list(filter(lambda shift: shift.registrar == juniors[0], result)) == [], "No shifts if on leave"
-    assert validate_roster(result, leaves=leaves, statuses=[])
+    assert validate_roster(result, leaves=leaves, statuses=[]) == []
 
 
 def test_non_rostered_status(juniors, seniors):
@@ -293,7 +338,7 @@ def test_non_rostered_status(juniors, seniors):
         list(filter(lambda a: a.registrar == junior1, result)) == []
     ), "Registrar with pre-oncall status should not be rostered"
 
-    assert validate_roster(result, [], statuses=[status])
+    assert validate_roster(result, [], statuses=[status]) == []
 
 
 def test_first_start_oncall(juniors, seniors):
@@ -326,7 +371,7 @@ def test_first_start_oncall(juniors, seniors):
 
     assert dist_stdev < 5, "Distance between shifts should be fairly even"
 
-    assert validate_roster(result, [], [])
+    assert validate_roster(result, [], []) == []
 
 
 def test_not_rostered_before_start_date(juniors):
@@ -374,7 +419,7 @@ def test_return_from_parental_leave(juniors, seniors):
         dist_mean - 2 * dist_stdev < distances[0][1]
     ), "Distance should be higher than mean, as registrar is returning from leave"
 
-    assert validate_roster(result, leaves=leaves, statuses=[])
+    assert validate_roster(result, leaves=leaves, statuses=[]) == []
 
 
 def test_fill_roster_with_prospective_slots_filled(juniors, seniors):
@@ -391,7 +436,17 @@ def test_fill_roster_with_prospective_slots_filled(juniors, seniors):
     result = assigner.fill_roster()
     assert filter_shifts(result, date(2023, 12, 24), ShiftType.LONG)[0].registrar == juniors[0]
     assert filter_shifts(result, date(2023, 12, 25), ShiftType.LONG)[0].registrar == juniors[0]
-    assert validate_roster(result, [], [])
+    assert validate_roster(result, [], []) == []
+
+
+def test_run_stats(juniors, seniors):
+    shifts = generate_shifts(SingleOnCallRoster, date(2023, 1, 2), date(2023, 1, 29))
+    stats = RunStats()
+    result = AutoAssigner(registrars=juniors + seniors, unfilled=shifts, stats=stats).fill_roster()
+
+    assert stats.counters["shifts"] == len(shifts)
+    assert stats.counters["unfilled"] == len([shift for shift in result if shift.registrar is None])
+    assert stats.counters["validations"] >= stats.counters["candidates"] > 0
 
 
 def test_ignore_extra_duty_from_fatigue(juniors):
@@ -404,6 +459,14 @@ def test_ignore_extra_duty_from_fatigue(juniors):
     assert result[0][1] == 0
 
 
+def test_baseline_fatigue_from_ledger(juniors):
+    juniors[0].id, juniors[1].id = 1, 2
+    filled = [Shift(date(2023, 12, 20), ShiftType.LONG, registrar=juniors[0])]
+    # The ledger replaces scanning the filled shifts
+    assigner = AutoAssigner(registrars=juniors[:2], unfilled=[], filled=filled, ledger_fatigue={2: 3.0})
+    assert assigner.registrars_baseline_fatigue() == [(juniors[0], 0.0), (juniors[1], 3.0)]
+
+
 def test_fatigue_recency_bias():
     prev_shift = Shift(date(2023, 11, 14), ShiftType.LONG)  # Monday
     assigner = AutoAssigner(registrars=[], unfilled=[])
@@ -421,16 +484,52 @@ def test_fatigue_recency_bias():
     assert f == 7
 
 
-def test_swap_long_day():
-    # should be moved to django
-    pass
-
+def block_of(shifts, day, shift_type, registrar):
+    block = AutoAssigner.coupled_shifts(filter_shifts(shifts, day, shift_type), shifts)
+    for shift in block:
+        shift.registrar = registrar
+    return block
 
-def test_swap_night():
-    # should be moved to django
-    pass
 
-
-def test_swap_weekends():
-    # should be moved to django
-    pass
+def test_swap_long_day(juniors):
+    a, b = juniors[:2]
+    shifts = generate_shifts(SingleOnCallRoster, date(2023, 1, 2), date(2023, 1, 22))
+    given = block_of(shifts, date(2023, 1, 9), ShiftType.LONG, a)
+    taken = block_of(shifts, date(2023, 1, 11), ShiftType.LONG, b)
+    assert validate_swap(b, given, taken, taken)
+    assert validate_swap(a, taken, given, given)
+
+    # Not the day after another long day
+    sunday = block_of(shifts, date(2023, 1, 8), ShiftType.LONG, b)
+    assert not validate_swap(b, given, taken, taken + sunday)
+
+
+def test_swap_night(juniors):
+    a, b = juniors[:2]
+    shifts = generate_shifts(SingleOnCallRoster, date(2023, 1, 2), date(2023, 1, 29))
+    nights = block_of(shifts, date(2023, 1, 10), ShiftType.NIGHT, a)
+    long_day = block_of(shifts, date(2023, 1, 17), ShiftType.LONG, b)
+    assert len(nights) == 7
+    assert validate_swap(b, nights, long_day, long_day)
+
+    # The whole block is checked, including the sleep days after it
+    thursday = block_of(shifts, date(2023, 1, 5), ShiftType.LONG, b)
+    assert validate_swap(b, nights, long_day, long_day + thursday)
+    friday = block_of(shifts, date(2023, 1, 13), ShiftType.LONG, b)
+    assert not validate_swap(b, nights, long_day, long_day + friday)
+
+
+def test_swap_weekends(juniors):
+    a, b = juniors[:2]
+    shifts = generate_shifts(SingleOnCallRoster, date(2023, 1, 2), date(2023, 1, 29))
+    weekend = block_of(shifts, date(2023, 1, 15), ShiftType.LONG, a)
+    long_day = block_of(shifts, date(2023, 1, 25), ShiftType.LONG, b)
+    assert validate_swap(b, weekend, long_day, long_day)
+
+    # 17.3.5 every second weekend free
+    last_weekend = block_of(shifts, date(2023, 1, 7), ShiftType.LONG, b)
+    assert not validate_swap(b, weekend, long_day, long_day + last_weekend)
+
+    # On leave on the Sunday
+    leave = Leave(date(2023, 1, 15), LeaveType.ANNUAL, b)
+    assert not validate_swap(b, weekend, long_day, long_day, leaves=[leave])
@@ -41,8 +41,9 @@ def test_generate_usual_shifts():
 
 def test_generate_double_oncall():
     # Ensures flexibility for double oncall
-    DoubleOnCall = SingleOnCallRoster
-    DoubleOnCall.TUE = ((ShiftType.LONG, 2), (ShiftType.NIGHT, 2))
+    class DoubleOnCall(SingleOnCallRoster):
+        TUE = ((ShiftType.LONG, 2), (ShiftType.NIGHT, 2))
+
     shifts = generate_shifts(DoubleOnCall, date(2023, 1, 2), date(2023, 1, 22))
     day = filter_shifts(shifts, date(2023, 1, 3), ShiftType.LONG)  # Tuesday
     assert len(day) == 2, "Double oncall on Tuesday"
@@ -5,7 +5,7 @@ from radscheduler.roster.generator import generate_shifts
 from radscheduler.roster.models import Leave, LeaveType, Shift, ShiftType, Status, StatusType, Weekday
 from radscheduler.roster.rosters import SingleOnCallRoster
 from radscheduler.roster.utils import daterange, generate_leaves, shift_breakdown, shifts_to_dataframe
-from radscheduler.roster.validators import StonzMecaValidator
+from radscheduler.roster.validators import Clause, StonzMecaValidator, Violation, validate_roster
 
 
 def test_not_on_leave(juniors):
@@ -85,5 +85,79 @@ def test_one_shift_per_day(juniors):
         assert validator.validate_one_shift_per_day() == False
 
 
-def test_validate_roster():
-    pass
+def test_validate_roster(juniors):
+    shifts = generate_shifts(SingleOnCallRoster, date(2023, 1, 2), date(2023, 3, 26))
+    result = AutoAssigner(registrars=juniors, unfilled=shifts).fill_roster()
+    assert validate_roster(result, [], []) == []
+
+
+def test_validate_roster_each_registrar(juniors):
+    # The second registrar is checked against their own shifts too
+    shifts = [
+        Shift(date(2023, 1, 2), ShiftType.LONG, registrar=juniors[0]),
+        Shift(date(2023, 1, 3), ShiftType.LONG, registrar=juniors[1]),
+        Shift(date(2023, 1, 3), ShiftType.NIGHT, registrar=juniors[1]),
+    ]
+    assert validate_roster(shifts, [], []) == [
+        Violation(Clause.ONE_SHIFT_PER_DAY, juniors[1].username, (date(2023, 1, 3),))
+    ]
+
+
+def test_validate_roster_long_days_sliding_window(juniors):
+    reg = juniors[0]
+    # Mon, Thu, Sun are 3 long days within 7 days; the next Wed overlaps the same window
+    days = [date(2023, 1, 2), date(2023, 1, 5), date(2023, 1, 8), date(2023, 1, 11), date(2023, 1, 30)]
+    shifts = [Shift(day, ShiftType.LONG, registrar=reg) for day in days]
+
+    violations = [v for v in validate_roster(shifts, [], []) if v.clause == Clause.LONG_DAYS]
+    assert violations == [Violation(Clause.LONG_DAYS, reg.username, tuple(days[:4]))]
+
+    # 7 days apart is a new window
+    shifts = [
+        Shift(day, ShiftType.LONG, registrar=reg) for day in (date(2023, 1, 2), date(2023, 1, 4), date(2023, 1, 9))
+    ]
+    assert validate_roster(shifts, [], []) == []
+
+
+def test_long_days_clause_excludes_nights(juniors):
+    reg = juniors[0]
+    # A weekday night set then a long day: the clause as written allows it, the assigner's rule does not
+    nights = [Shift(date(2023, 1, 2) + timedelta(n), ShiftType.NIGHT, registrar=reg) for n in range(4)]
+    long_day = Shift(date(2023, 1, 8), ShiftType.LONG, registrar=reg)
+    assert validate_roster([*nights, long_day], [], []) == []
+    assert not StonzMecaValidator(long_day, reg, nights).validate_no_gt_2_long_days_in_7()
+
+
+def test_validate_roster_weekends(juniors):
+    reg = juniors[0]
+    shifts = [
+        Shift(date(2023, 1, 6), ShiftType.NIGHT, registrar=reg),  # Friday night is part of the weekend
+        Shift(date(2023, 1, 15), ShiftType.LONG, registrar=reg),
+        Shift(date(2023, 1, 16), ShiftType.RDO, registrar=reg),
+    ]
+    leaves = [
+        Leave(date(2023, 1, 16), LeaveType.ANNUAL, reg),
+        Leave(date(2023, 1, 20), LeaveType.ANNUAL, reg, no_abutting_weekend=False),
+    ]
+    assert validate_roster(shifts, leaves, []) == [
+        Violation(Clause.WEEKEND_FREE, reg.username, (date(2023, 1, 7), date(2023, 1, 14))),
+        Violation(Clause.ABUTTING_LEAVE, reg.username, (date(2023, 1, 14), date(2023, 1, 16))),
+    ]
+
+
+def test_validate_roster_leaves_and_statuses(juniors):
+    reg = juniors[0]
+    shifts = [
+        Shift(date(2023, 1, 3), ShiftType.LONG, registrar=reg),
+        Shift(date(2023, 1, 10), ShiftType.LONG, registrar=reg),
+        Shift(date(2023, 1, 11), ShiftType.NIGHT, registrar=reg),
+    ]
+    leaves = [Leave(date(2023, 1, 3), LeaveType.ANNUAL, reg)]
+    statuses = [
+        Status(date(2023, 1, 9), date(2023, 1, 13), StatusType.PART_TIME, reg, weekdays=[Weekday.TUE]),
+        Status(date(2023, 1, 1), date(2023, 1, 31), StatusType.BUDDY, reg),
+    ]
+    assert validate_roster(shifts, leaves, statuses) == [
+        Violation(Clause.ON_LEAVE, reg.username, (date(2023, 1, 3),)),
+        Violation(Clause.STATUS, reg.username, (date(2023, 1, 10),)),
+    ]
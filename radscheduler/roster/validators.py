@@ -1,6 +1,10 @@
+from collections import defaultdict, deque
+from dataclasses import dataclass
 from datetime import date, timedelta
 
-from radscheduler.roster.models import DetailedShiftType, Shift, ShiftType, StatusType, Weekday
+from django.db import models
+
+from radscheduler.roster.models import DetailedShiftType, Leave, Shift, ShiftType, Status, StatusType, Weekday
 from radscheduler.roster.rosters import SingleOnCallRoster
 
 
@@ -74,6 +78,11 @@ class StonzMecaValidator:
         """
         17.2.2 RMOs shall not be rostered on duty for more than 2 long days in 7.
         For the purposes of this clause, a “long day” shall be a duty where in excess of 10 hours are worked.
+
+        Stricter than the clause, on purpose: nights count too, and the window spans 7 days either side,
+        so that blocks are placed well clear of each other. Nights are governed by 17.4, so
+        `validate_roster` and the audit check the clause as written, on long days only. Every roster this
+        rule allows also passes them.
         """
         shifts_within_7_days = [
             shift
@@ -197,42 +206,158 @@ def group_shifts_by_date(shifts: list[Shift]) -> dict[date, list[Shift]]:
     return results
 
 
-def validate_roster(shifts, leaves, statuses):
-    registrars = set(shift.registrar.username for shift in shifts if shift.registrar is not None)
+def leads_block(shift: Shift) -> bool:
+    """
+    Whether `AutoAssigner` validates SHIFT itself, rather than giving it to the registrar of its block.
+    """
+    match DetailedShiftType.from_shift(shift):
+        case DetailedShiftType.LONG:
+            return True
+        case DetailedShiftType.WEEKEND | DetailedShiftType.NIGHT | DetailedShiftType.WEEKEND_NIGHT:
+            return SingleOnCallRoster.is_start_of_set(shift)
+    return False
+
+
+def validate_swap(registrar, given: list[Shift], taken: list[Shift], shifts, leaves=(), statuses=()) -> bool:
+    """
+    Can REGISTRAR work the block of GIVEN shifts in place of their own block of TAKEN shifts?
+
+    SHIFTS, LEAVES and STATUSES are the registrar's own. Blocks are checked the way `AutoAssigner`
+    fills them: the first shift against every `StonzMecaValidator` rule, the rest only for being free.
+    """
+    remaining = [shift for shift in shifts if all(shift is not t for t in taken)]
+    for shift in given:
+        validator = StonzMecaValidator(shift, registrar, remaining, leaves=leaves, statuses=statuses)
+        if leads_block(shift):
+            valid = validator.is_valid()
+        else:
+            valid = (
+                validator.validate_one_shift_per_day()
+                and validator.validate_has_started_working()
+                and validator.validate_has_not_finished_working()
+            )
+            if shift.type not in OFF_DUTY:
+                valid = valid and validator.validate_not_on_leave() and validator.validate_not_unrostered_status()
+        if not valid:
+            return False
+    return True
 
-    for registrar in registrars:
-        shifts = [shift for shift in filter(lambda s: s.registrar == registrar, shifts)]
-        leaves = list(filter(lambda l: l.registrar == registrar, leaves))
-        statuses = list(filter(lambda s: s.registrar == registrar, statuses))
 
-        groupby_date = group_shifts_by_date(shifts)
-        for date, shifts in groupby_date.items():
-            if len(shifts) > 1:
-                assert False, f"{registrar} cannot work more than 1 shift per day: {shifts}"
+class Clause(models.TextChoices):
+    ONE_SHIFT_PER_DAY = "ONE_SHIFT", "More than one shift on a day"
+    LONG_DAYS = "17.2.2", "More than 2 long days in 7"
+    WEEKEND_FREE = "17.3.5", "Every second weekend free"
+    ON_LEAVE = "LEAVE", "Working while on leave"
+    ABUTTING_LEAVE = "21.4.1", "Weekend abutting leave"
+    STATUS = "STATUS", "Working during a non-rostered status"
 
-        working_days = [shift.date for shift in shifts if shift.type in [ShiftType.LONG, ShiftType.NIGHT]]
-        for i in range(len(working_days) - 7):
-            if len(working_days[i : i + 7]) >= 2:
-                assert False, f"{registrar} cannot work more than 2 shifts in 7 days"
 
-        for leave in leaves:
-            shifts = list(filter(lambda s: (s.date == leave.date), shifts))
-            assert shifts == [], f"{registrar} cannot work {shifts} while on leave {leave}"
+@dataclass(frozen=True)
+class Violation:
+    clause: Clause
+    registrar: str  # username
+    dates: tuple[date, ...]
 
-        for leave in leaves:
-            if leave.date.weekday() == Weekday.MON:
-                shifts = list(
-                    filter(
-                        lambda a: (date - timedelta(2) <= a.shift.date <= date - timedelta(1)),
-                        shifts,
-                    )
-                )
-                assert shifts == [], f"{registrar} cannot work on weekends abutting leave"
+    def __str__(self) -> str:
+        dates = ", ".join(d.strftime("%d/%m/%Y") for d in self.dates)
+        return f"{self.registrar}: {self.clause.label} ({dates})"
 
-        for status in statuses:
-            if status.type == StatusType.BUDDY:
-                continue
-            shifts = filter(lambda shift: (status.start <= shift.date <= status.end), shifts)
-            assert list(shifts) == [], f"{registrar} cannot work while on {status}"
 
-    return True
+# Days off rather than duties, so they do not count as working
+OFF_DUTY = (ShiftType.RDO, ShiftType.SLEEP)
+
+
+def weekend_of(shift: Shift) -> date | None:
+    """
+    Saturday of the weekend a duty belongs to. A Friday night is part of the weekend, a Friday long day is not.
+    """
+    weekday = shift.date.weekday()
+    if weekday == Weekday.SAT:
+        return shift.date
+    if weekday == Weekday.SUN:
+        return shift.date - timedelta(1)
+    if weekday == Weekday.FRI and shift.type == ShiftType.NIGHT:
+        return shift.date + timedelta(1)
+    return None
+
+
+def validate_roster(shifts: list[Shift], leaves: list[Leave], statuses: list[Status]) -> list[Violation]:
+    """
+    Check a whole roster, and return the violations found. An empty list means the roster is compliant.
+
+    Shifts, leaves and statuses are grouped by registrar once, and each registrar's shifts are
+    scanned in date order, so this runs in linear time and can be used on years of history.
+    """
+    by_registrar = defaultdict(list)
+    for shift in shifts:
+        if shift.registrar is not None:
+            by_registrar[shift.registrar.username].append(shift)
+    leaves_by_registrar = defaultdict(list)
+    for leave in leaves:
+        leaves_by_registrar[leave.registrar.username].append(leave)
+    statuses_by_registrar = defaultdict(list)
+    for status in statuses:
+        if status.type != StatusType.BUDDY:
+            statuses_by_registrar[status.registrar.username].append(status)
+
+    violations = []
+    for username, registrar_shifts in by_registrar.items():
+        violations += _validate_registrar(
+            username,
+            sorted(registrar_shifts, key=lambda shift: shift.date),
+            leaves_by_registrar[username],
+            statuses_by_registrar[username],
+        )
+    return sorted(violations, key=lambda violation: (violation.dates[0], violation.registrar, violation.clause))
+
+
+def _validate_registrar(username, shifts, leaves, statuses) -> list[Violation]:
+    violations = []
+    leave_dates = {leave.date for leave in leaves}
+    weekends = set()
+    long_days = deque()  # long days in the 7 days up to the current shift
+    long_day_violation = None
+
+    for idx, shift in enumerate(shifts):
+        if idx and shifts[idx - 1].date == shift.date:
+            violations.append(Violation(Clause.ONE_SHIFT_PER_DAY, username, (shift.date,)))
+        if shift.type in OFF_DUTY:
+            continue
+
+        if shift.date in leave_dates:
+            violations.append(Violation(Clause.ON_LEAVE, username, (shift.date,)))
+        for status in statuses:
+            if status.start <= shift.date <= status.end and status.not_oncall(shift):
+                violations.append(Violation(Clause.STATUS, username, (shift.date,)))
+                break
+        if saturday := weekend_of(shift):
+            weekends.add(saturday)
+
+        # 17.2.2 as written, on long days only (see `StonzMecaValidator.validate_no_gt_2_long_days_in_7`)
+        if shift.type == ShiftType.LONG:
+            long_days.append(shift.date)
+            while shift.date - long_days[0] >= timedelta(7):
+                long_days.popleft()
+            if len(long_days) > 2:
+                # Overlapping windows are reported once, spanning all their long days
+                if long_day_violation and long_day_violation.dates[-1] >= long_days[0]:
+                    violations.remove(long_day_violation)
+                    dates = tuple(sorted(set(long_day_violation.dates) | set(long_days)))
+                else:
+                    dates = tuple(long_days)
+                long_day_violation = Violation(Clause.LONG_DAYS, username, dates)
+                violations.append(long_day_violation)
+
+    for saturday in sorted(weekends):
+        if saturday - timedelta(7) in weekends:
+            violations.append(Violation(Clause.WEEKEND_FREE, username, (saturday - timedelta(7), saturday)))
+
+    for leave in leaves:
+        if not leave.no_abutting_weekend:
+            continue
+        if leave.date.weekday() == Weekday.FRI and leave.date + timedelta(1) in weekends:
+            violations.append(Violation(Clause.ABUTTING_LEAVE, username, (leave.date, leave.date + timedelta(1))))
+        elif leave.date.weekday() == Weekday.MON and leave.date - timedelta(2) in weekends:
+            violations.append(Violation(Clause.ABUTTING_LEAVE, username, (leave.date - timedelta(2), leave.date)))
+
+    return violations
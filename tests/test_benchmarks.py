@@ -0,0 +1,28 @@
+import pytest
+
+from benchmarks import harness
+
+
+def test_compare_flags_regressions():
+    baseline = {"fill_roster/10x1": {"wall": 1.0, "peak_kib": 100.0, "calls": 1000, "error": ""}}
+
+    assert harness.compare({"fill_roster/10x1": {**baseline["fill_roster/10x1"], "wall": 1.2}}, baseline) == []
+    assert harness.compare({"fill_roster/10x1": {**baseline["fill_roster/10x1"], "calls": 2000}}, baseline) == [
+        "fill_roster/10x1: calls 2000 > 1000 x 1.1"
+    ]
+    assert harness.compare(
+        {"fill_roster/10x1": {**baseline["fill_roster/10x1"], "error": "NoOneAvailable: "}}, baseline
+    )
+    # Results without a baseline are not compared
+    assert harness.compare({"fill_roster/99x1": {**baseline["fill_roster/10x1"], "calls": 2000}}, baseline) == []
+
+
+@pytest.mark.parametrize("name", harness.BENCHMARKS)
+def test_call_counts_within_baseline(name):
+    # Call counts are deterministic, unlike wall time, so they can be checked on any machine
+    baseline = harness.load_baseline()
+    results = harness.run_benchmarks([name], registrars=[10], months=[1], repeat=1)
+    key = f"{name}/10x1"
+
+    assert not results[key]["error"]
+    assert results[key]["calls"] <= baseline[key]["calls"] * harness.CALLS_TOLERANCE
@@ -0,0 +1,44 @@
+import re
+
+import pytest
+
+from loadtest import runner
+from loadtest.scenarios import SCENARIOS
+
+
+def samples(endpoint, latencies, queries=2, status=200, pool_wait=None):
+    return [runner.Sample(endpoint, 0.0, latency / 1000, status, queries, pool_wait) for latency in latencies]
+
+
+def test_summarise_per_endpoint():
+    scenario = SCENARIOS["smoke"]
+    results = runner.summarise(
+        scenario,
+        samples("GET /leaves/", range(1, 101), pool_wait=0.5)
+        + samples("POST /leaves/", [10, 20], queries=None, status=500),
+        "http://testserver",
+    )
+
+    leaves = results["endpoints"]["GET /leaves/"]
+    assert leaves["requests"] == 100
+    assert leaves["throughput_rps"] == 100 / scenario.duration
+    assert (leaves["p50_ms"], leaves["p95_ms"], leaves["p99_ms"]) == (50.5, 95.0, 99.0)
+    assert leaves["mean_queries"] == 2
+    assert leaves["p95_pool_wait_ms"] == 0.5
+    assert results["endpoints"]["POST /leaves/"]["errors"] == 2
+    assert results["endpoints"]["POST /leaves/"]["mean_queries"] is None
+    assert results["endpoints"]["POST /leaves/"]["p95_pool_wait_ms"] is None
+    assert results["total"]["requests"] == 102
+
+
+def test_compare():
+    before = {"endpoints": {"GET /leaves/": {"p95_ms": 100.0, "throughput_rps": 10.0}}}
+    after = {"endpoints": {"GET /leaves/": {"p95_ms": 50.0, "throughput_rps": 20.0}, "GET /new/": {}}}
+    [line] = runner.compare(after, before)
+    assert "100.0 ->     50.0ms" in line
+
+
+@pytest.mark.django_db
+def test_query_count_header(client):
+    response = client.get("/api/calendar/shifts", {"start": "2023-01-01", "end": "2023-01-31"})
+    assert re.search(r'db;desc="(\d+) queries"', response["Server-Timing"]).group(1) == "2"